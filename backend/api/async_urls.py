@@ -0,0 +1,38 @@
+from django.urls import URLPattern, include, path
+
+from .async_views import AsyncRecipeView, AsyncUserView, AsyncViewSetView
+from .urls import router
+
+ASYNC_VIEWS = {
+    "recipes-list": AsyncRecipeView,
+    "recipes-detail": AsyncRecipeView,
+    "recipes-search": AsyncRecipeView,
+    "users-subscriptions": AsyncUserView,
+    "tags-list": AsyncViewSetView,
+    "tags-detail": AsyncViewSetView,
+    "ingredients-list": AsyncViewSetView,
+}
+
+
+def make_async(pattern):
+    """
+    Заменяет представление маршрута роутера асинхронным,
+    сохраняя адрес и имя маршрута.
+    """
+    view_class = ASYNC_VIEWS.get(pattern.name)
+    if view_class is None:
+        return pattern
+    return URLPattern(
+        pattern.pattern,
+        view_class.as_view(pattern.callback),
+        pattern.default_args,
+        pattern.name,
+    )
+
+
+app_name = "api"
+
+urlpatterns = [
+    path("auth/", include("djoser.urls.authtoken")),
+    path("", include([make_async(pattern) for pattern in router.urls])),
+]
@@ -0,0 +1,24 @@
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from .middleware import install_query_recorder
+
+
+def run_in_thread(func, *args, **kwargs):
+    """
+    Выполняет синхронную функцию в пуле потоков и возвращает корутину.
+    У каждого потока свое соединение с базой, поэтому независимые
+    запросы, запущенные через asyncio.gather, выполняются параллельно.
+    После вызова соединение потока закрывается по правилам
+    CONN_MAX_AGE, как в конце обычного запроса.
+    Запросы потока учитываются в метриках текущего HTTP-запроса.
+    """
+
+    def call():
+        install_query_recorder()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(call, thread_sensitive=False)()
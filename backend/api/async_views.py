@@ -0,0 +1,126 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from rest_framework.response import Response
+
+from .async_utils import run_in_thread
+from .user_state import get_user_state
+from .utils import get_recipes_by_authors, get_recipes_limit
+
+ASYNC_METHODS = ("GET", "HEAD")
+
+
+class AsyncViewSetView:
+    """
+    Асинхронное представление для чтения поверх действия вьюсета.
+    Вьюсет создается так же, как в ViewSetMixin.as_view: аутентификация,
+    права, фильтры, пагинация и рендеринг остаются прежними.
+    Действие с одноименным асинхронным методом выполняется им,
+    остальные действия целиком выполняются в пуле потоков.
+    Запросы с другими методами передаются синхронному представлению.
+    """
+
+    def __init__(self, sync_view):
+        self.sync_view = sync_view
+
+    @classmethod
+    def as_view(cls, sync_view):
+        async def view(request, *args, **kwargs):
+            if request.method not in ASYNC_METHODS:
+                return await sync_to_async(sync_view)(
+                    request, *args, **kwargs
+                )
+            return await cls(sync_view).dispatch(request, *args, **kwargs)
+
+        view.cls = sync_view.cls
+        view.initkwargs = sync_view.initkwargs
+        view.actions = sync_view.actions
+        view.csrf_exempt = True
+        return view
+
+    def create_viewset(self, request, args, kwargs):
+        viewset = self.sync_view.cls(**self.sync_view.initkwargs)
+        viewset.action_map = dict(self.sync_view.actions)
+        if "get" in viewset.action_map:
+            viewset.action_map.setdefault("head", viewset.action_map["get"])
+        for method, action in viewset.action_map.items():
+            setattr(viewset, method, getattr(viewset, action))
+        viewset.args = args
+        viewset.kwargs = kwargs
+        viewset.request = viewset.initialize_request(request, *args, **kwargs)
+        viewset.headers = viewset.default_response_headers
+        return viewset
+
+    async def dispatch(self, request, *args, **kwargs):
+        viewset = self.create_viewset(request, args, kwargs)
+        request = viewset.request
+        try:
+            await run_in_thread(viewset.initial, request, *args, **kwargs)
+            handler = getattr(self, viewset.action, None)
+            if handler is None:
+                response = await run_in_thread(
+                    getattr(viewset, viewset.action), request, *args, **kwargs
+                )
+            else:
+                response = await handler(viewset, request, *args, **kwargs)
+        except Exception as exc:
+            response = viewset.handle_exception(exc)
+        return viewset.finalize_response(request, response, *args, **kwargs)
+
+
+class AsyncRecipeView(AsyncViewSetView):
+    """
+    Список, поиск и страница рецепта. Страница рецептов, COUNT(*)
+    и состояние пользователя загружаются одновременно,
+    затем одновременно загружаются теги и ингредиенты страницы.
+    """
+
+    async def list(self, viewset, request, *args, **kwargs):
+        serializer = viewset.fast_serializer_class(
+            viewset.get_serializer_context()
+        )
+        queryset = await run_in_thread(
+            lambda: serializer.prepare(
+                viewset.filter_queryset(viewset.get_queryset())
+            )
+        )
+        rows, state = await asyncio.gather(
+            viewset.paginator.apaginate_queryset(queryset, request, viewset),
+            run_in_thread(get_user_state, request),
+        )
+        recipe_ids = [row["id"] for row in rows]
+        tags, ingredients = await asyncio.gather(
+            run_in_thread(serializer.get_tags, recipe_ids),
+            run_in_thread(serializer.get_ingredients, recipe_ids),
+        )
+        return viewset.get_paginated_response(
+            serializer.build(rows, tags, ingredients, state)
+        )
+
+    async def search(self, viewset, request, *args, **kwargs):
+        return await self.list(viewset, request, *args, **kwargs)
+
+    async def retrieve(self, viewset, request, *args, **kwargs):
+        recipe, _ = await asyncio.gather(
+            run_in_thread(viewset.get_object),
+            run_in_thread(get_user_state, request),
+        )
+        return Response(viewset.get_serializer(recipe).data)
+
+
+class AsyncUserView(AsyncViewSetView):
+    """
+    Подписки: COUNT(*) и страница подписок загружаются одновременно.
+    """
+
+    async def subscriptions(self, viewset, request, *args, **kwargs):
+        recipes_limit = get_recipes_limit(request)
+        page = await viewset.paginator.apaginate_queryset(
+            viewset.get_subscriptions_queryset(), request, viewset
+        )
+        recipes_by_authors = await run_in_thread(
+            get_recipes_by_authors,
+            [subscription.author_id for subscription in page],
+            recipes_limit,
+        )
+        return viewset.get_subscriptions_response(page, recipes_by_authors)
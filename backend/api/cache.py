@@ -0,0 +1,103 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import http_date, parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from foodgram.db.routers import use_primary
+from recipes.models import Tag
+
+
+def get_version_key(model):
+    return f"{model._meta.label_lower}:version"
+
+
+def get_cache_version(model):
+    """
+    Возвращает версию данных модели в кеше - время последнего изменения.
+    """
+    version = cache.get(get_version_key(model))
+    if version is None:
+        version = time.time()
+        cache.add(get_version_key(model), version, timeout=None)
+        version = cache.get(get_version_key(model), version)
+    return version
+
+
+def bump_cache_version(model):
+    cache.set(get_version_key(model), time.time(), timeout=None)
+
+
+def get_tag_ids_by_slug():
+    """
+    Возвращает словарь {слаг: id} для всех тегов из кеша.
+    """
+    key = f"tag_ids_by_slug:{get_cache_version(Tag)}"
+    tag_ids = cache.get(key)
+    if tag_ids is None:
+        with use_primary():
+            tag_ids = dict(Tag.objects.values_list("slug", "id"))
+        cache.set(key, tag_ids, settings.REFERENCE_CACHE_TIMEOUT)
+    return tag_ids
+
+
+class CachedReadOnlyMixin:
+    """
+    Кеширует ответы list и retrieve для справочных данных.
+    Ответы сбрасываются при изменении моделей из cache_models,
+    содержат заголовки ETag и Last-Modified и поддерживают
+    условные запросы с If-None-Match. Ответ для кеша строится
+    по основной базе: реплика может еще не получить изменение,
+    после которого сменилась версия.
+    """
+
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_response_cache_key(self, request, versions):
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        return ":".join(
+            (
+                "response",
+                self.basename,
+                request.accepted_renderer.format,
+                path,
+                *map(str, versions),
+            )
+        )
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        versions = [get_cache_version(model) for model in self.cache_models]
+        key = self.get_response_cache_key(request, versions)
+        cached = cache.get(key)
+        if cached is None:
+            with use_primary():
+                response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            content = json.dumps(response.data, sort_keys=True).encode()
+            cached = {
+                "data": response.data,
+                "etag": f'"{hashlib.sha1(content).hexdigest()}"',
+                "last_modified": http_date(max(versions)),
+            }
+            cache.set(key, cached, settings.REFERENCE_CACHE_TIMEOUT)
+        etags = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+        if "*" in etags or cached["etag"] in etags:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(cached["data"])
+        response["ETag"] = cached["etag"]
+        response["Last-Modified"] = cached["last_modified"]
+        return response
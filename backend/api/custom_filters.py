@@ -1,16 +1,25 @@
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
 
-from recipes.models import Recipe
+from recipes.models import Recipe, TagRecipes
+from recipes.ranking import RANKING_ORDERINGS, order_by_ranking
+
+from .cache import get_tag_ids_by_slug
+
+
+def get_tag_choices():
+    return [(slug, slug) for slug in get_tag_ids_by_slug()]
 
 
 class RecipeFilter(filters.FilterSet):
     """
     Фильтр для модели Recipe.
     Фильтрует по полям: tags, author, is_favorited, is_in_shopping_cart.
+    Параметр ordering=popular|trending сортирует по таблице рейтингов.
     """
 
-    tags = filters.AllValuesMultipleFilter(
-        field_name="tags__slug",
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_choices, method="tags_queryset"
     )
     is_favorited = filters.BooleanFilter(
         field_name="isfavorited", method="is_favorited_queryset"
@@ -18,11 +27,32 @@ class RecipeFilter(filters.FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         field_name="isinshoppingcart", method="is_in_shopping_cart_queryset"
     )
+    ordering = filters.ChoiceFilter(
+        choices=[(ordering, ordering) for ordering in RANKING_ORDERINGS],
+        method="ordering_queryset",
+    )
 
     class Meta:
-        fields = ("is_favorited", "is_in_shopping_cart", "author", "tags")
+        fields = (
+            "is_favorited",
+            "is_in_shopping_cart",
+            "author",
+            "tags",
+            "ordering",
+        )
         model = Recipe
 
+    def tags_queryset(self, queryset, name, value):
+        tag_ids_by_slug = get_tag_ids_by_slug()
+        return queryset.filter(
+            Exists(
+                TagRecipes.objects.filter(
+                    recipe=OuterRef("pk"),
+                    tag_id__in=[tag_ids_by_slug[slug] for slug in value],
+                )
+            )
+        )
+
     def is_favorited_queryset(self, queryset, name, value):
         if self.request.user.is_authenticated and value:
             return queryset.filter(isfavorited__user=self.request.user)
@@ -32,3 +62,6 @@ class RecipeFilter(filters.FilterSet):
         if self.request.user.is_authenticated and value:
             return queryset.filter(isinshoppingcart__user=self.request.user)
         return queryset
+
+    def ordering_queryset(self, queryset, name, value):
+        return order_by_ranking(queryset, value)
@@ -0,0 +1,191 @@
+from collections import defaultdict
+
+from django.core.files.storage import default_storage
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+
+from recipes.models import IngredientRecipe, TagRecipes
+
+from .renderers import FastJSONRenderer
+from .user_state import get_user_state
+from .utils import build_image_variant_urls
+
+RECIPE_FIELDS = (
+    "id",
+    "name",
+    "image",
+    "image_variants",
+    "text",
+    "cooking_time",
+    "pub_date",
+    "author_id",
+    "author__email",
+    "author__username",
+    "author__first_name",
+    "author__last_name",
+)
+
+
+class ValuesSerializer:
+    """
+    Облегченная сериализация для списков: словари ответа строятся
+    из строк .values() без вызова to_representation каждого поля DRF.
+    Формат ответа совпадает с serializer_class представления.
+    По умолчанию в ответ попадают поля fields без изменений.
+    """
+
+    fields = ()
+
+    def __init__(self, context):
+        self.context = context
+        self.request = context.get("request")
+
+    def prepare(self, queryset):
+        return queryset.values(*self.fields)
+
+    def to_representation(self, rows):
+        return [{field: row[field] for field in self.fields} for row in rows]
+
+
+class IngredientValuesSerializer(ValuesSerializer):
+    """
+    Повторяет IngredientSerializer. Поиск по индексу возвращает
+    готовые объекты Ingredient, поэтому поддерживаются и они.
+    """
+
+    fields = ("id", "name", "measurement_unit")
+
+    def prepare(self, queryset):
+        if hasattr(queryset, "values"):
+            return super().prepare(queryset)
+        return queryset
+
+    def to_representation(self, rows):
+        return super().to_representation(
+            row if isinstance(row, dict) else vars(row) for row in rows
+        )
+
+
+class RecipeValuesSerializer(ValuesSerializer):
+    """
+    Повторяет RecipeReadSerializer. Теги и ингредиенты страницы
+    загружаются двумя запросами и раскладываются по рецептам.
+    """
+
+    def prepare(self, queryset):
+        queryset = queryset.select_related(None).prefetch_related(None)
+        return queryset.values(*RECIPE_FIELDS, *queryset.query.annotations)
+
+    def get_tags(self, recipe_ids):
+        tags = defaultdict(list)
+        for recipe_id, tag_id, name, color, slug in (
+            TagRecipes.objects.filter(recipe_id__in=recipe_ids)
+            .order_by("tag_id")
+            .values_list(
+                "recipe_id", "tag_id", "tag__name", "tag__color", "tag__slug"
+            )
+        ):
+            tags[recipe_id].append(
+                {"id": tag_id, "name": name, "color": color, "slug": slug}
+            )
+        return tags
+
+    def get_ingredients(self, recipe_ids):
+        ingredients = defaultdict(list)
+        for recipe_id, ingredient_id, name, unit, amount in (
+            IngredientRecipe.objects.filter(recipe_id__in=recipe_ids)
+            .order_by("id")
+            .values_list(
+                "recipe_id",
+                "ingredient_id",
+                "ingredient__name",
+                "ingredient__measurement_unit",
+                "amount",
+            )
+        ):
+            ingredients[recipe_id].append(
+                {
+                    "id": ingredient_id,
+                    "name": name,
+                    "measurement_unit": unit,
+                    "amount": amount,
+                }
+            )
+        return ingredients
+
+    def get_image_url(self, name):
+        if not name:
+            return None
+        url = default_storage.url(name)
+        if self.request is None:
+            return url
+        return self.request.build_absolute_uri(url)
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        recipe_ids = [row["id"] for row in rows]
+        return self.build(
+            rows,
+            self.get_tags(recipe_ids),
+            self.get_ingredients(recipe_ids),
+            get_user_state(self.request),
+        )
+
+    def build(self, rows, tags, ingredients, state):
+        """
+        Собирает ответ из уже загруженных строк рецептов, тегов,
+        ингредиентов и состояния пользователя.
+        """
+        return [
+            {
+                "id": row["id"],
+                "tags": tags[row["id"]],
+                "author": {
+                    "email": row["author__email"],
+                    "id": row["author_id"],
+                    "username": row["author__username"],
+                    "first_name": row["author__first_name"],
+                    "last_name": row["author__last_name"],
+                    "is_subscribed": row["author_id"] in state.subscriptions,
+                },
+                "ingredients": ingredients[row["id"]],
+                "is_favorited": row["id"] in state.favorites,
+                "is_in_shopping_cart": row["id"] in state.shopping_cart,
+                "name": row["name"],
+                "image": self.get_image_url(row["image"]),
+                "image_variants": build_image_variant_urls(
+                    self.request, row["image_variants"]
+                ),
+                "text": row["text"],
+                "cooking_time": row["cooking_time"],
+            }
+            for row in rows
+        ]
+
+
+class FastListMixin:
+    """
+    Включает для list облегченную сериализацию fast_serializer_class.
+    Фильтрация и пагинация остаются прежними.
+    JSON этих вьюсетов кодируется FastJSONRenderer, остальные
+    представления рендерит стандартный JSONRenderer.
+    """
+
+    fast_serializer_class = None
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+
+    def list(self, request, *args, **kwargs):
+        if self.fast_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+        serializer = self.fast_serializer_class(
+            self.get_serializer_context()
+        )
+        queryset = serializer.prepare(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                serializer.to_representation(page)
+            )
+        return Response(serializer.to_representation(queryset))
@@ -0,0 +1,74 @@
+import base64
+import binascii
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework.fields import ImageField
+
+BASE64_HEADER_LIMIT = 256
+
+FILE_TYPE_HEADER_SIZE = 262
+
+
+class StreamingBase64ImageField(Base64ImageField):
+    """
+    Поле изображения в base64 для больших файлов.
+    Строки длиннее FILE_UPLOAD_MAX_MEMORY_SIZE декодируются частями
+    во временный файл на диске, а не в одну строку байтов в памяти.
+    Тип файла определяется по первым байтам.
+    """
+
+    chunk_size = 1024 * 1024
+
+    def to_internal_value(self, base64_data):
+        if (
+            not isinstance(base64_data, str)
+            or len(base64_data) <= settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        ):
+            return super().to_internal_value(base64_data)
+        content_type = None
+        start = 0
+        header_end = base64_data.find(";base64,", 0, BASE64_HEADER_LIMIT)
+        if header_end != -1:
+            if self.trust_provided_content_type:
+                content_type = base64_data[:header_end].replace("data:", "")
+            start = header_end + len(";base64,")
+        upload = TemporaryUploadedFile("image", content_type, 0, None)
+        try:
+            upload.size = self.decode_to_file(base64_data, start, upload)
+        except (binascii.Error, ValueError):
+            upload.close()
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+        upload.seek(0)
+        extension = self.get_file_extension(
+            None, upload.read(FILE_TYPE_HEADER_SIZE)
+        )
+        if extension not in self.ALLOWED_TYPES:
+            upload.close()
+            raise ValidationError(self.INVALID_TYPE_MESSAGE)
+        upload.name = f"{uuid.uuid4()}.{extension}"
+        upload.seek(0)
+        return ImageField.to_internal_value(self, upload)
+
+    def decode_to_file(self, base64_data, start, file):
+        """
+        Декодирует base64_data начиная с позиции start и пишет
+        результат в file. Пробельные символы пропускаются, а хвост
+        части, не кратный четырем символам, переносится в следующую.
+        Возвращает число записанных байтов.
+        """
+        size = 0
+        rest = ""
+        for position in range(start, len(base64_data), self.chunk_size):
+            chunk = rest + "".join(
+                base64_data[position:position + self.chunk_size].split()
+            )
+            length = len(chunk) - len(chunk) % 4
+            rest = chunk[length:]
+            size += file.write(base64.b64decode(chunk[:length]))
+        if rest:
+            size += file.write(base64.b64decode(rest))
+        return size
@@ -0,0 +1,114 @@
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+from foodgram.db.routers import use_primary
+from recipes.models import Ingredient
+
+NGRAM_SIZE = 3
+
+
+def get_ngrams(value, size):
+    return {value[i:i + size] for i in range(len(value) - size + 1)}
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов в памяти процесса для автодополнения.
+    Отсортированный массив названий отвечает за поиск по началу строки,
+    словарь n-грамм (до триграмм) - за поиск по вхождению подстроки.
+    Индекс строится при первом обращении и перестраивается после
+    изменения ингредиентов или по истечении INGREDIENT_INDEX_TTL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._built_version = None
+        self._built_at = 0
+        self._snapshot = ([], [], {})
+
+    def invalidate(self):
+        self._version += 1
+
+    def is_stale(self):
+        return (
+            self._built_version != self._version
+            or time.monotonic() - self._built_at
+            > settings.INGREDIENT_INDEX_TTL
+        )
+
+    def build(self):
+        version = self._version
+        with use_primary():
+            ingredients = sorted(
+                Ingredient.objects.all(),
+                key=lambda ingredient: (ingredient.name, ingredient.id),
+            )
+        ngrams = {}
+        for position, ingredient in enumerate(ingredients):
+            name = ingredient.name.casefold()
+            for size in range(1, NGRAM_SIZE + 1):
+                for ngram in get_ngrams(name, size):
+                    ngrams.setdefault(ngram, []).append(position)
+        self._snapshot = (
+            [ingredient.name for ingredient in ingredients],
+            ingredients,
+            {
+                ngram: frozenset(positions)
+                for ngram, positions in ngrams.items()
+            },
+        )
+        self._built_version = version
+        self._built_at = time.monotonic()
+
+    def _ensure_built(self):
+        if self.is_stale():
+            with self._lock:
+                if self.is_stale():
+                    self.build()
+
+    def search(self, term):
+        """
+        Возвращает ингредиенты в порядке CustomSearch:
+        сначала начинающиеся с term, затем содержащие term,
+        внутри каждой группы - по названию.
+        """
+        self._ensure_built()
+        names, ingredients, ngrams = self._snapshot
+        start = bisect_left(names, term)
+        end = bisect_left(names, term + chr(sys.maxunicode), start)
+        contains = sorted(
+            position
+            for position in find_substring(names, ngrams, term.casefold())
+            if not start <= position < end
+        )
+        return ingredients[start:end] + [
+            ingredients[position] for position in contains
+        ]
+
+
+def find_substring(names, ngrams, term):
+    """
+    Возвращает позиции названий, содержащих term без учета регистра.
+    """
+    if len(term) <= NGRAM_SIZE:
+        return ngrams.get(term, frozenset())
+    candidates = sorted(
+        (
+            ngrams.get(ngram, frozenset())
+            for ngram in get_ngrams(term, NGRAM_SIZE)
+        ),
+        key=len,
+    )
+    return {
+        position
+        for position in candidates[0].intersection(*candidates[1:])
+        if term in names[position].casefold()
+    }
+
+
+ingredient_index = IngredientIndex()
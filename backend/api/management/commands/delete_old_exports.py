@@ -0,0 +1,22 @@
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.shopping_list import delete_old_exports
+
+
+class Command(BaseCommand):
+    help = "Delete shopping list exports older than the given age"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-age",
+            type=int,
+            default=settings.SHOPPING_LIST_EXPORT_TTL,
+            help="Возраст выгрузки в секундах, после которого она удаляется",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        deleted = delete_old_exports(options["max_age"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} exports"))
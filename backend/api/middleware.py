@@ -0,0 +1,267 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+from foodgram.caches import is_shared_cache
+from foodgram.db.routers import use_replica
+
+logger = logging.getLogger(__name__)
+
+
+class QueryMetrics:
+    """
+    Обертка выполнения SQL: считает запросы и время в базе данных.
+    Под ASGI запросы одного HTTP-запроса выполняются в нескольких
+    потоках, поэтому счетчики меняются под блокировкой.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                self.count += 1
+                self.duration += duration
+
+
+query_metrics = ContextVar("query_metrics", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = query_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_query_recorder():
+    """
+    Подключает record_query к соединениям текущего потока. Запросы
+    учитываются в QueryMetrics из контекста, а sync_to_async копирует
+    контекст в поток, поэтому учет работает и в пуле run_in_thread.
+    """
+    if not settings.REQUEST_METRICS_ENABLED:
+        return
+    for connection in connections.all():
+        if record_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(record_query)
+
+
+class RequestMetricsMiddleware:
+    """
+    Включается настройкой REQUEST_METRICS_ENABLED.
+    Для каждого запроса считает число SQL-запросов, время в базе,
+    время сериализации и размер ответа, отдает их в заголовке
+    Server-Timing и пишет строку JSON в лог api.middleware.
+    Запросы сверх бюджета (REQUEST_QUERY_BUDGET или значение
+    для имени представления из REQUEST_QUERY_BUDGETS) пишутся
+    с уровнем WARNING и помечаются полем over_budget.
+
+    Время сериализации оценивается как время работы представления
+    с рендерингом ответа за вычетом времени в базе: отдельно DRF
+    его не измеряет, а остальная работа представления обычно мала.
+    Запросы, выполненные при чтении потокового ответа, не учитываются.
+    Под ASGI работает асинхронно и не занимает общий поток
+    синхронного кода.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        install_query_recorder()
+        metrics = QueryMetrics()
+        token = query_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            query_metrics.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics = QueryMetrics()
+        token = query_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            query_metrics.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    def finish(self, request, response, metrics, start):
+        total = time.perf_counter() - start
+        view_time = time.perf_counter() - getattr(
+            request, "_metrics_view_start", start
+        )
+        self.report(request, response, metrics, total, view_time)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Синхронное представление выполняется в том же потоке,
+        # что и process_view.
+        install_query_recorder()
+        request._metrics_view_start = time.perf_counter()
+        actions = getattr(view_func, "actions", None) or {}
+        request._metrics_action = actions.get(request.method.lower())
+
+    def get_budget(self, view_name):
+        return settings.REQUEST_QUERY_BUDGETS.get(
+            view_name, settings.REQUEST_QUERY_BUDGET
+        )
+
+    def report(self, request, response, metrics, total, view_time):
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        budget = self.get_budget(view_name)
+        db_ms = metrics.duration * 1000
+        serialize_ms = max(view_time * 1000 - db_ms, 0)
+        size = None if response.streaming else len(response.content)
+        response["Server-Timing"] = ", ".join(
+            (
+                f'db;dur={db_ms:.1f};desc="{metrics.count} queries"',
+                f"serialize;dur={serialize_ms:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            )
+        )
+        over_budget = metrics.count > budget
+        logger.log(
+            logging.WARNING if over_budget else logging.INFO,
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "view": view_name,
+                    "action": getattr(request, "_metrics_action", None),
+                    "status": response.status_code,
+                    "queries": metrics.count,
+                    "query_budget": budget,
+                    "over_budget": over_budget,
+                    "db_ms": round(db_ms, 2),
+                    "serialize_ms": round(serialize_ms, 2),
+                    "total_ms": round(total * 1000, 2),
+                    "bytes": size,
+                },
+                ensure_ascii=False,
+            ),
+        )
+
+
+def get_sticky_key(request):
+    """
+    Ключ общего кеша для отметки о записи: клиент определяется
+    по заголовку Authorization или cookie сессии.
+    """
+    client = request.META.get("HTTP_AUTHORIZATION") or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME
+    )
+    if not client:
+        return None
+    return "primary_db:" + hashlib.sha256(client.encode()).hexdigest()
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Включается, если настроены реплики (DATABASE_REPLICAS).
+    Запросы с безопасными методами читают данные с реплик,
+    остальные работают с основной базой.
+
+    После запроса, в котором была запись, клиент в течение
+    DATABASE_REPLICA_STICKY_SECONDS читает из основной базы и видит
+    свои изменения, пока реплики догоняют. Отметка ставится
+    в подписанную cookie, срок которой проверяется при чтении.
+    С общим кешем отметка для клиентов с заголовком Authorization
+    или сессией дублируется в кеш: так ее видят и клиенты без cookie.
+    Кеш в памяти процесса для этого не подходит: следующий запрос
+    может попасть в другой процесс.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    cookie_name = "primary_db"
+    cookie_salt = "api.middleware.ReplicaRoutingMiddleware"
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        key = self.get_key(request)
+        with use_replica(self.can_use_replica(request, key)) as state:
+            response = self.get_response(request)
+        if state.wrote:
+            self.stick_to_primary(response, key)
+        return response
+
+    async def __acall__(self, request):
+        key = self.get_key(request)
+        with use_replica(self.can_use_replica(request, key)) as state:
+            response = await self.get_response(request)
+        if state.wrote:
+            self.stick_to_primary(response, key)
+        return response
+
+    def get_key(self, request):
+        if not is_shared_cache():
+            return None
+        return get_sticky_key(request)
+
+    def can_use_replica(self, request, key):
+        return request.method in SAFE_METHODS and not self.is_sticky(
+            request, key
+        )
+
+    def is_sticky(self, request, key):
+        marker = request.get_signed_cookie(
+            self.cookie_name,
+            default=None,
+            salt=self.cookie_salt,
+            max_age=settings.DATABASE_REPLICA_STICKY_SECONDS,
+        )
+        if marker is not None:
+            return True
+        return key is not None and cache.get(key) is not None
+
+    def stick_to_primary(self, response, key):
+        timeout = settings.DATABASE_REPLICA_STICKY_SECONDS
+        response.set_signed_cookie(
+            self.cookie_name,
+            "1",
+            salt=self.cookie_salt,
+            max_age=timeout,
+            samesite="Lax",
+        )
+        if key is not None:
+            cache.set(key, True, timeout)
@@ -1,5 +1,95 @@
-from rest_framework.pagination import PageNumberPagination
+import asyncio
+
+from django.core.paginator import InvalidPage
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+from .async_utils import run_in_thread
+
+
+class CustomCursorPagination(CursorPagination):
+    page_size_query_param = "limit"
 
 
 class CustomPagination(PageNumberPagination):
+    """
+    Пагинация по номерам страниц с параметрами page и limit.
+    Если передан параметр cursor или pagination=cursor, включается
+    курсорная пагинация по ключу cursor_ordering представления:
+    без COUNT(*) и OFFSET, поэтому любая страница стоит как первая.
+    """
+
     page_size_query_param = "limit"
+    cursor_query_param = "cursor"
+    mode_query_param = "pagination"
+    cursor_ordering = ("-pub_date", "-id")
+
+    def is_cursor_mode(self, request):
+        return (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == "cursor"
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if not self.is_cursor_mode(request):
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = CustomCursorPagination()
+        self.cursor_paginator.ordering = getattr(
+            view, "cursor_ordering", self.cursor_ordering
+        )
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def paginate_list(self, items, request, view=None):
+        """
+        Пагинация по номерам страниц для списка, уже посчитанного
+        в памяти: количество известно без COUNT(*), курсор не нужен.
+        """
+        self.cursor_paginator = None
+        return super().paginate_queryset(items, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Асинхронный вариант paginate_queryset: COUNT(*) и выборка
+        страницы выполняются одновременно в разных потоках.
+        """
+        page_number = request.query_params.get(self.page_query_param, 1)
+        if self.is_cursor_mode(request) or not str(page_number).isdigit():
+            return await run_in_thread(
+                self.paginate_queryset, queryset, request, view
+            )
+        self.cursor_paginator = None
+        if int(page_number) < 1:
+            raise NotFound(
+                self.invalid_page_message.format(
+                    page_number=page_number,
+                    message=_("That page number is less than 1"),
+                )
+            )
+        page_size = self.get_page_size(request)
+        offset = (int(page_number) - 1) * page_size
+        count, rows = await asyncio.gather(
+            run_in_thread(queryset.count),
+            run_in_thread(list, queryset[offset:offset + page_size]),
+        )
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = count
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(
+                self.invalid_page_message.format(
+                    page_number=page_number, message=str(exc)
+                )
+            )
+        self.page.object_list = rows
+        self.request = request
+        return rows
@@ -0,0 +1,39 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON-рендерер на orjson. Если orjson не установлен или клиент
+    запросил отступы, используется стандартный JSONRenderer.
+    Типы, которых orjson не знает (Decimal, ленивые строки),
+    и даты кодируются так же, как в DRF.
+    """
+
+    orjson_option = (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if orjson is not None
+        else 0
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if orjson is None or self.get_indent(
+            accepted_media_type, renderer_context or {}
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        content = orjson.dumps(
+            data, default=JSONEncoder().default, option=self.orjson_option
+        )
+        # Как и JSONRenderer, экранируем разделители строк для JavaScript.
+        return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
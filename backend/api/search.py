@@ -1,6 +1,8 @@
 from django.db import models
 from rest_framework.filters import SearchFilter
 
+from .ingredient_index import ingredient_index
+
 
 class CustomSearch(SearchFilter):
     search_param = "name"
@@ -30,3 +32,16 @@ class CustomSearch(SearchFilter):
         )
 
         return result
+
+
+class IngredientIndexSearch(CustomSearch):
+    """
+    Поиск ингредиентов по индексу в памяти процесса
+    с тем же порядком выдачи, что и у CustomSearch.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if view.action != "list" or not search_terms:
+            return super().filter_queryset(request, queryset, view)
+        return ingredient_index.search(search_terms[0])
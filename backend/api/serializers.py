@@ -1,15 +1,20 @@
 from django.db import transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from rest_framework.validators import UniqueTogetherValidator
 
+from recipes.images import schedule_image_variants
+from recipes.matching import publish_recipe_changes
 from recipes.models import (Ingredient, IngredientRecipe, IsFavorited,
                             IsInShoppingCart, Recipe, Subscription, Tag,
                             TagRecipes, User)
+from recipes.search import update_search_index
+from tasks.models import Task
 
-from .utils import (create_update_ingredient,
-                    get_status_for_favor_or_shopp_subsribe)
+from .fields import StreamingBase64ImageField
+from .utils import (create_update_ingredient, get_image_variant_urls,
+                    get_status_for_favor_or_shopp_subsribe, update_ingredients)
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -30,9 +35,14 @@ class IngredientSerializer(serializers.ModelSerializer):
 
 
 class RecipeForSubscription(serializers.ModelSerializer):
+    image_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Recipe
-        fields = ("id", "name", "image", "cooking_time")
+        fields = ("id", "name", "image", "image_variants", "cooking_time")
+
+    def get_image_variants(self, obj):
+        return get_image_variant_urls(self, obj)
 
 
 class IsInShoppingCartSerializer(serializers.ModelSerializer):
@@ -97,7 +107,7 @@ class SubscriptionReadSerializer(serializers.ModelSerializer):
     last_name = serializers.CharField(source="author.last_name")
     is_subscribed = serializers.BooleanField(default=True)
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(source="author.recipes.count")
+    recipes_count = serializers.IntegerField(source="author.recipes_count")
 
     class Meta:
         model = User
@@ -113,15 +123,19 @@ class SubscriptionReadSerializer(serializers.ModelSerializer):
         )
 
     def get_recipes(self, obj):
-        recipes = Recipe.objects.filter(author=obj.author)
-        recipes_limit = self.context.get("recipes_limit")
-        try:
-            if recipes_limit:
-                recipes = recipes[:int(recipes_limit)]
-        except ValueError:
-            raise serializers.ValidationError(
-                "recipe_limit это число, а не текстовая строка"
-            )
+        recipes_by_authors = self.context.get("recipes_by_authors")
+        if recipes_by_authors is not None:
+            recipes = recipes_by_authors.get(obj.author_id, [])
+        else:
+            recipes = Recipe.objects.filter(author=obj.author)
+            recipes_limit = self.context.get("recipes_limit")
+            try:
+                if recipes_limit:
+                    recipes = recipes[:int(recipes_limit)]
+            except ValueError:
+                raise serializers.ValidationError(
+                    "recipe_limit это число, а не текстовая строка"
+                )
         return RecipeForSubscription(recipes, many=True).data
 
 
@@ -187,7 +201,7 @@ class CustomUserSerializer(UserSerializer):
 
     def get_is_subscribed(self, obj):
         return get_status_for_favor_or_shopp_subsribe(
-            self, Subscription, obj, obj_field="author"
+            self, "subscriptions", obj.id
         )
 
 
@@ -212,6 +226,7 @@ class RecipeReadSerializer(serializers.ModelSerializer):
     )
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -224,18 +239,22 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "image_variants",
             "text",
             "cooking_time",
         )
 
+    def get_image_variants(self, obj):
+        return get_image_variant_urls(self, obj)
+
     def get_is_favorited(self, obj):
         return get_status_for_favor_or_shopp_subsribe(
-            self, IsFavorited, obj, obj_field="recipe"
+            self, "favorites", obj.id
         )
 
     def get_is_in_shopping_cart(self, obj):
         return get_status_for_favor_or_shopp_subsribe(
-            self, IsInShoppingCart, obj, obj_field="recipe"
+            self, "shopping_cart", obj.id
         )
 
 
@@ -253,17 +272,10 @@ class IngredientRecipeWriteSerializer(serializers.ModelSerializer):
             )
         return value
 
-    def validate_id(self, value):
-        if not Ingredient.objects.filter(id=value):
-            raise serializers.ValidationError(
-                "Такого ингредиента не существует"
-            )
-        return value
-
 
 class RecipeWriteSerializer(serializers.ModelSerializer):
 
-    image = Base64ImageField()
+    image = StreamingBase64ImageField()
     tags = serializers.SlugRelatedField(
         queryset=Tag.objects.all(), slug_field="id", many=True
     )
@@ -297,23 +309,42 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
                 )
             )
         TagRecipes.objects.bulk_create(tags_list)
+        update_search_index([recipe.id])
+        publish_recipe_changes([recipe.id])
+        schedule_image_variants(recipe)
         return recipe
 
     @transaction.atomic
     def update(self, instance, validated_data):
         new_ingredients = validated_data.pop("ingredients")
-        instance.rec_ingredients.all().delete()
-        create_update_ingredient(new_ingredients, instance)
+        update_ingredients(new_ingredients, instance)
         new_tags = validated_data.pop("tags")
         instance.tags.set(new_tags)
-        return super().update(instance, validated_data)
+        if "image" in validated_data:
+            validated_data["image_variants"] = {}
+            schedule_image_variants(instance)
+        instance = super().update(instance, validated_data)
+        update_search_index([instance.id])
+        publish_recipe_changes([instance.id])
+        return instance
 
     def validate_ingredients(self, value):
         if not value:
             raise serializers.ValidationError(
                 {"Список ингредиентов не может быть пустым."}
             )
-        return value
+        ids = {item["ingredient"] for item in value}
+        ingredients = Ingredient.objects.in_bulk(ids)
+        missing_ids = sorted(ids - ingredients.keys())
+        if missing_ids:
+            raise serializers.ValidationError(
+                "Не существует ингредиентов с id: "
+                + ", ".join(map(str, missing_ids))
+            )
+        return [
+            {**item, "ingredient": ingredients[item["ingredient"]]}
+            for item in value
+        ]
 
     def validate_tags(self, value):
         if not value:
@@ -372,6 +403,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         return attrs
 
     def to_representation(self, instance):
+        instance = Recipe.objects.with_related().get(pk=instance.pk)
         recipe = RecipeReadSerializer(
             instance,
             context={
@@ -379,3 +411,20 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             },
         )
         return recipe.data
+
+
+class TaskSerializer(serializers.ModelSerializer):
+    file = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Task
+        fields = ("id", "status", "attempts", "created", "updated", "file")
+
+    def get_file(self, obj):
+        if obj.status != Task.DONE or not obj.result:
+            return None
+        return reverse(
+            "api:tasks-download",
+            args=(obj.id,),
+            request=self.context.get("request"),
+        )
@@ -0,0 +1,170 @@
+import csv
+import io
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from recipes.cart import get_cart_totals
+from tasks.registry import task
+
+PDF_FONT_NAME = "ShoppingListFont"
+PDF_FONT_SIZE = 12
+PDF_MARGIN = 50
+
+EXPORT_DIR = "shopping_lists"
+
+
+class Echo:
+    """
+    Объект с интерфейсом файла, который возвращает записанную строку.
+    Нужен для построчной записи csv.writer в потоковый ответ.
+    """
+
+    def write(self, value):
+        return value
+
+
+def render_text(shopping_list):
+    for item in shopping_list:
+        yield (
+            f'{item["name"]} - {item["amount"]} '
+            f'{item["measurement_unit"]}\n'
+        )
+
+
+def render_csv(shopping_list):
+    writer = csv.writer(Echo())
+    yield writer.writerow(("Ингредиент", "Количество", "Единица измерения"))
+    for item in shopping_list:
+        yield writer.writerow(
+            (item["name"], item["amount"], item["measurement_unit"])
+        )
+
+
+def get_pdf_font():
+    """
+    Регистрирует шрифт с кириллицей для PDF.
+    Стандартные шрифты PDF кириллицу не содержат, поэтому без файла
+    шрифта выгрузка не строится, а не выходит с пустыми строками.
+    """
+    if PDF_FONT_NAME in pdfmetrics.getRegisteredFontNames():
+        return PDF_FONT_NAME
+    font_path = settings.SHOPPING_LIST_PDF_FONT
+    if not os.path.exists(font_path):
+        raise ImproperlyConfigured(
+            f"Шрифт для PDF не найден: SHOPPING_LIST_PDF_FONT={font_path}"
+        )
+    pdfmetrics.registerFont(TTFont(PDF_FONT_NAME, font_path))
+    return PDF_FONT_NAME
+
+
+def render_pdf(shopping_list):
+    """
+    Шрифт проверяется до начала потокового ответа,
+    чтобы ошибка настройки не обрывала уже начатую загрузку.
+    """
+    return write_pdf(shopping_list, get_pdf_font())
+
+
+def write_pdf(shopping_list, font):
+    """
+    Документ собирается постранично в памяти: его размер зависит только
+    от числа различных ингредиентов, а не от числа рецептов в корзине.
+    """
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    _, height = A4
+    y = height - PDF_MARGIN
+    pdf.setFont(font, PDF_FONT_SIZE)
+    for line in render_text(shopping_list):
+        if y < PDF_MARGIN:
+            pdf.showPage()
+            pdf.setFont(font, PDF_FONT_SIZE)
+            y = height - PDF_MARGIN
+        pdf.drawString(PDF_MARGIN, y, line.rstrip("\n"))
+        y -= PDF_FONT_SIZE * 1.5
+    pdf.save()
+    buffer.seek(0)
+    yield from iter(lambda: buffer.read(io.DEFAULT_BUFFER_SIZE), b"")
+
+
+SHOPPING_LIST_FORMATS = {
+    "txt": (render_text, "text/plain; charset=utf-8"),
+    "csv": (render_csv, "text/csv; charset=utf-8"),
+    "pdf": (render_pdf, "application/pdf"),
+}
+
+
+def shopping_list_response(user, file_format):
+    """
+    Возвращает потоковый ответ со списком покупок в нужном формате.
+    """
+    renderer, content_type = SHOPPING_LIST_FORMATS[file_format]
+    response = StreamingHttpResponse(
+        renderer(get_cart_totals(user)), content_type=content_type
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="shopping_list.{file_format}"'
+    )
+    return response
+
+
+def get_export_storage():
+    """
+    Закрытое хранилище выгрузок: у него нет URL, файлы отдает
+    только api/tasks/{id}/download/ владельцу задачи.
+    """
+    return FileSystemStorage(
+        location=settings.SHOPPING_LIST_EXPORT_ROOT, base_url=None
+    )
+
+
+def delete_old_exports(max_age=None):
+    """
+    Удаляет выгрузки старше max_age секунд
+    (по умолчанию SHOPPING_LIST_EXPORT_TTL) и возвращает их число.
+    """
+    if max_age is None:
+        max_age = settings.SHOPPING_LIST_EXPORT_TTL
+    storage = get_export_storage()
+    if not storage.exists(EXPORT_DIR):
+        return 0
+    expired_before = timezone.now() - timedelta(seconds=max_age)
+    deleted = 0
+    for name in storage.listdir(EXPORT_DIR)[1]:
+        path = f"{EXPORT_DIR}/{name}"
+        if storage.get_modified_time(path) < expired_before:
+            storage.delete(path)
+            deleted += 1
+    return deleted
+
+
+@task(max_attempts=2)
+def export_shopping_list(user_id, file_format):
+    """
+    Сохраняет список покупок в закрытое хранилище выгрузок
+    под случайным именем и возвращает путь к файлу.
+    Заодно удаляются устаревшие выгрузки.
+    """
+    renderer, _ = SHOPPING_LIST_FORMATS[file_format]
+    content = b"".join(
+        chunk if isinstance(chunk, bytes) else chunk.encode()
+        for chunk in renderer(get_cart_totals(user_id))
+    )
+    name = get_export_storage().save(
+        f"{EXPORT_DIR}/{uuid.uuid4().hex}.{file_format}",
+        ContentFile(content),
+    )
+    delete_old_exports()
+    return {"file": name, "format": file_format}
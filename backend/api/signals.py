@@ -0,0 +1,34 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import (Ingredient, IsFavorited, IsInShoppingCart,
+                            Subscription, Tag)
+from recipes.importer import ingredients_imported
+
+from .cache import bump_cache_version
+from .ingredient_index import ingredient_index
+from .user_state import bump_user_state_version
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver(ingredients_imported, sender=Ingredient)
+def invalidate_ingredient_index(**kwargs):
+    transaction.on_commit(ingredient_index.invalidate)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver(ingredients_imported, sender=Ingredient)
+def invalidate_reference_cache(sender, **kwargs):
+    transaction.on_commit(lambda: bump_cache_version(sender))
+
+
+@receiver((post_save, post_delete), sender=IsFavorited)
+@receiver((post_save, post_delete), sender=IsInShoppingCart)
+@receiver((post_save, post_delete), sender=Subscription)
+def invalidate_user_state(instance, **kwargs):
+    # Версия меняется после фиксации: иначе параллельный запрос успеет
+    # закешировать старые данные уже под новой версией.
+    user_id = instance.user_id
+    transaction.on_commit(lambda: bump_user_state_version(user_id))
@@ -2,7 +2,7 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (CustomUserViewSet, IngredientViewSet, RecipesViewSet,
-                    TagViewSet)
+                    TagViewSet, TaskViewSet)
 
 router = DefaultRouter()
 
@@ -10,6 +10,7 @@ router.register("users", CustomUserViewSet, basename="users")
 router.register("tags", TagViewSet, basename="tags")
 router.register("ingredients", IngredientViewSet, basename="ingredients")
 router.register("recipes", RecipesViewSet, basename="recipes")
+router.register("tasks", TaskViewSet, basename="tasks")
 
 app_name = "api"
 
@@ -0,0 +1,114 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import CharField, Value
+
+from foodgram.caches import is_shared_cache
+from foodgram.db.routers import use_primary
+from recipes.models import IsFavorited, IsInShoppingCart, Subscription
+
+STATE_FIELDS = {
+    IsFavorited: ("favorites", "recipe_id"),
+    IsInShoppingCart: ("shopping_cart", "recipe_id"),
+    Subscription: ("subscriptions", "author_id"),
+}
+
+
+class UserState:
+    """
+    Множества id избранных рецептов, рецептов в списке покупок
+    и авторов, на которых подписан пользователь.
+    """
+
+    def __init__(self, favorites=(), shopping_cart=(), subscriptions=()):
+        self.favorites = set(favorites)
+        self.shopping_cart = set(shopping_cart)
+        self.subscriptions = set(subscriptions)
+
+    def add(self, instance):
+        state_field, id_field = STATE_FIELDS[type(instance)]
+        getattr(self, state_field).add(getattr(instance, id_field))
+
+    def discard(self, instance):
+        state_field, id_field = STATE_FIELDS[type(instance)]
+        getattr(self, state_field).discard(getattr(instance, id_field))
+
+
+def get_version_key(user_id):
+    return f"user_state:{user_id}:version"
+
+
+def get_initial_version():
+    return int(time.time() * 1000)
+
+
+def bump_user_state_version(user_id):
+    try:
+        cache.incr(get_version_key(user_id))
+    except ValueError:
+        cache.set(get_version_key(user_id), get_initial_version(), None)
+
+
+def load_user_state(user):
+    """
+    Загружает состояние пользователя одним запросом.
+    """
+    querysets = [
+        model.objects.filter(user=user)
+        .annotate(state_field=Value(state_field, output_field=CharField()))
+        .values_list("state_field", id_field)
+        for model, (state_field, id_field) in STATE_FIELDS.items()
+    ]
+    state = UserState()
+    for state_field, object_id in querysets[0].union(
+        *querysets[1:], all=True
+    ):
+        getattr(state, state_field).add(object_id)
+    return state
+
+
+def update_user_state(request, instance, created=True):
+    """
+    Обновляет уже загруженное в запросе состояние после записи.
+    """
+    state = getattr(getattr(request, "_request", request), "user_state", None)
+    if state is None:
+        return
+    if created:
+        state.add(instance)
+    else:
+        state.discard(instance)
+
+
+def get_user_state(request):
+    """
+    Возвращает состояние текущего пользователя.
+    Состояние загружается один раз за запрос и хранится в кеше
+    под ключом с версией, которая меняется при каждой записи,
+    поэтому загружается из основной базы, а не с реплики.
+    Версию в кеше процесса (LocMemCache) другие процессы не видят,
+    поэтому с таким кешем состояние загружается заново в каждом запросе.
+    """
+    request = getattr(request, "_request", request)
+    if hasattr(request, "user_state"):
+        return request.user_state
+    user = request.user
+    if user.is_anonymous:
+        request.user_state = UserState()
+        return request.user_state
+    if not is_shared_cache():
+        with use_primary():
+            request.user_state = load_user_state(user)
+        return request.user_state
+    version = cache.get_or_set(
+        get_version_key(user.id), get_initial_version, timeout=None
+    )
+    key = f"user_state:{user.id}:{version}"
+    state = cache.get(key)
+    if state is None:
+        with use_primary():
+            state = load_user_state(user)
+        cache.set(key, state, settings.USER_STATE_CACHE_TIMEOUT)
+    request.user_state = state
+    return state
@@ -1,22 +1,47 @@
-from django.shortcuts import get_object_or_404
-from rest_framework import status
+from collections import defaultdict
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from rest_framework import serializers, status
 from rest_framework.response import Response
 
-from recipes.models import Ingredient, IngredientRecipe
+from recipes.cart import change_recipe_in_carts
+from recipes.models import IngredientRecipe, Recipe
+
+from .shopping_list import SHOPPING_LIST_FORMATS
+from .user_state import get_user_state, update_user_state
+
+
+def get_status_for_favor_or_shopp_subsribe(self, state_field, object_id):
+    """
+    Возвращает статус подписки, присутствие в избранном
+    или в списке покупок.
+    """
+    state = get_user_state(self.context.get("request"))
+    return object_id in getattr(state, state_field)
 
 
-def get_status_for_favor_or_shopp_subsribe(self, model, object, obj_field):
+def get_image_variant_urls(self, recipe):
     """
-    Возвращает статус подписки или присутствие в списке покупок
+    Возвращает ссылки на уменьшенные копии изображения рецепта.
+    Пока копии не созданы, возвращается пустой словарь.
     """
-    if self.context.get("request").user.is_anonymous:
-        return False
-    dict_fields = {obj_field: object}
-    return model.objects.filter(
-        user=self.context.get("request").user, **dict_fields
-    ).exists()
+    return build_image_variant_urls(
+        self.context.get("request"), recipe.image_variants
+    )
 
 
+def build_image_variant_urls(request, image_variants):
+    urls = {}
+    for variant, name in image_variants.items():
+        url = default_storage.url(name)
+        urls[variant] = request.build_absolute_uri(url) if request else url
+    return urls
+
+
+@transaction.atomic
 def post_favor_shopp_subscr(
     self, request, serializer, data_field, pk, limit=None
 ):
@@ -38,10 +63,12 @@ def post_favor_shopp_subscr(
     save_objects = {
         "user": request.user,
     }
-    serializer.save(**save_objects)
+    instance = serializer.save(**save_objects)
+    update_user_state(request, instance)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+@transaction.atomic
 def delete_favor_shopp_subscr(request, data_field, income_object, model):
     """
     Удаляет рецепт из избранного или из списка покупок
@@ -51,6 +78,7 @@ def delete_favor_shopp_subscr(request, data_field, income_object, model):
         delete_fields = {"user": request.user, data_field: income_object}
         instance = model.objects.get(**delete_fields)
         instance.delete()
+        update_user_state(request, instance, created=False)
         return Response(status=status.HTTP_204_NO_CONTENT)
     except model.DoesNotExist:
         return Response(status=status.HTTP_400_BAD_REQUEST)
@@ -58,19 +86,163 @@ def delete_favor_shopp_subscr(request, data_field, income_object, model):
 
 def create_update_ingredient(new_ingredients, instance):
     """
-    Создает или обновляет ингредиенты в рецепте.
+    Создает ингредиенты в рецепте.
+    """
+    IngredientRecipe.objects.bulk_create(
+        IngredientRecipe(
+            recipe=instance,
+            ingredient=item["ingredient"],
+            amount=item["amount"],
+        )
+        for item in new_ingredients
+    )
+
+
+def update_ingredients(new_ingredients, instance):
+    """
+    Обновляет ингредиенты в рецепте: удаляет отсутствующие
+    в новом списке, меняет количество у оставшихся и добавляет новые.
+    Разница переносится в итоги списков покупок с этим рецептом.
     """
-    objects = []
+    current = {
+        ingredient.ingredient_id: ingredient
+        for ingredient in instance.rec_ingredients.all()
+    }
+    to_create = []
+    to_update = []
+    deltas = {}
     for item in new_ingredients:
-        item = dict(**item)
-        current_ingredient = get_object_or_404(
-            Ingredient, id=item["ingredient"]
+        ingredient = current.pop(item["ingredient"].id, None)
+        if ingredient is None:
+            to_create.append(item)
+            deltas[item["ingredient"].id] = item["amount"]
+        elif ingredient.amount != item["amount"]:
+            deltas[ingredient.ingredient_id] = (
+                item["amount"] - ingredient.amount
+            )
+            ingredient.amount = item["amount"]
+            to_update.append(ingredient)
+    for ingredient in current.values():
+        deltas[ingredient.ingredient_id] = -ingredient.amount
+    if current:
+        IngredientRecipe.objects.filter(
+            id__in=[ingredient.id for ingredient in current.values()]
+        ).delete()
+    if to_update:
+        IngredientRecipe.objects.bulk_update(to_update, ["amount"])
+    if to_create:
+        create_update_ingredient(to_create, instance)
+    change_recipe_in_carts(
+        instance.id,
+        deltas,
+        [item["ingredient"].id for item in to_create],
+    )
+
+
+def get_recipes_limit(request):
+    """
+    Возвращает значение параметра recipes_limit из запроса.
+    """
+    recipes_limit = request.GET.get("recipes_limit")
+    if not recipes_limit:
+        return None
+    try:
+        return int(recipes_limit)
+    except ValueError:
+        raise serializers.ValidationError(
+            "recipe_limit это число, а не текстовая строка"
+        )
+
+
+def get_search_text(request):
+    """
+    Возвращает поисковый запрос из параметра q.
+    """
+    text = request.query_params.get("q", "").strip()
+    if not text:
+        raise serializers.ValidationError(
+            {"q": "Передайте поисковый запрос в параметре q."}
+        )
+    return text
+
+
+def get_ingredient_ids(request):
+    """
+    Возвращает id продуктов из параметров ingredients.
+    """
+    values = request.query_params.getlist("ingredients")
+    if not values or not all(value.isdigit() for value in values):
+        raise serializers.ValidationError(
+            {
+                "ingredients": (
+                    "Передайте id ингредиентов в параметрах ingredients."
+                )
+            }
+        )
+    return [int(value) for value in values]
+
+
+def get_max_missing(request):
+    """
+    Возвращает значение параметра max_missing из запроса.
+    """
+    max_missing = request.query_params.get("max_missing")
+    if not max_missing:
+        return None
+    if not max_missing.isdigit():
+        raise serializers.ValidationError(
+            {"max_missing": "max_missing это неотрицательное число."}
         )
-        objects.append(
-            IngredientRecipe(
-                recipe=instance,
-                ingredient=current_ingredient,
-                amount=item["amount"],
+    return int(max_missing)
+
+
+def get_file_format(request):
+    """
+    Возвращает формат списка покупок из параметра file_format.
+    """
+    file_format = request.query_params.get("file_format", "txt")
+    if file_format not in SHOPPING_LIST_FORMATS:
+        raise serializers.ValidationError(
+            {
+                "file_format": (
+                    "Доступные форматы: " + ", ".join(SHOPPING_LIST_FORMATS)
+                )
+            }
+        )
+    return file_format
+
+
+def get_recipes_by_authors(author_ids, recipes_limit=None):
+    """
+    Возвращает словарь {id автора: список рецептов} одним запросом.
+    При заданном recipes_limit для каждого автора выбираются только
+    последние recipes_limit рецептов с помощью ROW_NUMBER().
+    """
+    recipes = Recipe.objects.filter(author_id__in=author_ids).only(
+        "id",
+        "name",
+        "image",
+        "image_variants",
+        "cooking_time",
+        "author_id",
+        "pub_date",
+    )
+    if recipes_limit is not None:
+        ranked = recipes.annotate(
+            recipe_rank=Window(
+                expression=RowNumber(),
+                partition_by=[F("author_id")],
+                order_by=[F("pub_date").desc(), F("id").desc()],
             )
+        ).order_by()
+        sql, params = ranked.query.sql_with_params()
+        recipes = Recipe.objects.raw(
+            f"SELECT * FROM ({sql}) ranked "
+            "WHERE ranked.recipe_rank <= %s "
+            "ORDER BY ranked.author_id, ranked.recipe_rank",
+            (*params, recipes_limit),
         )
-    IngredientRecipe.objects.bulk_create(objects)
+    recipes_by_authors = defaultdict(list)
+    for recipe in recipes:
+        recipes_by_authors[recipe.author_id].append(recipe)
+    return recipes_by_authors
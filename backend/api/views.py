@@ -1,29 +1,46 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.http import FileResponse, Http404
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.mixins import RetrieveModelMixin
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
-
-from recipes.models import (Ingredient, IngredientRecipe, IsFavorited,
-                            IsInShoppingCart, Recipe, Subscription, Tag, User)
-
+from rest_framework.reverse import reverse
+from rest_framework.viewsets import (GenericViewSet, ModelViewSet,
+                                     ReadOnlyModelViewSet)
+
+from recipes.cart import get_cart_totals
+from recipes.matching import recipe_matcher
+from recipes.models import (Ingredient, IsFavorited, IsInShoppingCart, Recipe,
+                            Subscription, Tag, User)
+from recipes.ranking import RANKING_ORDERINGS
+from recipes.search import SEARCH_ORDERING, search_recipes
+from tasks.models import Task
+from tasks.registry import enqueue
+
+from .cache import CachedReadOnlyMixin
 from .custom_filters import RecipeFilter
+from .fast_serializers import (FastListMixin, IngredientValuesSerializer,
+                               RecipeValuesSerializer)
 from .pagination import CustomPagination
 from .permissions import RecipePermissions
-from .search import CustomSearch
+from .search import IngredientIndexSearch
 from .serializers import (IngredientSerializer, IsFavoriteSerializer,
                           IsInShoppingCartSerializer, RecipeReadSerializer,
                           RecipeWriteSerializer, SubscriptionReadSerializer,
-                          SubscriptionWriteSerializer, TagSerializer)
-from .utils import delete_favor_shopp_subscr, post_favor_shopp_subscr
+                          SubscriptionWriteSerializer, TagSerializer,
+                          TaskSerializer)
+from .shopping_list import (export_shopping_list, get_export_storage,
+                            shopping_list_response)
+from .utils import (delete_favor_shopp_subscr, get_file_format,
+                    get_ingredient_ids, get_max_missing,
+                    get_recipes_by_authors, get_recipes_limit,
+                    get_search_text, post_favor_shopp_subscr)
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(CachedReadOnlyMixin, ReadOnlyModelViewSet):
     """
     Представление, обрабатывающее эндпоинт api/tags/
     """
@@ -31,16 +48,23 @@ class TagViewSet(ReadOnlyModelViewSet):
     serializer_class = TagSerializer
     queryset = Tag.objects.all()
     permission_classes = (AllowAny,)
+    authentication_classes = ()
+    cache_models = (Tag,)
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(
+    CachedReadOnlyMixin, FastListMixin, ReadOnlyModelViewSet
+):
     """
     Представление, обрабатывающее эндпоинт api/ingredients/
     """
 
     serializer_class = IngredientSerializer
+    fast_serializer_class = IngredientValuesSerializer
     queryset = Ingredient.objects.all()
-    filter_backends = (CustomSearch,)
+    authentication_classes = ()
+    cache_models = (Ingredient,)
+    filter_backends = (IngredientIndexSearch,)
     search_fields = ("^name",)
 
 
@@ -56,6 +80,7 @@ class CustomUserViewSet(UserViewSet):
     """
 
     pagination_class = CustomPagination
+    cursor_ordering = ("id",)
 
     @action(
         methods=["get"],
@@ -79,11 +104,21 @@ class CustomUserViewSet(UserViewSet):
         """
         Все подписки пользователя.
         """
-        subscriptions = request.user.subscriptions.all()
-        limit = request.GET.get("recipes_limit", None)
-        paginator = self.paginate_queryset(subscriptions)
+        recipes_limit = get_recipes_limit(request)
+        page = self.paginate_queryset(self.get_subscriptions_queryset())
+        recipes_by_authors = get_recipes_by_authors(
+            [subscription.author_id for subscription in page], recipes_limit
+        )
+        return self.get_subscriptions_response(page, recipes_by_authors)
+
+    def get_subscriptions_queryset(self):
+        return self.request.user.subscriptions.select_related(
+            "author"
+        ).order_by("id")
+
+    def get_subscriptions_response(self, page, recipes_by_authors):
         serializer = SubscriptionReadSerializer(
-            paginator, many=True, context={"recipes_limit": limit}
+            page, many=True, context={"recipes_by_authors": recipes_by_authors}
         )
         return self.get_paginated_response(serializer.data)
 
@@ -140,7 +175,7 @@ class CustomUserViewSet(UserViewSet):
         return Response(status=status.HTTP_404_NOT_FOUND)
 
 
-class RecipesViewSet(ModelViewSet):
+class RecipesViewSet(FastListMixin, ModelViewSet):
     """
     Представление, обратывающее следующие действия:
     - информация о рецепте
@@ -153,14 +188,34 @@ class RecipesViewSet(ModelViewSet):
     - добавить рецепт в список покупок
     - удалить рецепт из списка покупок
     - скачать список покупок одним файлом
+    - итоги списка покупок в JSON
+    - подобрать рецепты по имеющимся продуктам
     """
 
     pagination_class = CustomPagination
+    fast_serializer_class = RecipeValuesSerializer
     queryset = Recipe.objects.all()
     permission_classes = (RecipePermissions,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    @property
+    def cursor_ordering(self):
+        if self.action == "search":
+            return SEARCH_ORDERING
+        return RANKING_ORDERINGS.get(
+            self.request.query_params.get("ordering"), ("-pub_date", "-id")
+        )
+
+    def get_queryset(self):
+        return Recipe.objects.with_related()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == "search":
+            return search_recipes(queryset, get_search_text(self.request))
+        return queryset
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
@@ -231,6 +286,63 @@ class RecipesViewSet(ModelViewSet):
             model=IsInShoppingCart,
         )
 
+    @action(methods=["get"], detail=False)
+    def search(self, request):
+        """
+        Поиск по названию, ингредиентам и описанию рецептов: параметр q.
+        Результаты отсортированы по релевантности, фильтры и пагинация
+        те же, что у списка рецептов.
+        """
+        return self.list(request)
+
+    @action(methods=["get"], detail=False)
+    def what_can_i_cook(self, request):
+        """
+        Подбор рецептов по продуктам: id ингредиентов в параметрах
+        ingredients, необязательный max_missing - сколько ингредиентов
+        рецепта может не хватать. Рецепты отсортированы по доле
+        ингредиентов, которые уже есть; к рецепту добавлены
+        matched, missing и coverage.
+        """
+        matches = recipe_matcher.match(
+            get_ingredient_ids(request), get_max_missing(request)
+        )
+        page = self.paginator.paginate_list(matches, request, self)
+        serializer = self.fast_serializer_class(
+            self.get_serializer_context()
+        )
+        rows = {
+            row["id"]: row
+            for row in serializer.prepare(
+                self.get_queryset().filter(
+                    id__in=[match.recipe_id for match in page]
+                )
+            )
+        }
+        page = [match for match in page if match.recipe_id in rows]
+        results = serializer.to_representation(
+            rows[match.recipe_id] for match in page
+        )
+        for recipe, match in zip(results, page):
+            recipe["matched"] = match.matched
+            recipe["missing"] = match.missing
+            recipe["coverage"] = round(match.coverage, 4)
+        return self.get_paginated_response(results)
+
+    @action(
+        methods=["get"],
+        detail=False,
+        permission_classes=[
+            IsAuthenticated,
+        ],
+    )
+    def shopping_cart_summary(self, request):
+        """
+        Итоги списка покупок: ингредиенты с суммарным количеством,
+        г и кг, мл и л сведены в одну строку.
+        """
+        return Response(get_cart_totals(request.user))
+
     @action(
         methods=["get"],
         detail=False,
@@ -239,23 +351,62 @@ class RecipesViewSet(ModelViewSet):
         ],
     )
     def download_shopping_cart(self, request):
-        all_recipes = Recipe.objects.filter(
-            isinshoppingcart__user=request.user
+        return shopping_list_response(request.user, get_file_format(request))
+
+    @action(
+        methods=["post"],
+        detail=False,
+        permission_classes=[
+            IsAuthenticated,
+        ],
+    )
+    def export_shopping_cart(self, request):
+        """
+        Ставит выгрузку списка покупок в очередь фоновых задач.
+        Готовый файл доступен по ссылке из api/tasks/{id}/.
+        """
+        task = enqueue(
+            export_shopping_list,
+            args=(request.user.id, get_file_format(request)),
+            user=request.user,
         )
-        shopping_list = IngredientRecipe.objects.filter(
-            recipe__in=all_recipes
-        ).values(
-            "ingredient__name",
-            "ingredient__measurement_unit"
-        ).annotate(total=Sum("amount"))
-
-        with open("shopping_list.txt", "w") as file:
-            for item in shopping_list:
-                file.write(
-                    f'{item["ingredient__name"]} - {item["total"]} '
-                    f'{item["ingredient__measurement_unit"]}\n'
-                )
+        location = reverse(
+            "api:tasks-detail", args=(task.id,), request=request
+        )
+        return Response(
+            TaskSerializer(task, context={"request": request}).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": location},
+        )
+
+
+class TaskViewSet(RetrieveModelMixin, GenericViewSet):
+    """
+    Представление, обрабатывающее эндпоинт api/tasks/{id}/
+    Пользователь видит только свои задачи.
+    """
+
+    serializer_class = TaskSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return Task.objects.filter(user=self.request.user)
 
-        file = open("shopping_list.txt")
-        response = HttpResponse(file, content_type="text/plain")
-        return response
+    @action(methods=["get"], detail=True)
+    def download(self, request, pk=None):
+        """
+        Отдает файл выгрузки владельцу задачи.
+        Устаревшие выгрузки удаляются, для них ответ 404.
+        """
+        task = self.get_object()
+        if task.status != Task.DONE or not task.result:
+            raise Http404
+        storage = get_export_storage()
+        name = task.result["file"]
+        if not storage.exists(name):
+            raise Http404
+        return FileResponse(
+            storage.open(name),
+            as_attachment=True,
+            filename=f'shopping_list.{task.result["format"]}',
+        )
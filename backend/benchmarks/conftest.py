@@ -0,0 +1,108 @@
+"""
+Бенчмарки запускаются отдельно от тестов:
+    pytest benchmarks/ -s
+Результаты в JSON сохраняются в каталог BENCHMARK_RESULTS_DIR
+(по умолчанию benchmarks/results).
+
+Для сравнения между коммитами результаты прошлого запуска передаются
+через BENCHMARK_BASELINE_DIR:
+    BENCHMARK_RESULTS_DIR=/tmp/base pytest benchmarks/ -s
+    BENCHMARK_BASELINE_DIR=/tmp/base pytest benchmarks/ -s
+Бенчмарки с проверкой по базовой линии падают, если число запросов
+выросло или время выросло больше чем на BENCHMARK_TOLERANCE
+(доля, по умолчанию 0.25) и больше чем на BENCHMARK_MIN_DELTA_MS
+(по умолчанию 1 мс), чтобы шум быстрых эндпоинтов не ронял сборку.
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import (api_client, api_user_client,  # noqa: F401
+                            auth_user, token_for_auth_user)
+
+
+RESULTS_DIR = Path(
+    os.getenv("BENCHMARK_RESULTS_DIR", Path(__file__).parent / "results")
+)
+
+
+BASELINE_DIR = os.getenv("BENCHMARK_BASELINE_DIR")
+
+TOLERANCE = float(os.getenv("BENCHMARK_TOLERANCE", 0.25))
+
+MIN_DELTA_MS = float(os.getenv("BENCHMARK_MIN_DELTA_MS", 1))
+
+
+def write_results(name, results):
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(RESULTS_DIR / f"{name}.json", "w") as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+def read_baseline(name):
+    if BASELINE_DIR is None:
+        return None
+    path = Path(BASELINE_DIR) / f"{name}.json"
+    if not path.exists():
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+
+def find_regressions(name, results):
+    """
+    Сравнивает результаты вида {ключ: {"queries": ..., "ms": ...}}
+    с базовой линией и возвращает список найденных регрессий.
+    """
+    baseline = read_baseline(name)
+    if baseline is None:
+        return []
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result["queries"] > base["queries"]:
+            regressions.append(
+                f"{key}: {base['queries']} -> {result['queries']} queries"
+            )
+        if (
+            result["ms"] > base["ms"] * (1 + TOLERANCE)
+            and result["ms"] - base["ms"] > MIN_DELTA_MS
+        ):
+            regressions.append(
+                f"{key}: {base['ms']:.2f} -> {result['ms']:.2f} ms"
+            )
+    return regressions
+
+
+class Timer:
+    def __init__(self, name):
+        self.name = name
+        self.timings = []
+
+    def __call__(self, func, repeat=5):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            self.timings.append(time.perf_counter() - start)
+        return result
+
+    @property
+    def best(self):
+        return min(self.timings)
+
+    def report(self, **extra):
+        details = " ".join(f"{key}={value}" for key, value in extra.items())
+        print(
+            f"\n{self.name}: best {self.best * 1000:.2f} ms "
+            f"of {len(self.timings)} {details}"
+        )
+
+
+@pytest.fixture
+def timer(request):
+    return Timer(request.node.name)
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from tests.factories import seed
+
+from .conftest import write_results
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+    pytest.mark.urls("foodgram.asgi_urls"),
+]
+
+REQUESTS = 200
+CONCURRENCY = (1, 10, 50)
+URLS = {
+    "recipes": "/api/recipes/?limit=10",
+    "recipe": "/api/recipes/{recipe}/",
+    "subscriptions": "/api/users/subscriptions/?recipes_limit=3",
+}
+
+
+@pytest.fixture
+def dataset():
+    dataset = seed(users=500, recipes=3000)
+    token = Token.objects.create(user_id=dataset.users[0]).key
+    return dataset, token
+
+
+def run_wsgi(url, token, concurrency):
+    """
+    Синхронные представления через WSGI-обработчик,
+    по потоку на одновременный запрос, как у gunicorn с потоками.
+    """
+    def request(_):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        return client.get(url, urlconf="foodgram.urls").status_code
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(request, range(REQUESTS)))
+
+
+def run_asgi(url, token, concurrency):
+    """
+    Асинхронные представления через ASGI-обработчик в одном цикле событий.
+    """
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request():
+            async with semaphore:
+                response = await AsyncClient().get(
+                    url, authorization=f"Token {token}"
+                )
+                return response.status_code
+
+        return await asyncio.gather(*(request() for _ in range(REQUESTS)))
+
+    return async_to_sync(run)()
+
+
+def test_asgi_throughput(dataset):
+    dataset, token = dataset
+    results = {}
+    for name, url in URLS.items():
+        url = url.format(recipe=dataset.recipes[0])
+        for concurrency in CONCURRENCY:
+            for mode, runner in (("wsgi", run_wsgi), ("asgi", run_asgi)):
+                start = time.perf_counter()
+                statuses = runner(url, token, concurrency)
+                elapsed = time.perf_counter() - start
+                assert set(statuses) == {200}, (name, mode)
+                key = f"{name}:{mode}:{concurrency}"
+                results[key] = {"rps": REQUESTS / elapsed}
+                print(
+                    f"\n{name} {mode} concurrency={concurrency}: "
+                    f"{REQUESTS / elapsed:.1f} req/s"
+                )
+    write_results("asgi", results)
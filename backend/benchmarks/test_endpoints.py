@@ -0,0 +1,95 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import User
+from tests.factories import seed
+
+from .conftest import Timer, find_regressions, write_results
+
+pytestmark = [pytest.mark.django_db]
+
+REPEAT = 20
+
+ENDPOINTS = {
+    "recipes": ("api:recipes-list", None, {}),
+    "recipes_limit_50": ("api:recipes-list", None, {"limit": 50}),
+    "recipes_page_100": ("api:recipes-list", None, {"page": 100}),
+    "recipes_tags": ("api:recipes-list", None, {"tags": ["t1", "t2"]}),
+    "recipes_favorited": ("api:recipes-list", None, {"is_favorited": 1}),
+    "recipes_popular": ("api:recipes-list", None, {"ordering": "popular"}),
+    "recipe": ("api:recipes-detail", "recipe", {}),
+    "search": ("api:recipes-search", None, {"q": "рецепт 12"}),
+    "search_ingredient": (
+        "api:recipes-search", None, {"q": "ингредиент 42"}
+    ),
+    "what_can_i_cook": (
+        "api:recipes-what-can-i-cook",
+        None,
+        lambda objects: {"ingredients": objects["pantry"]},
+    ),
+    "subscriptions": (
+        "api:users-subscriptions", None, {"limit": 10, "recipes_limit": 3}
+    ),
+    "users": ("api:users-list", None, {}),
+    "user": ("api:users-detail", "author", {}),
+    "me": ("api:users-me", None, {}),
+    "tags": ("api:tags-list", None, {}),
+    "ingredients": ("api:ingredients-list", None, {"name": "Ингредиент 1"}),
+    "shopping_cart_summary": (
+        "api:recipes-shopping-cart-summary", None, {}
+    ),
+    "download_shopping_cart": (
+        "api:recipes-download-shopping-cart", None, {}
+    ),
+}
+
+
+@pytest.fixture
+def dataset():
+    return seed(
+        users=2000, recipes=10000, favorites_per_user=20,
+        cart_per_user=5, subscriptions_per_user=10,
+    )
+
+
+@pytest.fixture
+def client(dataset):
+    user = User.objects.get(id=dataset.users[0])
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION="Token " + Token.objects.create(user=user).key
+    )
+    return client, {
+        "recipe": dataset.recipes[-1],
+        "author": user.id,
+        "pantry": dataset.ingredients[:10],
+    }
+
+
+def test_endpoints(client):
+    client, objects = client
+    results = {}
+    for name, (url_name, arg, params) in ENDPOINTS.items():
+        args = (objects[arg],) if arg else None
+        url = reverse(url_name, args=args)
+        if callable(params):
+            params = params(objects)
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, params)
+        assert response.status_code == 200, name
+        # Каждый запрос очищает connection.queries, поэтому число
+        # запросов сохраняется до замеров времени.
+        queries = len(context.captured_queries)
+        timer = Timer(name)
+        timer(lambda: client.get(url, params), repeat=REPEAT)
+        timer.report(queries=queries)
+        results[name] = {"queries": queries, "ms": timer.best * 1000}
+    regressions = find_regressions("endpoints", results)
+    write_results("endpoints", results)
+    assert not regressions, "\n".join(regressions)
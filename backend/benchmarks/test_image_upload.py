@@ -0,0 +1,76 @@
+import base64
+import io
+import os
+import tracemalloc
+
+import pytest
+from django.core.files.storage import default_storage
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+
+from api.fields import StreamingBase64ImageField
+from recipes.images import generate_image_variants
+from recipes.models import Recipe
+
+pytestmark = [pytest.mark.django_db]
+
+IMAGE_SIDE = 1850
+
+
+@pytest.fixture(scope="module")
+def noise_image():
+    """
+    PNG из случайного шума почти не сжимается: около 10 МБ.
+    """
+    pixels = os.urandom(IMAGE_SIDE * IMAGE_SIDE * 3)
+    image = Image.frombytes("RGB", (IMAGE_SIDE, IMAGE_SIDE), pixels)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.mark.parametrize(
+    "field_class", (Base64ImageField, StreamingBase64ImageField)
+)
+def test_decode_upload(noise_image, timer, field_class):
+    data = "data:image/png;base64," + base64.b64encode(noise_image).decode()
+    field = field_class()
+
+    def decode():
+        return field.to_internal_value(data)
+
+    timer(decode, repeat=3)
+    tracemalloc.start()
+    upload = decode()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    timer.report(
+        upload=type(upload).__name__,
+        bytes=len(noise_image),
+        peak_kib=peak // 1024,
+    )
+
+
+def test_generate_variants(noise_image, auth_user, timer):
+    image_name = default_storage.save(
+        "recipes_image/noise.png", io.BytesIO(noise_image)
+    )
+    recipe = Recipe.objects.create(
+        name="Рецепт",
+        author=auth_user,
+        image=image_name,
+        text="Описание рецепта",
+        cooking_time=10,
+    )
+    timer(lambda: generate_image_variants(recipe.id), repeat=3)
+    recipe.refresh_from_db()
+    sizes = {
+        variant: default_storage.size(name)
+        for variant, name in recipe.image_variants.items()
+    }
+    timer.report(original=len(noise_image), **sizes)
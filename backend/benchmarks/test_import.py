@@ -0,0 +1,69 @@
+import json
+import tracemalloc
+
+import pytest
+
+from recipes.importer import import_ingredients, iter_rows
+from recipes.models import Ingredient
+
+pytestmark = [pytest.mark.django_db]
+
+ROWS = 100000
+
+
+def write_source(path, file_format, rows):
+    items = (
+        {"name": f"Ингредиент {number}", "measurement_unit": "г"}
+        for number in range(rows)
+    )
+    with open(path, "w", encoding="utf8") as file:
+        if file_format == "csv":
+            for item in items:
+                file.write(f"{item['name']},{item['measurement_unit']}\n")
+        elif file_format == "json":
+            file.write("[")
+            for number, item in enumerate(items):
+                file.write(("," if number else "") + json.dumps(item))
+            file.write("]")
+        else:
+            for item in items:
+                file.write(json.dumps(item) + "\n")
+    return path
+
+
+def run_import(path, file_format, batch_size):
+    with open(path, encoding="utf8", newline="") as file:
+        return import_ingredients(
+            iter_rows(file, file_format), batch_size=batch_size
+        )
+
+
+@pytest.mark.parametrize("batch_size", (1000, 5000))
+@pytest.mark.parametrize("file_format", ("csv", "json", "ndjson"))
+def test_import_throughput(tmp_path, file_format, batch_size):
+    path = write_source(tmp_path / "source", file_format, ROWS)
+    for run in ("first", "repeat"):
+        stats = run_import(path, file_format, batch_size)
+        print(
+            f"\n{file_format} batch={batch_size} {run}: "
+            f"{stats.rate:.0f} rows/s"
+        )
+    assert Ingredient.objects.count() == ROWS
+
+
+@pytest.mark.parametrize("file_format", ("csv", "json", "ndjson"))
+def test_import_memory_does_not_grow_with_rows(tmp_path, file_format):
+    """
+    tracemalloc замедляет импорт на порядок, поэтому память
+    измеряется на небольших файлах разного размера.
+    """
+    peaks = {}
+    for rows in (2000, 8000):
+        Ingredient.objects.all().delete()
+        path = write_source(tmp_path / f"{rows}", file_format, rows)
+        tracemalloc.start()
+        run_import(path, file_format, batch_size=500)
+        peaks[rows] = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    print(f"\n{file_format} peak KiB by rows: {peaks}")
+    assert peaks[8000] < peaks[2000] * 2
@@ -0,0 +1,151 @@
+import random
+import time
+
+import pytest
+from django.db import connection
+
+from recipes.models import (IsFavorited, IsInShoppingCart, Recipe, Tag,
+                            TagRecipes, User)
+
+from .conftest import write_results
+
+pytestmark = [pytest.mark.django_db]
+
+USERS = 200
+RECIPES = 20000
+FAVORITES_PER_USER = 100
+
+
+def get_index(model, name):
+    for index in model._meta.indexes:
+        if index.name == name:
+            return index
+
+
+INDEXES = (
+    (Recipe, "recipe_pub_date_id_idx"),
+    (Recipe, "recipe_author_pub_date_idx"),
+    (IsFavorited, "favorite_user_recipe_idx"),
+    (IsInShoppingCart, "shopping_user_recipe_idx"),
+)
+
+
+@pytest.fixture
+def dataset():
+    random.seed(0)
+    User.objects.bulk_create(
+        User(username=f"user{number}", email=f"user{number}@mail.ru")
+        for number in range(USERS)
+    )
+    users = list(User.objects.values_list("id", flat=True))
+    Tag.objects.bulk_create(
+        Tag(name=f"Тег {number}", color=f"#0000{number:02}", slug=f"t{number}")
+        for number in range(10)
+    )
+    tags = list(Tag.objects.values_list("id", flat=True))
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                name=f"Рецепт {number}",
+                author_id=random.choice(users),
+                image="recipes_image/image.png",
+                text="Описание рецепта",
+                cooking_time=10,
+            )
+            for number in range(RECIPES)
+        ),
+        batch_size=5000,
+    )
+    recipes = list(Recipe.objects.values_list("id", flat=True))
+    TagRecipes.objects.bulk_create(
+        (
+            TagRecipes(recipe_id=recipe, tag_id=tag)
+            for recipe in recipes
+            for tag in random.sample(tags, 2)
+        ),
+        batch_size=5000,
+    )
+    for model in (IsFavorited, IsInShoppingCart):
+        model.objects.bulk_create(
+            (
+                model(user_id=user, recipe_id=recipe)
+                for user in users
+                for recipe in random.sample(recipes, FAVORITES_PER_USER)
+            ),
+            batch_size=5000,
+        )
+    return users
+
+
+def get_queries(users):
+    user = users[0]
+    return {
+        "feed": Recipe.objects.order_by("-pub_date", "-id")[:10],
+        "author": Recipe.objects.filter(author_id=user).order_by(
+            "-pub_date", "-id"
+        )[:10],
+        "favorites": Recipe.objects.filter(isfavorited__user_id=user)[:10],
+        "shopping_cart": Recipe.objects.filter(
+            isinshoppingcart__user_id=user
+        )[:10],
+        "tags": Recipe.objects.filter(tags__slug__in=("t1", "t2"))[:10],
+    }
+
+
+def explain(queryset, label):
+    """
+    Метка в тексте запроса не дает sqlite3 вернуть план
+    из кеша подготовленных выражений.
+    """
+    sql, params = queryset.query.sql_with_params()
+    prefix = connection.ops.explain_query_prefix()
+    with connection.cursor() as cursor:
+        cursor.execute(f"{prefix} {sql} /* {label} */", params)
+        return "\n".join(
+            " ".join(map(str, row)) for row in cursor.fetchall()
+        )
+
+
+def measure(queries, label):
+    results = {}
+    for name, queryset in queries.items():
+        start = time.perf_counter()
+        for _ in range(20):
+            list(queryset.all())
+        results[name] = {
+            "ms": (time.perf_counter() - start) / 20 * 1000,
+            "plan": explain(queryset, label),
+        }
+    return results
+
+
+def set_indexes(enabled):
+    schema_editor = connection.schema_editor()
+    with connection.cursor() as cursor:
+        for model, name in INDEXES:
+            index = get_index(model, name)
+            if enabled:
+                sql = index.create_sql(model, schema_editor)
+            else:
+                sql = index.remove_sql(model, schema_editor)
+            cursor.execute(str(sql))
+
+
+def test_explain_plans(dataset):
+    queries = get_queries(dataset)
+    after = measure(queries, "after")
+    set_indexes(enabled=False)
+    before = measure(queries, "before")
+    set_indexes(enabled=True)
+    results = {
+        name: {"before": before[name], "after": after[name]}
+        for name in queries
+    }
+    write_results("indexes", results)
+    for name, result in results.items():
+        print(
+            f"\n{name}: {result['before']['ms']:.2f} ms -> "
+            f"{result['after']['ms']:.2f} ms\n"
+            f"  before: {result['before']['plan']}\n"
+            f"  after: {result['after']['plan']}"
+        )
@@ -0,0 +1,41 @@
+import csv
+
+import pytest
+from django.conf import settings
+
+from api.ingredient_index import ingredient_index
+from api.search import CustomSearch
+from recipes.models import Ingredient
+
+pytestmark = [pytest.mark.django_db]
+
+TERMS = ("с", "мо", "сыр", "масло", "ванил")
+
+
+@pytest.fixture
+def catalogue():
+    with open(settings.BASE_DIR / "data" / "ingredients.csv") as csvfile:
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit=unit)
+            for name, unit in csv.reader(csvfile)
+        )
+    ingredient_index.invalidate()
+
+
+def search_with_orm(term):
+    view = type("View", (), {"search_fields": ("^name",)})()
+    request = type("Request", (), {"query_params": {"name": term}})()
+    return list(
+        CustomSearch().filter_queryset(
+            request, Ingredient.objects.all(), view
+        )
+    )
+
+
+@pytest.mark.parametrize("term", TERMS)
+@pytest.mark.parametrize(
+    "search", (search_with_orm, ingredient_index.search), ids=("orm", "index")
+)
+def test_ingredient_search(catalogue, timer, search, term):
+    found = timer(lambda: search(term), repeat=50)
+    timer.report(found=len(found))
@@ -0,0 +1,72 @@
+import pytest
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from api.fast_serializers import RecipeValuesSerializer
+from api.renderers import FastJSONRenderer
+from api.serializers import RecipeReadSerializer
+from recipes.models import Ingredient, Recipe, Tag
+from tests.conftest import create_recipes
+
+from .conftest import Timer, write_results
+
+pytestmark = [pytest.mark.django_db]
+
+PAGE_SIZE = 100
+
+
+@pytest.fixture
+def page(auth_user):
+    tags = [
+        Tag.objects.create(
+            name=f"Тег {number}", color=f"#00000{number}", slug=f"tag{number}"
+        )
+        for number in range(3)
+    ]
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f"Ингредиент {number}", measurement_unit="г")
+        for number in range(8)
+    )
+    create_recipes(
+        auth_user, PAGE_SIZE, tags=tags, ingredients=Ingredient.objects.all()
+    )
+    request = APIRequestFactory().get("/api/recipes/")
+    request.user = auth_user
+    return Recipe.objects.all(), {"request": request}
+
+
+def serialize_drf(queryset, context):
+    return RecipeReadSerializer(
+        queryset.with_related()[:PAGE_SIZE], many=True, context=context
+    ).data
+
+
+def serialize_values(queryset, context):
+    serializer = RecipeValuesSerializer(context)
+    return serializer.to_representation(
+        serializer.prepare(queryset.with_related())[:PAGE_SIZE]
+    )
+
+
+@pytest.mark.parametrize(
+    "serialize", (serialize_drf, serialize_values), ids=("drf", "values")
+)
+@pytest.mark.parametrize(
+    "renderer_class", (JSONRenderer, FastJSONRenderer), ids=("json", "orjson")
+)
+def test_recipe_page(request, page, serialize, renderer_class):
+    queryset, context = page
+    renderer = renderer_class()
+    serialize_timer = Timer(f"{request.node.name} serialize")
+    render_timer = Timer(f"{request.node.name} render")
+    data = serialize_timer(lambda: serialize(queryset, context), repeat=20)
+    content = render_timer(lambda: renderer.render(data), repeat=20)
+    serialize_timer.report()
+    render_timer.report(bytes=len(content))
+    write_results(
+        f"rendering_{request.node.name}",
+        {
+            "serialize_ms": serialize_timer.best * 1000,
+            "render_ms": render_timer.best * 1000,
+        },
+    )
@@ -0,0 +1,70 @@
+import tracemalloc
+
+import pytest
+from django.urls import reverse
+
+from recipes.models import (Ingredient, IngredientRecipe, IsInShoppingCart,
+                            Recipe)
+
+pytestmark = [pytest.mark.django_db]
+
+INGREDIENTS = 300
+INGREDIENTS_PER_RECIPE = 8
+
+
+def fill_cart(user, recipes_count):
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(name=f"Ингредиент {number}", measurement_unit="г")
+        for number in range(INGREDIENTS)
+    )
+    ingredients = list(Ingredient.objects.all())
+    Recipe.objects.bulk_create(
+        Recipe(
+            name=f"Рецепт {number}",
+            author=user,
+            image="recipes_image/image.png",
+            text="Описание рецепта",
+            cooking_time=10,
+        )
+        for number in range(recipes_count)
+    )
+    recipe_ids = list(Recipe.objects.values_list("id", flat=True))
+    IngredientRecipe.objects.bulk_create(
+        (
+            IngredientRecipe(
+                recipe_id=recipe_id,
+                ingredient=ingredients[(recipe_id + shift) % INGREDIENTS],
+                amount=shift + 1,
+            )
+            for recipe_id in recipe_ids
+            for shift in range(INGREDIENTS_PER_RECIPE)
+        ),
+        batch_size=5000,
+    )
+    IsInShoppingCart.objects.bulk_create(
+        (
+            IsInShoppingCart(user=user, recipe_id=recipe_id)
+            for recipe_id in recipe_ids
+        ),
+        batch_size=5000,
+    )
+
+
+@pytest.mark.parametrize("recipes_count", (1000, 10000))
+@pytest.mark.parametrize("file_format", ("txt", "csv", "pdf"))
+def test_download_shopping_cart(
+    api_user_client, auth_user, timer, recipes_count, file_format
+):
+    fill_cart(auth_user, recipes_count)
+    url = reverse("api:recipes-download-shopping-cart")
+
+    def download():
+        response = api_user_client.get(url, {"file_format": file_format})
+        return sum(len(chunk) for chunk in response.streaming_content)
+
+    size = timer(download)
+    tracemalloc.start()
+    download()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    timer.report(bytes=size, peak_kib=peak // 1024)
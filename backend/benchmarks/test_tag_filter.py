@@ -0,0 +1,78 @@
+import random
+
+import pytest
+from django.db.models import Exists, OuterRef
+
+from api.cache import get_tag_ids_by_slug
+from recipes.models import Recipe, Tag, TagRecipes
+
+from .conftest import write_results
+
+pytestmark = [pytest.mark.django_db]
+
+RECIPES = 20000
+TAGS = 10
+TAGS_PER_RECIPE = 3
+PAGE_SIZE = 6
+RESULTS = {}
+
+
+@pytest.fixture
+def dataset(auth_user):
+    random.seed(0)
+    Tag.objects.bulk_create(
+        Tag(name=f"Тег {number}", color=f"#0000{number:02}", slug=f"t{number}")
+        for number in range(TAGS)
+    )
+    tags = list(Tag.objects.values_list("id", flat=True))
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                name=f"Рецепт {number}",
+                author=auth_user,
+                image="recipes_image/image.png",
+                text="Описание рецепта",
+                cooking_time=10,
+            )
+            for number in range(RECIPES)
+        ),
+        batch_size=5000,
+    )
+    TagRecipes.objects.bulk_create(
+        (
+            TagRecipes(recipe_id=recipe, tag_id=tag)
+            for recipe in Recipe.objects.values_list("id", flat=True)
+            for tag in random.sample(tags, TAGS_PER_RECIPE)
+        ),
+        batch_size=5000,
+    )
+
+
+def filter_with_join(slugs):
+    queryset = Recipe.objects.filter(tags__slug__in=slugs).distinct()
+    return queryset.count(), list(queryset[:PAGE_SIZE])
+
+
+def filter_with_exists(slugs):
+    tag_ids_by_slug = get_tag_ids_by_slug()
+    queryset = Recipe.objects.filter(
+        Exists(
+            TagRecipes.objects.filter(
+                recipe=OuterRef("pk"),
+                tag_id__in=[tag_ids_by_slug[slug] for slug in slugs],
+            )
+        )
+    )
+    return queryset.count(), list(queryset[:PAGE_SIZE])
+
+
+@pytest.mark.parametrize("tags_count", (1, 3, 6))
+@pytest.mark.parametrize(
+    "search", (filter_with_join, filter_with_exists), ids=("join", "exists")
+)
+def test_tag_filter(dataset, timer, search, tags_count):
+    slugs = [f"t{number}" for number in range(tags_count)]
+    count, page = timer(lambda: search(slugs), repeat=10)
+    timer.report(count=count)
+    RESULTS[timer.name] = {"ms": timer.best * 1000, "count": count}
+    write_results("tag_filter", RESULTS)
@@ -3,14 +3,29 @@ ASGI config for foodgram project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Requests are resolved with ``foodgram.asgi_urls``, where read-heavy
+endpoints are served by async views.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 """
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler, ASGIRequest
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "foodgram.settings")
 
-application = get_asgi_application()
+
+class AsyncReadRequest(ASGIRequest):
+    urlconf = "foodgram.asgi_urls"
+
+
+class AsyncReadASGIHandler(ASGIHandler):
+    request_class = AsyncReadRequest
+
+
+django.setup(set_prefix=False)
+
+application = AsyncReadASGIHandler()
@@ -0,0 +1,16 @@
+"""
+URLconf для запуска под ASGI: эндпоинты чтения из api.async_urls
+обслуживаются асинхронными представлениями, остальное - как в urls.py.
+"""
+from django.urls import include, path
+
+from . import urls
+
+urlpatterns = [
+    path("api/", include("api.async_urls")),
+    *(
+        pattern
+        for pattern in urls.urlpatterns
+        if getattr(pattern, "namespace", None) != "api"
+    ),
+]
@@ -0,0 +1,14 @@
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Кеши, которые каждый процесс держит отдельно.
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def is_shared_cache(alias=DEFAULT_CACHE_ALIAS):
+    """
+    Видят ли записи кеша все процессы (Redis, Memcached, база данных).
+    Запись в кеш в памяти процесса другие процессы не увидят.
+    """
+    return not isinstance(caches[alias], PROCESS_LOCAL_CACHES)
@@ -0,0 +1,42 @@
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL с проверкой постоянных соединений.
+    При CONN_HEALTH_CHECKS = True соединение, оставшееся
+    с прошлого HTTP-запроса (CONN_MAX_AGE > 0), проверяется перед
+    первым запросом к базе и при обрыве открывается заново,
+    как в Django 4.1.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_enabled = self.settings_dict.get(
+            "CONN_HEALTH_CHECKS", False
+        )
+        self.health_check_done = False
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def check_health(self):
+        if (
+            self.connection is None
+            or not self.health_check_enabled
+            or self.health_check_done
+            or self.in_atomic_block
+        ):
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def ensure_connection(self):
+        self.check_health()
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
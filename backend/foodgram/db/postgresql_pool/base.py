@@ -0,0 +1,104 @@
+import threading
+
+import psycopg2.extras
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+from ..postgresql import base
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+class BlockingConnectionPool(ThreadedConnectionPool):
+    """
+    ThreadedConnectionPool, который держит открытыми до maxconn
+    свободных соединений, а не minconn, и при занятых соединениях
+    ждет освободившееся до timeout секунд вместо PoolError.
+    """
+
+    def __init__(self, minconn, maxconn, timeout, *args, **kwargs):
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(maxconn)
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        # psycopg2 закрывает возвращенное соединение, если свободных
+        # уже minconn: minconn используется только при создании пула.
+        self.minconn = self.maxconn
+
+    def getconn(self, key=None):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError("connection pool exhausted")
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        super().putconn(conn, key, close)
+        self._slots.release()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL с пулом соединений внутри процесса.
+    Закрытие соединения возвращает его в пул, поэтому при CONN_MAX_AGE = 0
+    соединение отдается в пул в конце каждого запроса, а следующий
+    запрос берет готовое. Пул задается ключом POOL настроек:
+    {"MIN_SIZE": 1, "MAX_SIZE": 20, "TIMEOUT": 10}. MIN_SIZE соединений
+    открывается сразу, до MAX_SIZE открываются по мере надобности
+    и остаются в пуле. Если заняты все MAX_SIZE, поток ждет свободное
+    до TIMEOUT секунд.
+    """
+
+    def get_pool(self, conn_params):
+        key = (self.alias, conn_params.get("database"))
+        with pools_lock:
+            if key not in pools:
+                options = self.settings_dict.get("POOL", {})
+                pools[key] = BlockingConnectionPool(
+                    options.get("MIN_SIZE", 1),
+                    options.get("MAX_SIZE", 20),
+                    options.get("TIMEOUT", 10),
+                    **conn_params,
+                )
+            return pools[key]
+
+    def get_pooled_connection(self, pool):
+        connection = pool.getconn()
+        if connection.closed or (
+            self.health_check_enabled and not self.ping(connection)
+        ):
+            pool.putconn(connection, close=True)
+            connection = pool.getconn()
+        return connection
+
+    def ping(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        connection = self.get_pooled_connection(self.pool)
+        options = self.settings_dict["OPTIONS"]
+        try:
+            self.isolation_level = options["isolation_level"]
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            self.pool.putconn(self.connection, close=self.connection.closed)
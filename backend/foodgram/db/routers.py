@@ -0,0 +1,95 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+class ReplicaState:
+    """
+    Состояние маршрутизации в пределах запроса. Объект общий для
+    потоков, в которые копируется контекст, поэтому запись в любом
+    из них переключает чтение всего запроса на основную базу.
+    replica: читать ли с реплик; wrote: была ли запись.
+    use_primary() его не меняет: блоки в разных потоках запроса
+    могут пересекаться.
+    """
+
+    def __init__(self, replica=True):
+        self.replica = replica
+        self.wrote = False
+
+
+replica_state = ContextVar("replica_state", default=None)
+
+primary_only = ContextVar("primary_only", default=False)
+
+
+@contextmanager
+def use_replica(replica=True):
+    """
+    Внутри блока чтение идет с реплик из DATABASE_REPLICAS,
+    пока в блоке ничего не записано. С replica=False блок только
+    отслеживает запись. Возвращает ReplicaState.
+    """
+    state = ReplicaState(replica)
+    token = replica_state.set(state)
+    try:
+        yield state
+    finally:
+        replica_state.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """
+    Внутри блока use_replica() чтение временно идет из основной базы.
+    Нужно там, где прочитанное кешируется под версией, которую меняет
+    запись: с отстающей реплики в кеш попали бы старые данные.
+    Флаг хранится в контексте текущего потока, поэтому вложенные
+    блоки и одновременные блоки в run_in_thread не сбрасывают
+    его друг другу.
+    """
+    token = primary_only.set(True)
+    try:
+        yield
+    finally:
+        primary_only.reset(token)
+
+
+def choose_replica():
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+class ReplicaRouter:
+    """
+    Отправляет чтение на реплику только внутри use_replica()
+    и только если реплики настроены. Запись и миграции идут
+    в основную базу. После первой записи внутри use_replica()
+    чтение тоже идет в основную базу, чтобы запрос видел
+    свои изменения.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = replica_state.get()
+        if (
+            state is None
+            or not state.replica
+            or state.wrote
+            or primary_only.get()
+            or not settings.DATABASE_REPLICAS
+        ):
+            return None
+        return choose_replica()
+
+    def db_for_write(self, model, **hints):
+        state = replica_state.get()
+        if state is not None:
+            state.wrote = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -28,9 +28,12 @@ INSTALLED_APPS = [
     "users.apps.UsersConfig",
     "api.apps.ApiConfig",
     "recipes.apps.RecipesConfig",
+    "tasks.apps.TasksConfig",
 ]
 
 MIDDLEWARE = [
+    "api.middleware.RequestMetricsMiddleware",
+    "api.middleware.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -91,23 +94,90 @@ DJOSER = {
 }
 
 
-DATABASES = {
+DB_ENGINE = os.getenv(
+    "DB_ENGINE", "postgresql" if os.getenv("POSTGRES_DB") else "sqlite3"
+)
+
+DB_POOL = os.getenv("DB_POOL", "false").lower() == "true"
+
+if DB_ENGINE == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": (
+                "foodgram.db.postgresql_pool"
+                if DB_POOL
+                else "foodgram.db.postgresql"
+            ),
+            "NAME": os.getenv("POSTGRES_DB", "django"),
+            "USER": os.getenv("POSTGRES_USER", "django"),
+            "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
+            "HOST": os.getenv("DB_HOST", ""),
+            "PORT": os.getenv("DB_PORT", 5432),
+            # С пулом соединение возвращается в пул в конце запроса.
+            "CONN_MAX_AGE": int(
+                os.getenv("DB_CONN_MAX_AGE", 0 if DB_POOL else 60)
+            ),
+            "CONN_HEALTH_CHECKS": (
+                os.getenv("DB_CONN_HEALTH_CHECKS", "true").lower() == "true"
+            ),
+            "POOL": {
+                "MIN_SIZE": int(os.getenv("DB_POOL_MIN_SIZE", 1)),
+                "MAX_SIZE": int(os.getenv("DB_POOL_MAX_SIZE", 20)),
+                "TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+            },
+            "OPTIONS": {
+                "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", 5)),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.getenv("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+        }
+    }
+
+# Реплики для чтения. Для PostgreSQL: DB_REPLICA_HOSTS=replica1,replica2,
+# остальные параметры подключения такие же, как у основной базы.
+# Для SQLite: DB_REPLICA_FILES=/data/replica1.sqlite3.
+DATABASE_REPLICAS = []
+
+replica_field, replica_values = (
+    ("HOST", os.getenv("DB_REPLICA_HOSTS", ""))
+    if DB_ENGINE == "postgresql"
+    else ("NAME", os.getenv("DB_REPLICA_FILES", ""))
+)
+
+for number, value in enumerate(
+    filter(None, replica_values.split(",")), start=1
+):
+    DATABASES[f"replica{number}"] = {
+        **DATABASES["default"],
+        replica_field: value.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{number}")
+
+# Сколько секунд после записи клиент читает из основной базы.
+DATABASE_REPLICA_STICKY_SECONDS = int(
+    os.getenv("DB_REPLICA_STICKY_SECONDS", 5)
+)
+
+DATABASE_ROUTERS = ["foodgram.db.routers.ReplicaRouter"]
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "foodgram"),
     }
 }
 
-# DATABASES = {
-#     "default": {
-#         "ENGINE": "django.db.backends.postgresql",
-#         "NAME": os.getenv("POSTGRES_DB", "django"),
-#         "USER": os.getenv("POSTGRES_USER", "django"),
-#         "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
-#         "HOST": os.getenv("DB_HOST", ""),
-#         "PORT": os.getenv("DB_PORT", 5432),
-#     }
-# }
+REFERENCE_CACHE_TIMEOUT = int(os.getenv("REFERENCE_CACHE_TIMEOUT", 3600))
+
+USER_STATE_CACHE_TIMEOUT = int(os.getenv("USER_STATE_CACHE_TIMEOUT", 600))
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -144,5 +214,62 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+IMAGE_VARIANT_SIZES = {"small": 320, "medium": 640}
+
+IMAGE_VARIANT_FORMATS = ("webp", "avif")
+
+INGREDIENT_INDEX_TTL = int(os.getenv("INGREDIENT_INDEX_TTL", 300))
+
+# Как часто индекс подбора рецептов по продуктам перестраивается целиком
+# и сколько живет журнал его изменений в кеше.
+RECIPE_MATCHER_TTL = int(os.getenv("RECIPE_MATCHER_TTL", 3600))
+# Кеш в памяти процесса (LocMemCache) не передает журнал изменений
+# другим процессам, тогда индекс перестраивается целиком так часто.
+RECIPE_MATCHER_LOCAL_TTL = int(os.getenv("RECIPE_MATCHER_LOCAL_TTL", 30))
+
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    "SHOPPING_LIST_PDF_FONT",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+)
+
+# Выгрузки списков покупок хранятся вне MEDIA_ROOT: nginx отдает
+# /media/ без авторизации, а выгрузки скачиваются через api/tasks/.
+SHOPPING_LIST_EXPORT_ROOT = os.getenv(
+    "SHOPPING_LIST_EXPORT_ROOT", os.path.join(BASE_DIR, "exports")
+)
+
+SHOPPING_LIST_EXPORT_TTL = int(os.getenv("SHOPPING_LIST_EXPORT_TTL", 86400))
+
+RANKING_HALF_LIFE_HOURS = float(os.getenv("RANKING_HALF_LIFE_HOURS", 48))
+
+REQUEST_METRICS_ENABLED = (
+    os.getenv("REQUEST_METRICS_ENABLED", "false").lower() == "true"
+)
+
+REQUEST_QUERY_BUDGET = int(os.getenv("REQUEST_QUERY_BUDGET", 15))
+
+REQUEST_QUERY_BUDGETS = {}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "api.middleware": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+
+TASKS_EAGER = os.getenv("TASKS_EAGER", "false").lower() == "true"
+
+TASKS_WORKER_PROCESSES = int(os.getenv("TASKS_WORKER_PROCESSES", 2))
+
+TASKS_POLL_INTERVAL = float(os.getenv("TASKS_POLL_INTERVAL", 1))
+
+TASKS_VISIBILITY_TIMEOUT = int(os.getenv("TASKS_VISIBILITY_TIMEOUT", 300))
+
+TASKS_RETRY_DELAY = int(os.getenv("TASKS_RETRY_DELAY", 10))
+
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -1,12 +1,14 @@
 from typing import Any
 
 from django.contrib import admin
-from django.db.models import Count
 from django.db.models.query import QuerySet
 from django.http import HttpRequest
 
+from .cart import recount_cart_totals
+from .matching import publish_recipe_changes
 from .models import (Ingredient, IngredientRecipe, IsFavorited,
                      IsInShoppingCart, Recipe, Subscription, Tag)
+from .search import update_search_index
 
 
 @admin.register(Tag)
@@ -34,7 +36,13 @@ class IngredientRecipeInLine(admin.TabularInline):
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     inlines = (IngredientRecipeInLine,)
-    list_display = ("id", "name", "author", "get_likes_for_recipe",)
+    list_display = (
+        "id",
+        "name",
+        "author",
+        "favorites_count",
+        "in_carts_count",
+    )
 
     list_filter = ("name", "author", "tags__name")
 
@@ -42,14 +50,22 @@ class RecipeAdmin(admin.ModelAdmin):
 
     list_display_links = ('name', )
     filter_horizontal = ('ingredients',)
-
-    @admin.display(description="Likes")
-    def get_likes_for_recipe(self, obj):
-        return obj.likes
+    readonly_fields = ("favorites_count", "in_carts_count")
 
     def get_queryset(self, request: HttpRequest) -> QuerySet[Any]:
-        current_qs = super().get_queryset(request)
-        return current_qs.annotate(likes=Count("isfavorited"))
+        return super().get_queryset(request).select_related("author")
+
+    def save_related(
+        self, request: HttpRequest, form, formsets, change: bool
+    ) -> None:
+        super().save_related(request, form, formsets, change)
+        update_search_index([form.instance.id])
+        publish_recipe_changes([form.instance.id])
+        recount_cart_totals(
+            form.instance.isinshoppingcart_set.values_list(
+                "user_id", flat=True
+            )
+        )
 
 
 @admin.register(Subscription)
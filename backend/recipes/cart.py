@@ -0,0 +1,195 @@
+from collections import defaultdict
+
+from django.db.models import (BigIntegerField, Case, F, OuterRef, Subquery,
+                              Sum, Value, When)
+from django.db.models.functions import Greatest
+
+from .models import IngredientRecipe, IsInShoppingCart, ShoppingCartTotal, User
+
+BATCH_SIZE = 1000
+
+# Единица измерения: (основная единица, множитель).
+BASE_UNITS = {"кг": ("г", 1000), "л": ("мл", 1000)}
+
+# Основная единица: (крупная единица, множитель) для вывода.
+LARGE_UNITS = {
+    base: (unit, factor) for unit, (base, factor) in BASE_UNITS.items()
+}
+
+
+def to_base_unit(amount, unit):
+    base, factor = BASE_UNITS.get(unit.strip().casefold(), (unit, 1))
+    return amount * factor, base
+
+
+def to_display_unit(amount, unit):
+    """
+    Переводит количество в крупную единицу, если в ней оно не меньше 1:
+    1500 г - это 1.5 кг.
+    """
+    large, factor = LARGE_UNITS.get(unit.strip().casefold(), (unit, 1))
+    if factor == 1 or amount < factor:
+        return amount, unit
+    if amount % factor == 0:
+        return amount // factor, large
+    return round(amount / factor, 3), large
+
+
+def recipe_amount(recipe_id):
+    return Subquery(
+        IngredientRecipe.objects.filter(
+            recipe_id=recipe_id, ingredient_id=OuterRef("ingredient_id")
+        ).values("amount")[:1]
+    )
+
+
+def create_totals(user_ids, ingredient_ids):
+    """
+    Создает недостающие нулевые итоги, чтобы дальше менять их UPDATE.
+    """
+    ShoppingCartTotal.objects.bulk_create(
+        (
+            ShoppingCartTotal(user_id=user_id, ingredient_id=ingredient_id)
+            for user_id in user_ids
+            for ingredient_id in ingredient_ids
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def add_recipe_to_cart(user_id, recipe_id):
+    """
+    Прибавляет ингредиенты рецепта к итогам списка покупок.
+    """
+    ingredient_ids = list(
+        IngredientRecipe.objects.filter(recipe_id=recipe_id).values_list(
+            "ingredient_id", flat=True
+        )
+    )
+    if not ingredient_ids:
+        return
+    create_totals([user_id], ingredient_ids)
+    ShoppingCartTotal.objects.filter(
+        user_id=user_id, ingredient_id__in=ingredient_ids
+    ).update(amount=F("amount") + recipe_amount(recipe_id))
+
+
+def remove_recipe_from_cart(user_id, recipe_id):
+    """
+    Вычитает ингредиенты рецепта из итогов списка покупок.
+    Итог не опускается ниже нуля.
+    """
+    ShoppingCartTotal.objects.filter(
+        user_id=user_id,
+        ingredient_id__in=IngredientRecipe.objects.filter(
+            recipe_id=recipe_id
+        ).values("ingredient_id"),
+    ).update(
+        amount=Greatest(F("amount") - recipe_amount(recipe_id), Value(0))
+    )
+
+
+def change_recipe_in_carts(recipe_id, deltas, new_ingredient_ids=()):
+    """
+    Применяет изменения ингредиентов рецепта {id ингредиента: разница}
+    к итогам всех списков покупок, где есть рецепт, одним UPDATE.
+    Для новых ингредиентов рецепта итоги сначала создаются.
+    """
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items()
+        if delta
+    }
+    if not deltas:
+        return
+    users = IsInShoppingCart.objects.filter(recipe_id=recipe_id).values(
+        "user_id"
+    )
+    if new_ingredient_ids:
+        create_totals(
+            users.values_list("user_id", flat=True), new_ingredient_ids
+        )
+    ShoppingCartTotal.objects.filter(
+        user_id__in=users, ingredient_id__in=deltas
+    ).update(
+        amount=Greatest(
+            F("amount")
+            + Case(
+                *(
+                    When(ingredient_id=ingredient_id, then=Value(delta))
+                    for ingredient_id, delta in deltas.items()
+                ),
+                output_field=BigIntegerField(),
+            ),
+            Value(0),
+        )
+    )
+
+
+def get_cart_totals(user):
+    """
+    Список покупок из итогов: количества в г и кг, мл и л
+    складываются, результат отсортирован по названию.
+    Стоимость зависит от числа различных ингредиентов в списке.
+    """
+    totals = defaultdict(int)
+    rows = ShoppingCartTotal.objects.filter(
+        user=user, amount__gt=0
+    ).values_list("ingredient__name", "ingredient__measurement_unit", "amount")
+    for name, unit, amount in rows:
+        amount, unit = to_base_unit(amount, unit)
+        totals[name, unit] += amount
+    shopping_list = []
+    for (name, unit), amount in sorted(totals.items()):
+        amount, unit = to_display_unit(amount, unit)
+        shopping_list.append(
+            {"name": name, "amount": amount, "measurement_unit": unit}
+        )
+    return shopping_list
+
+
+def recount_cart_totals(user_ids=None, batch_size=BATCH_SIZE):
+    """
+    Сверяет итоги списков покупок пользователей user_ids
+    (или всех пользователей) с рецептами в списках пачками
+    по batch_size пользователей и исправляет разошедшиеся.
+    Возвращает число исправленных итогов.
+    """
+    if user_ids is None:
+        user_ids = User.objects.order_by("id").values_list("id", flat=True)
+    user_ids = list(user_ids)
+    fixed = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        expected = {
+            (row["recipe__isinshoppingcart__user"], row["ingredient"]): (
+                row["total"]
+            )
+            for row in IngredientRecipe.objects.filter(
+                recipe__isinshoppingcart__user__in=batch
+            )
+            .values("recipe__isinshoppingcart__user", "ingredient")
+            .annotate(total=Sum("amount"))
+            .order_by()
+        }
+        drifted = []
+        for total in ShoppingCartTotal.objects.filter(user__in=batch):
+            amount = expected.pop((total.user_id, total.ingredient_id), 0)
+            if total.amount != amount:
+                total.amount = amount
+                drifted.append(total)
+        ShoppingCartTotal.objects.bulk_update(
+            drifted, ("amount",), batch_size=batch_size
+        )
+        ShoppingCartTotal.objects.bulk_create(
+            (
+                ShoppingCartTotal(
+                    user_id=user_id, ingredient_id=ingredient_id, amount=amount
+                )
+                for (user_id, ingredient_id), amount in expected.items()
+            ),
+            batch_size=batch_size,
+        )
+        fixed += len(drifted) + len(expected)
+    return fixed
@@ -1,3 +1,4 @@
 COMMON_MAX_LEN = 200
 COLOR_MAX_LEN = 7
 TEXT_MAX_LEN = 256
+SEARCH_TERM_MAX_LEN = 64
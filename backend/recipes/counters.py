@@ -0,0 +1,88 @@
+from django.db.models import Count, F
+
+from .cart import recount_cart_totals
+from .models import IsFavorited, IsInShoppingCart, Recipe, Subscription, User
+
+COUNTERS = (
+    (IsFavorited, "recipe_id", Recipe, "favorites_count"),
+    (IsInShoppingCart, "recipe_id", Recipe, "in_carts_count"),
+    (Recipe, "author_id", User, "recipes_count"),
+    (Subscription, "author_id", User, "followers_count"),
+)
+
+# Счетчики, от которых зависит рейтинг рецепта: при их изменении
+# рецепт помечается для пересчета в update_rankings.
+RANKING_COUNTERS = {
+    (Recipe, "favorites_count"): {"ranking_stale": True},
+    (Recipe, "in_carts_count"): {"ranking_stale": True},
+}
+
+
+def change_counter(model, object_id, field, delta):
+    """
+    Атомарно меняет счетчик одним UPDATE с выражением F().
+    Счетчик не опускается ниже нуля.
+    """
+    queryset = model.objects.filter(id=object_id)
+    if delta < 0:
+        queryset = queryset.filter(**{f"{field}__gte": -delta})
+    return queryset.update(
+        **{field: F(field) + delta},
+        **RANKING_COUNTERS.get((model, field), {}),
+    )
+
+
+def recount_counter(source, source_field, model, field, batch_size=1000):
+    """
+    Пересчитывает счетчик пачками по batch_size строк model
+    и сохраняет только разошедшиеся значения.
+    Значение пишется условным UPDATE: если после чтения счетчик
+    изменил сигнал, строка пропускается, а не затирает изменение.
+    Возвращает число исправленных строк.
+    """
+    fixed = 0
+    last_id = 0
+    while True:
+        batch = list(
+            model.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", field)[:batch_size]
+        )
+        if not batch:
+            return fixed
+        last_id = batch[-1][0]
+        counts = dict(
+            source.objects.filter(
+                **{
+                    f"{source_field}__gte": batch[0][0],
+                    f"{source_field}__lte": last_id,
+                }
+            )
+            .values_list(source_field)
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        marks = RANKING_COUNTERS.get((model, field), {})
+        for object_id, value in batch:
+            count = counts.get(object_id, 0)
+            if value != count:
+                fixed += model.objects.filter(
+                    id=object_id, **{field: value}
+                ).update(**{field: count}, **marks)
+
+
+def recount(batch_size=1000):
+    """
+    Пересчитывает все счетчики и итоги списков покупок,
+    возвращает {имя счетчика: исправлено}.
+    """
+    fixed = {
+        f"{model._meta.model_name}.{field}": recount_counter(
+            source, source_field, model, field, batch_size
+        )
+        for source, source_field, model, field in COUNTERS
+    }
+    fixed["shoppingcarttotal.amount"] = recount_cart_totals(
+        batch_size=batch_size
+    )
+    return fixed
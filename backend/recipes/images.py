@@ -0,0 +1,84 @@
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from tasks.registry import task
+
+from .models import Recipe
+
+
+def get_variant_formats():
+    """
+    Возвращает форматы вариантов из IMAGE_VARIANT_FORMATS,
+    которые поддерживает установленная сборка Pillow.
+    """
+    Image.init()
+    return [
+        image_format
+        for image_format in settings.IMAGE_VARIANT_FORMATS
+        if image_format.upper() in Image.SAVE
+    ]
+
+
+def get_variant_name(image_name, size, image_format):
+    directory, file_name = os.path.split(image_name)
+    stem = os.path.splitext(file_name)[0]
+    return os.path.join(
+        directory, "variants", f"{stem}_{size}.{image_format.lower()}"
+    )
+
+
+def render_variant(image, size, image_format):
+    variant = image.copy()
+    variant.thumbnail((size, size))
+    if variant.mode not in ("RGB", "RGBA"):
+        variant = variant.convert("RGBA" if "A" in variant.mode else "RGB")
+    buffer = io.BytesIO()
+    variant.save(buffer, format=image_format.upper(), quality=80)
+    return ContentFile(buffer.getvalue())
+
+
+@task(max_attempts=3)
+def generate_image_variants(recipe_id, stale_names=()):
+    """
+    Создает уменьшенные копии изображения рецепта во всех форматах
+    и сохраняет пути к ним в Recipe.image_variants.
+    Копии прежнего изображения из stale_names удаляются.
+    """
+    recipe = Recipe.objects.filter(id=recipe_id).first()
+    if recipe is None or not recipe.image:
+        return
+    image_name = recipe.image.name
+    with recipe.image.open("rb") as file, Image.open(file) as image:
+        image.load()
+        variants = {}
+        for size_name, size in settings.IMAGE_VARIANT_SIZES.items():
+            for image_format in get_variant_formats():
+                name = get_variant_name(image_name, size, image_format)
+                if default_storage.exists(name):
+                    default_storage.delete(name)
+                variant = render_variant(image, size, image_format)
+                variants[f"{size_name}_{image_format}"] = (
+                    default_storage.save(name, variant)
+                )
+    Recipe.objects.filter(id=recipe_id, image=image_name).update(
+        image_variants=variants
+    )
+    for name in set(stale_names) - set(variants.values()):
+        default_storage.delete(name)
+    return variants
+
+
+def schedule_image_variants(recipe):
+    """
+    Ставит в очередь создание вариантов изображения рецепта.
+    Вызывается до сброса recipe.image_variants, чтобы удалить
+    копии прежнего изображения.
+    """
+    generate_image_variants.delay(
+        recipe.id, list(recipe.image_variants.values())
+    )
@@ -0,0 +1,170 @@
+import csv
+import io
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.dispatch import Signal
+
+from .const import COMMON_MAX_LEN
+from .models import Ingredient
+
+FORMATS = ("csv", "json", "ndjson")
+
+JSON_CHUNK_SIZE = 64 * 1024
+
+CSV_HEADER = ("name", "measurement_unit")
+
+# bulk_create не вызывает post_save, поэтому об окончании импорта
+# кеши ингредиентов узнают из этого сигнала.
+ingredients_imported = Signal()
+
+
+def detect_format(path, binary):
+    """
+    Формат определяется по расширению файла, а для stdin
+    и неизвестных расширений - по первому значащему символу.
+    """
+    suffix = Path(path).suffix.lstrip(".").lower()
+    if suffix in FORMATS:
+        return suffix
+    if suffix == "jsonl":
+        return "ndjson"
+    head = binary.peek(64).lstrip()[:1]
+    if head == b"[":
+        return "json"
+    if head == b"{":
+        return "ndjson"
+    return "csv"
+
+
+def iter_csv(file):
+    for row in csv.reader(file):
+        if tuple(row) == CSV_HEADER or not row:
+            continue
+        yield row[0], row[1] if len(row) > 1 else ""
+
+
+def iter_json_array(file, chunk_size=JSON_CHUNK_SIZE):
+    """
+    Читает JSON-массив объектов по частям: в памяти одновременно
+    находится только недочитанный хвост и один объект.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+    while True:
+        chunk = file.read(chunk_size)
+        buffer += chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("Ожидался JSON-массив")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise
+                break
+            yield item
+        buffer = buffer[position:]
+        if not chunk:
+            if buffer.strip():
+                raise ValueError("Незавершенный JSON-массив")
+            return
+
+
+def iter_ndjson(file):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_json_rows(items):
+    for item in items:
+        yield item.get("name", ""), item.get("measurement_unit", "")
+
+
+def iter_rows(file, file_format):
+    """
+    Возвращает поток пар (название, единица измерения) из текстового файла.
+    """
+    if file_format == "csv":
+        return iter_csv(file)
+    if file_format == "json":
+        return iter_json_rows(iter_json_array(file))
+    return iter_json_rows(iter_ndjson(file))
+
+
+class ImportStats:
+    def __init__(self):
+        self.rows = 0
+        self.skipped = 0
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        return self.rows / self.elapsed if self.elapsed else 0
+
+
+def import_ingredients(rows, batch_size=1000, on_batch=None):
+    """
+    Сохраняет ингредиенты пачками по batch_size.
+    Повторы по unique_name_measurement_unit пропускаются через
+    ignore_conflicts: других полей у ингредиента нет, поэтому это
+    и есть upsert, а повторный импорт ничего не меняет.
+    """
+    stats = ImportStats()
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            ingredients_imported.send(sender=Ingredient, stats=stats)
+            return stats
+        stats.rows += len(chunk)
+        batch = []
+        for name, measurement_unit in chunk:
+            name = str(name).strip()
+            measurement_unit = str(measurement_unit).strip()
+            if (
+                not name
+                or not measurement_unit
+                or len(name) > COMMON_MAX_LEN
+                or len(measurement_unit) > COMMON_MAX_LEN
+            ):
+                stats.skipped += 1
+                continue
+            batch.append(
+                Ingredient(name=name, measurement_unit=measurement_unit)
+            )
+        Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+        if on_batch is not None:
+            on_batch(stats)
+
+
+def open_source(path, file_format=None, stdin=None):
+    """
+    Открывает файл или stdin (path="-") как текст
+    и возвращает его вместе с форматом данных.
+    """
+    if path == "-":
+        binary = io.BufferedReader(stdin.buffer)
+    else:
+        binary = open(path, "rb")
+    file_format = file_format or detect_format(path, binary)
+    return io.TextIOWrapper(binary, encoding="utf8", newline=""), file_format
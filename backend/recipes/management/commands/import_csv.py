@@ -1,25 +1,56 @@
-import csv
+import sys
 from typing import Any
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
 
+from recipes.importer import (FORMATS, import_ingredients, iter_rows,
+                              open_source)
 from recipes.models import Ingredient
 
 
-def import_data():
-    with open("data/ingredients.csv", encoding="utf8") as csvfile:
-        reader = csv.reader(csvfile)
-        reader_list = list(reader)
-        objects = [
-            Ingredient(name=row[0], measurement_unit=row[1])
-            for row in reader_list
-        ]
-        Ingredient.objects.bulk_create(objects)
-
-
 class Command(BaseCommand):
-    help = "Import ingredients into model in DB"
+    help = "Import ingredients from CSV, JSON or NDJSON into model in DB"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            nargs="?",
+            default=settings.BASE_DIR / "data" / "ingredients.csv",
+            help="Путь к файлу или - для чтения из stdin",
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Формат данных; по умолчанию определяется автоматически",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
 
     def handle(self, *args: Any, **options: Any) -> str | None:
-        import_data()
-        self.stdout.write(self.style.SUCCESS("Data imported succesfully"))
+        before = Ingredient.objects.count()
+        source, file_format = open_source(
+            str(options["path"]), options["format"], sys.stdin
+        )
+        with source:
+            stats = import_ingredients(
+                iter_rows(source, file_format),
+                batch_size=options["batch_size"],
+                on_batch=self.report_progress,
+            )
+        self.stderr.write("")
+        created = Ingredient.objects.count() - before
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Data imported succesfully: {stats.rows} rows, "
+                f"{created} created, {stats.skipped} skipped "
+                f"in {stats.elapsed:.1f} s ({stats.rate:.0f} rows/s)"
+            )
+        )
+
+    def report_progress(self, stats):
+        self.stderr.write(
+            f"{stats.rows} rows, {stats.rate:.0f} rows/s",
+            style_func=str,
+            ending="\r",
+        )
+        self.stderr.flush()
@@ -0,0 +1,25 @@
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from recipes.matching import RecipeMatcher, rebuild_recipe_matcher
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ingredient to recipes index in every process"
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        rebuild_recipe_matcher()
+        matcher = RecipeMatcher()
+        started = time.monotonic()
+        matcher.build()
+        elapsed = time.monotonic() - started
+        stats = matcher.get_stats()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recipes indexed: {stats['recipes']}, "
+                f"ingredients: {stats['ingredients']}, "
+                f"postings: {stats['postings']} in {elapsed:.2f}s"
+            )
+        )
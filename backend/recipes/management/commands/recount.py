@@ -0,0 +1,20 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from recipes.counters import recount
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount favorites, shopping cart, recipes and followers counters "
+        "and shopping cart totals"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        for counter, fixed in recount(options["batch_size"]).items():
+            self.stdout.write(f"{counter}: fixed {fixed}")
+        self.stdout.write(self.style.SUCCESS("Counters recounted"))
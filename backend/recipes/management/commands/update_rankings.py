@@ -0,0 +1,36 @@
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from recipes.ranking import update_rankings
+
+
+class Command(BaseCommand):
+    help = "Recompute popular and trending recipe rankings"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Пересчитать все рецепты, а не только измененные",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Повторять пересчет каждые interval секунд",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        while True:
+            updated = update_rankings(
+                full=options["full"], batch_size=options["batch_size"]
+            )
+            self.stdout.write(
+                self.style.SUCCESS(f"Rankings updated: {updated}")
+            )
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,16 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from recipes.search import update_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the recipe search index"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        indexed = update_search_index(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Recipes indexed: {indexed}"))
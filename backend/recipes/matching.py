@@ -0,0 +1,260 @@
+import threading
+import time
+import uuid
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from foodgram.caches import is_shared_cache
+from foodgram.db.routers import use_primary
+
+from .models import IngredientRecipe
+
+GENERATION_KEY = "recipe_matcher:generation"
+SEQUENCE_KEY = "recipe_matcher:sequence"
+CHANGE_KEY = "recipe_matcher:change:{}"
+
+# Если журнал отстал сильнее, индекс перестраивается целиком.
+MAX_CHANGES = 1000
+
+BUILD_CHUNK_SIZE = 10000
+
+Match = namedtuple("Match", ("recipe_id", "matched", "missing", "coverage"))
+
+
+def get_rebuild_ttl():
+    """
+    Через сколько секунд индекс перестраивается целиком.
+    Журнал изменений доходит до других процессов только через общий
+    кеш (Redis, Memcached), с кешем в памяти процесса другие процессы
+    увидят изменения только после перестройки.
+    """
+    if is_shared_cache():
+        return settings.RECIPE_MATCHER_TTL
+    return settings.RECIPE_MATCHER_LOCAL_TTL
+
+
+def ensure_size(sizes, recipe_id):
+    """
+    Расширяет массив sizes нулями так, чтобы в нем был индекс recipe_id.
+    Размер хотя бы удваивается, чтобы рост по одному id был дешевым.
+    """
+    missing = recipe_id + 1 - len(sizes)
+    if missing > 0:
+        sizes.frombytes(bytes(sizes.itemsize * max(missing, len(sizes))))
+
+
+def contains(posting, recipe_id):
+    position = bisect_left(posting, recipe_id)
+    return position < len(posting) and posting[position] == recipe_id
+
+
+class RecipeMatcher:
+    """
+    Обратный индекс в памяти процесса для подбора рецептов по продуктам.
+    Для каждого ингредиента хранится отсортированный массив id рецептов,
+    для каждого рецепта - число его ингредиентов (массив по id рецепта).
+    Изменения рецептов пишутся в журнал в кеше, и каждый процесс
+    применяет их к своему индексу перед подбором. Индекс перестраивается
+    целиком при первом обращении, после rebuild_recipe_matcher,
+    при потере журнала и по истечении get_rebuild_ttl().
+    Пока один поток обновляет индекс, остальные читают прежний.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._built_version = None
+        self._built_at = 0
+        self._generation = None
+        self._sequence = 0
+        self._snapshot = None
+
+    def invalidate(self):
+        self._version += 1
+
+    def is_stale(self, generation, sequence):
+        return (
+            self._snapshot is None
+            or self._built_version != self._version
+            or self._generation != generation
+            or not self._sequence <= sequence <= self._sequence + MAX_CHANGES
+            or time.monotonic() - self._built_at > get_rebuild_ttl()
+        )
+
+    def build(self, generation=None, sequence=0):
+        """
+        Строит индекс одним проходом по ингредиентам рецептов
+        в порядке id рецепта, поэтому массивы сразу отсортированы.
+        """
+        version = self._version
+        postings = {}
+        sizes = array("H")
+        with use_primary():
+            rows = (
+                IngredientRecipe.objects.order_by("recipe_id")
+                .values_list("recipe_id", "ingredient_id")
+                .iterator(chunk_size=BUILD_CHUNK_SIZE)
+            )
+            for recipe_id, ingredient_id in rows:
+                posting = postings.get(ingredient_id)
+                if posting is None:
+                    posting = postings[ingredient_id] = array("I")
+                posting.append(recipe_id)
+                ensure_size(sizes, recipe_id)
+                sizes[recipe_id] += 1
+        self._snapshot = (postings, sizes)
+        self._built_version = version
+        self._built_at = time.monotonic()
+        self._generation = generation
+        self._sequence = sequence
+
+    def apply_changes(self, recipe_ids, sequence):
+        """
+        Заново индексирует рецепты recipe_ids: удаленные рецепты
+        пропадают из индекса. Измененные массивы копируются,
+        чтобы параллельный подбор видел целый снимок.
+        """
+        recipe_ids = sorted(set(recipe_ids))
+        with use_primary():
+            rows = list(
+                IngredientRecipe.objects.filter(
+                    recipe_id__in=recipe_ids
+                ).values_list("recipe_id", "ingredient_id")
+            )
+        added = defaultdict(list)
+        for recipe_id, ingredient_id in rows:
+            added[ingredient_id].append(recipe_id)
+        postings, sizes = self._snapshot
+        postings = dict(postings)
+        sizes = array("H", sizes)
+        for ingredient_id in set(postings) | set(added):
+            old = postings.get(ingredient_id, ())
+            removed = [
+                recipe_id
+                for recipe_id in recipe_ids
+                if contains(old, recipe_id)
+            ]
+            if not removed and ingredient_id not in added:
+                continue
+            posting = array("I", old)
+            for recipe_id in removed:
+                del posting[bisect_left(posting, recipe_id)]
+            for recipe_id in added.get(ingredient_id, ()):
+                insort(posting, recipe_id)
+            if posting:
+                postings[ingredient_id] = posting
+            else:
+                del postings[ingredient_id]
+        for recipe_id in recipe_ids:
+            if recipe_id < len(sizes):
+                sizes[recipe_id] = 0
+        for recipe_id, _ in rows:
+            ensure_size(sizes, recipe_id)
+            sizes[recipe_id] += 1
+        self._snapshot = (postings, sizes)
+        self._sequence = sequence
+
+    def refresh(self):
+        """
+        Приводит индекс к журналу изменений в кеше.
+        """
+        state = cache.get_many((GENERATION_KEY, SEQUENCE_KEY))
+        generation = state.get(GENERATION_KEY)
+        sequence = state.get(SEQUENCE_KEY, 0)
+        if not self.is_stale(generation, sequence) and (
+            sequence == self._sequence
+        ):
+            return
+        if not self._lock.acquire(blocking=self._snapshot is None):
+            return
+        try:
+            if self.is_stale(generation, sequence):
+                self.build(generation, sequence)
+                return
+            keys = [
+                CHANGE_KEY.format(number)
+                for number in range(self._sequence + 1, sequence + 1)
+            ]
+            changes = cache.get_many(keys)
+            if len(changes) < len(keys):
+                self.build(generation, sequence)
+            elif changes:
+                self.apply_changes(changes.values(), sequence)
+        finally:
+            self._lock.release()
+
+    def match(self, ingredient_ids, max_missing=None):
+        """
+        Рецепты, в которых есть хотя бы один из ингредиентов
+        ingredient_ids, по убыванию покрытия - доли ингредиентов
+        рецепта, которые уже есть. При равном покрытии выше рецепты
+        с большим числом совпадений, затем более новые.
+        max_missing ограничивает число недостающих ингредиентов.
+        """
+        self.refresh()
+        postings, sizes = self._snapshot
+        counts = Counter()
+        for ingredient_id in set(ingredient_ids):
+            counts.update(postings.get(ingredient_id, ()))
+        matches = [
+            Match(
+                recipe_id,
+                matched,
+                sizes[recipe_id] - matched,
+                matched / sizes[recipe_id],
+            )
+            for recipe_id, matched in counts.items()
+            if max_missing is None or sizes[recipe_id] - matched <= max_missing
+        ]
+        matches.sort(
+            key=lambda match: (match.coverage, match.matched, match.recipe_id),
+            reverse=True,
+        )
+        return matches
+
+    def get_stats(self):
+        postings, sizes = self._snapshot
+        return {
+            "recipes": len(sizes) - sizes.count(0),
+            "ingredients": len(postings),
+            "postings": sum(map(len, postings.values())),
+        }
+
+
+def write_changes(recipe_ids):
+    cache.add(SEQUENCE_KEY, 0, timeout=None)
+    for recipe_id in recipe_ids:
+        try:
+            sequence = cache.incr(SEQUENCE_KEY)
+        except ValueError:
+            rebuild_recipe_matcher()
+            return
+        cache.set(
+            CHANGE_KEY.format(sequence),
+            recipe_id,
+            timeout=settings.RECIPE_MATCHER_TTL,
+        )
+
+
+def publish_recipe_changes(recipe_ids):
+    """
+    После фиксации транзакции добавляет рецепты recipe_ids
+    в журнал изменений индекса подбора.
+    """
+    recipe_ids = list(recipe_ids)
+    transaction.on_commit(lambda: write_changes(recipe_ids))
+
+
+def rebuild_recipe_matcher():
+    """
+    Меняет поколение индекса: все процессы перестроят его целиком.
+    """
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+recipe_matcher = RecipeMatcher()
@@ -0,0 +1,67 @@
+# Generated by Django 3.2.3 on 2026-10-18 06:25
+
+from django.db import migrations, models
+from django.db.models import Min
+
+TRIGRAM_INDEXES = {
+    'ingredient_name_trgm_idx': 'name',
+    'ingredient_name_upper_trgm_idx': 'UPPER(name)',
+}
+
+
+def delete_duplicate_tags(apps, schema_editor):
+    TagRecipes = apps.get_model('recipes', 'TagRecipes')
+    keep_ids = (
+        TagRecipes.objects.values('recipe', 'tag')
+        .annotate(keep_id=Min('id'))
+        .values('keep_id')
+    )
+    TagRecipes.objects.exclude(id__in=list(keep_ids)).delete()
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, expression in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON recipes_ingredient '
+            f'USING gin ({expression} gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_pub_date_id_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='isfavorited',
+            index=models.Index(fields=['user', 'recipe'], name='favorite_user_recipe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='isinshoppingcart',
+            index=models.Index(fields=['user', 'recipe'], name='shopping_user_recipe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.RunPython(
+            delete_duplicate_tags, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='tagrecipes',
+            constraint=models.UniqueConstraint(fields=('recipe', 'tag'), name='unique_recipe_tag'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 3.2.3 on 2026-10-18 06:36
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ('IsFavorited', 'recipe', 'Recipe', 'favorites_count'),
+    ('IsInShoppingCart', 'recipe', 'Recipe', 'in_carts_count'),
+    ('Recipe', 'author', 'User', 'recipes_count'),
+    ('Subscription', 'author', 'User', 'followers_count'),
+)
+
+
+def fill_counters(apps, schema_editor):
+    for source_name, source_field, model_name, field in COUNTERS:
+        source = apps.get_model('recipes', source_name)
+        model = apps.get_model(
+            'users' if model_name == 'User' else 'recipes', model_name
+        )
+        counts = (
+            source.objects.filter(**{source_field: OuterRef('pk')})
+            .order_by()
+            .values(source_field)
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+        model.objects.update(
+            **{field: Coalesce(Subquery(counts), Value(0))}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_image_variants'),
+        ('users', '0002_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='В списках покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
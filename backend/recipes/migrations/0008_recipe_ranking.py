@@ -0,0 +1,58 @@
+# Generated by Django 3.2.3 on 2026-10-18 06:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def create_rankings(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeRanking = apps.get_model('recipes', 'RecipeRanking')
+    RecipeRanking.objects.bulk_create(
+        (
+            RecipeRanking(recipe_id=recipe_id)
+            for recipe_id in Recipe.objects.values_list('id', flat=True)
+        ),
+        batch_size=1000,
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeRanking',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='recipes.recipe')),
+                ('popular_score', models.FloatField(default=0)),
+                ('trending_score', models.FloatField(default=0)),
+                ('computed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Рейтинг рецепта',
+                'verbose_name_plural': 'Рейтинги рецептов',
+            },
+        ),
+        migrations.AddField(
+            model_name='isfavorited',
+            name='created',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='isinshoppingcart',
+            name='created',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='reciperanking',
+            index=models.Index(fields=['-popular_score', '-recipe'], name='ranking_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reciperanking',
+            index=models.Index(fields=['-trending_score', '-recipe'], name='ranking_trending_idx'),
+        ),
+        migrations.RunPython(create_rankings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,167 @@
+# Generated by Django 3.2.3 on 2026-10-18 07:23
+
+import re
+from collections import Counter, defaultdict
+
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Копия разбора текста из recipes.search на момент миграции:
+# миграция не должна зависеть от того, как код поиска изменится потом.
+WORD = re.compile(r'[^\W_]{2,}')
+ENDINGS = sorted(
+    (
+        'ами', 'ями', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ой', 'ей',
+        'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ом', 'ем', 'ам',
+        'ям', 'ах', 'ях', 'ов', 'ев', 'а', 'я', 'ы', 'и', 'у', 'ю', 'е',
+        'о', 'ь',
+    ),
+    key=len,
+    reverse=True,
+)
+MIN_STEM_LEN = 3
+TERM_MAX_LEN = 64
+FIELD_WEIGHTS = (('title', 4), ('ingredients', 2), ('body', 1))
+BATCH_SIZE = 1000
+
+
+def stem(word):
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_LEN:
+            return word[:-len(ending)]
+    return word
+
+
+def get_term_weights(document):
+    weights = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        text = getattr(document, field).casefold().replace('ё', 'е')
+        for word in WORD.findall(text):
+            weights[stem(word)[:TERM_MAX_LEN]] += weight
+    return weights
+
+
+def create_vector_index(apps, schema_editor):
+    # GIN-индекс есть только в PostgreSQL, на других базах
+    # поиск идет по таблице RecipeSearchTerm.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX recipe_search_vector_idx '
+            'ON recipes_recipesearch USING GIN (vector)'
+        )
+
+
+def drop_vector_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS recipe_search_vector_idx')
+
+
+def build_documents(apps, recipe_ids):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeSearch = apps.get_model('recipes', 'RecipeSearch')
+    documents = {}
+    ingredients = defaultdict(list)
+    for recipe_id, name, text, ingredient in (
+        Recipe.objects.filter(id__in=recipe_ids)
+        .order_by('id', 'rec_ingredients__id')
+        .values_list('id', 'name', 'text', 'rec_ingredients__ingredient__name')
+    ):
+        documents.setdefault(
+            recipe_id, RecipeSearch(recipe_id=recipe_id, title=name, body=text)
+        )
+        if ingredient is not None:
+            ingredients[recipe_id].append(ingredient)
+    for recipe_id, document in documents.items():
+        document.ingredients = ' '.join(ingredients[recipe_id])
+    return list(documents.values())
+
+
+def fill_search_index(apps, schema_editor):
+    # Без заполнения поиск не находил бы уже созданные рецепты
+    # до запуска update_search_index.
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeSearch = apps.get_model('recipes', 'RecipeSearch')
+    RecipeSearchTerm = apps.get_model('recipes', 'RecipeSearchTerm')
+    uses_vector = schema_editor.connection.vendor == 'postgresql'
+    last_id = 0
+    while True:
+        recipe_ids = list(
+            Recipe.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', flat=True)[:BATCH_SIZE]
+        )
+        if not recipe_ids:
+            return
+        last_id = recipe_ids[-1]
+        documents = build_documents(apps, recipe_ids)
+        RecipeSearch.objects.filter(recipe_id__in=recipe_ids).delete()
+        RecipeSearch.objects.bulk_create(documents)
+        if uses_vector:
+            RecipeSearch.objects.filter(recipe_id__in=recipe_ids).update(
+                vector=(
+                    SearchVector('title', weight='A', config='russian')
+                    + SearchVector('ingredients', weight='B', config='russian')
+                    + SearchVector('body', weight='C', config='russian')
+                )
+            )
+            continue
+        RecipeSearchTerm.objects.filter(recipe_id__in=recipe_ids).delete()
+        RecipeSearchTerm.objects.bulk_create(
+            (
+                RecipeSearchTerm(
+                    recipe_id=document.recipe_id, term=term, weight=weight
+                )
+                for document in documents
+                for term, weight in get_term_weights(document).items()
+            ),
+            batch_size=5000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_ranking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSearch',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search', serialize=False, to='recipes.recipe')),
+                ('title', models.TextField()),
+                ('ingredients', models.TextField(blank=True)),
+                ('body', models.TextField(blank=True)),
+                ('vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+            ],
+            options={
+                'verbose_name': 'Поисковый документ рецепта',
+                'verbose_name_plural': 'Поисковые документы рецептов',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField()),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='recipes.recipe')),
+            ],
+            options={
+                'verbose_name': 'Термин поискового индекса',
+                'verbose_name_plural': 'Термины поискового индекса',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipesearchterm',
+            index=models.Index(fields=['term'], name='search_term_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipesearchterm',
+            constraint=models.UniqueConstraint(fields=('recipe', 'term'), name='unique_search_recipe_term'),
+        ),
+        migrations.RunPython(create_vector_index, drop_vector_index),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
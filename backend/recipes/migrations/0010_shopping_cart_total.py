@@ -0,0 +1,59 @@
+# Generated by Django 3.2.3 on 2026-10-18 07:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Sum
+
+BATCH_SIZE = 1000
+
+
+def fill_cart_totals(apps, schema_editor):
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    ShoppingCartTotal = apps.get_model('recipes', 'ShoppingCartTotal')
+    totals = (
+        IngredientRecipe.objects.filter(recipe__isinshoppingcart__isnull=False)
+        .values('recipe__isinshoppingcart__user', 'ingredient')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+    ShoppingCartTotal.objects.bulk_create(
+        (
+            ShoppingCartTotal(
+                user_id=row['recipe__isinshoppingcart__user'],
+                ingredient_id=row['ingredient'],
+                amount=row['total'],
+            )
+            for row in totals.iterator()
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0009_recipe_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingCartTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.PositiveBigIntegerField(default=0)),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_totals', to='recipes.ingredient')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_totals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Итог списка покупок',
+                'verbose_name_plural': 'Итоги списков покупок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingcarttotal',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_cart_total_user_ingredient'),
+        ),
+        migrations.RunPython(fill_cart_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.3 on 2026-10-18 08:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_shopping_cart_total'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='ranking_stale',
+            field=models.BooleanField(default=True, verbose_name='Рейтинг устарел'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('ranking_stale', True)), fields=['id'], name='recipe_ranking_stale_idx'),
+        ),
+    ]
@@ -1,10 +1,14 @@
 from colorfield.fields import ColorField
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models import Prefetch
+from django.utils import timezone
 
-from .const import COLOR_MAX_LEN, COMMON_MAX_LEN, TEXT_MAX_LEN
+from .const import (COLOR_MAX_LEN, COMMON_MAX_LEN, SEARCH_TERM_MAX_LEN,
+                    TEXT_MAX_LEN)
 
 User = get_user_model()
 
@@ -84,12 +88,28 @@ class Subscription(models.Model):
             raise ValidationError("Нельзя подписаться на самого себя")
 
 
+class RecipeQuerySet(models.QuerySet):
+    def with_related(self):
+        """
+        Подгружает связанные с рецептом объекты:
+        автора, теги и ингредиенты.
+        """
+        return self.select_related("author").prefetch_related(
+            "tags",
+            Prefetch(
+                "rec_ingredients",
+                queryset=IngredientRecipe.objects.select_related("ingredient"),
+            ),
+        )
+
+
 class Recipe(models.Model):
     name = models.CharField(max_length=COMMON_MAX_LEN)
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="recipes"
     )
     image = models.ImageField(upload_to="recipes_image/")
+    image_variants = models.JSONField(default=dict, blank=True)
     text = models.CharField(max_length=TEXT_MAX_LEN)
     ingredients = models.ManyToManyField(
         Ingredient, through="IngredientRecipe"
@@ -97,11 +117,36 @@ class Recipe(models.Model):
     tags = models.ManyToManyField(Tag, through="TagRecipes", null=False)
     cooking_time = models.IntegerField(validators=[MinValueValidator(1)])
     pub_date = models.DateTimeField(auto_now_add=True)
+    favorites_count = models.PositiveIntegerField(
+        default=0, verbose_name="В избранном"
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0, verbose_name="В списках покупок"
+    )
+    ranking_stale = models.BooleanField(
+        default=True, verbose_name="Рейтинг устарел"
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
-        ordering = ("-pub_date",)
+        ordering = ("-pub_date", "-id")
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="recipe_pub_date_id_idx"
+            ),
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="recipe_author_pub_date_idx",
+            ),
+            models.Index(
+                fields=["id"],
+                condition=models.Q(ranking_stale=True),
+                name="recipe_ranking_stale_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -109,6 +154,7 @@ class Recipe(models.Model):
 
 class AbstractRecipe(models.Model):
     recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE)
+    created = models.DateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
         abstract = True
@@ -127,6 +173,11 @@ class IsFavorited(AbstractRecipe):
                 fields=("recipe", "user"), name="unique_recipe_user_favorite"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=("user", "recipe"), name="favorite_user_recipe_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Рецепт {self.recipe} нравится {self.user}"
@@ -147,11 +198,42 @@ class IsInShoppingCart(AbstractRecipe):
                 name="unique_recipe_user_in_shopping",
             )
         ]
+        indexes = [
+            models.Index(
+                fields=("user", "recipe"), name="shopping_user_recipe_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.recipe} в списке покупок у пользователя {self.user}"
 
 
+class ShoppingCartTotal(models.Model):
+    """
+    Суммарное количество ингредиента по всем рецептам в списке покупок
+    пользователя. Меняется при добавлении и удалении рецепта из списка
+    и при изменении ингредиентов рецепта, сверяется командой recount.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="cart_totals"
+    )
+    ingredient = models.ForeignKey(
+        Ingredient, on_delete=models.CASCADE, related_name="cart_totals"
+    )
+    amount = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Итог списка покупок"
+        verbose_name_plural = "Итоги списков покупок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=("user", "ingredient"),
+                name="unique_cart_total_user_ingredient",
+            )
+        ]
+
+
 class IngredientRecipe(models.Model):
     ingredient = models.ForeignKey(
         Ingredient, on_delete=models.CASCADE, related_name="ingr_recipes"
@@ -178,3 +260,88 @@ class TagRecipes(models.Model):
         Recipe, on_delete=models.CASCADE, related_name="tag_recipes"
     )
     tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("recipe", "tag"), name="unique_recipe_tag"
+            )
+        ]
+
+
+class RecipeRanking(models.Model):
+    """
+    Рейтинги рецепта для лент ordering=popular и ordering=trending.
+    Пересчитывается командой update_rankings.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="ranking",
+    )
+    popular_score = models.FloatField(default=0)
+    trending_score = models.FloatField(default=0)
+    computed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Рейтинг рецепта"
+        verbose_name_plural = "Рейтинги рецептов"
+        indexes = [
+            models.Index(
+                fields=["-popular_score", "-recipe"],
+                name="ranking_popular_idx",
+            ),
+            models.Index(
+                fields=["-trending_score", "-recipe"],
+                name="ranking_trending_idx",
+            ),
+        ]
+
+
+class RecipeSearch(models.Model):
+    """
+    Поисковый документ рецепта: название, названия ингредиентов
+    и описание. На PostgreSQL по ним строится vector с GIN-индексом,
+    на других базах - обратный индекс RecipeSearchTerm.
+    Обновляется при сохранении рецепта и командой update_search_index.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search",
+    )
+    title = models.TextField()
+    ingredients = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    vector = SearchVectorField(null=True)
+
+    class Meta:
+        verbose_name = "Поисковый документ рецепта"
+        verbose_name_plural = "Поисковые документы рецептов"
+
+
+class RecipeSearchTerm(models.Model):
+    """
+    Обратный индекс для баз без полнотекстового поиска:
+    основа слова и ее вес в рецепте.
+    """
+
+    term = models.CharField(max_length=SEARCH_TERM_MAX_LEN)
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE, related_name="search_terms"
+    )
+    weight = models.PositiveIntegerField()
+
+    class Meta:
+        verbose_name = "Термин поискового индекса"
+        verbose_name_plural = "Термины поискового индекса"
+        constraints = [
+            models.UniqueConstraint(
+                fields=("recipe", "term"), name="unique_search_recipe_term"
+            )
+        ]
+        indexes = [models.Index(fields=["term"], name="search_term_idx")]
@@ -0,0 +1,173 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .models import IsFavorited, IsInShoppingCart, Recipe, RecipeRanking
+
+FAVORITE_WEIGHT = 2
+CART_WEIGHT = 1
+
+EVENT_WEIGHTS = (
+    (IsFavorited, FAVORITE_WEIGHT),
+    (IsInShoppingCart, CART_WEIGHT),
+)
+
+# Точка отсчета прямого затухания. Менять ее и период полураспада
+# можно только вместе с полным пересчетом: update_rankings --full.
+DECAY_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+# Запас по времени для событий, зафиксированных позже своего created.
+WATERMARK_MARGIN = timedelta(minutes=5)
+
+RANKING_ORDERINGS = {
+    "popular": ("-popular_score", "-id"),
+    "trending": ("-trending_score", "-id"),
+}
+
+
+def get_decay_rate():
+    return math.log(2) / (settings.RANKING_HALF_LIFE_HOURS * 3600)
+
+
+def get_trending_score(events, decay_rate):
+    """
+    Прямое затухание: событие с весом w в момент t дает
+    w * exp(decay_rate * (t - DECAY_EPOCH)). Множитель одинаково растет
+    для всех рецептов, поэтому сохраненные оценки сравнимы между собой
+    без пересчета. Сумма хранится в логарифме, чтобы не переполниться.
+    """
+    if not events:
+        return 0.0
+    exponents = [
+        (
+            math.log(weight)
+            + decay_rate * (created - DECAY_EPOCH).total_seconds()
+        )
+        for created, weight in events
+    ]
+    peak = max(exponents)
+    return peak + math.log(
+        sum(math.exp(exponent - peak) for exponent in exponents)
+    )
+
+
+def create_missing_rankings(batch_size, full):
+    """
+    Создает рейтинги рецептов без них. Новые рецепты создаются
+    с ranking_stale, поэтому без full проверяются только такие.
+    """
+    recipes = Recipe.objects.filter(ranking__isnull=True)
+    if not full:
+        recipes = recipes.filter(ranking_stale=True)
+    missing_ids = recipes.values_list("id", flat=True)
+    RecipeRanking.objects.bulk_create(
+        (RecipeRanking(recipe_id=recipe_id) for recipe_id in missing_ids),
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+
+
+def get_changed_recipe_ids(since):
+    """
+    Рецепты, у которых после since появились новые события
+    или изменились счетчики избранного и списков покупок
+    (их помечает ranking_stale). Оба запроса идут по индексам
+    и не зависят от общего числа рецептов.
+    """
+    changed_ids = set(
+        Recipe.objects.filter(ranking_stale=True).values_list(
+            "id", flat=True
+        )
+    )
+    if since is not None:
+        for model, _ in EVENT_WEIGHTS:
+            changed_ids.update(
+                model.objects.filter(created__gte=since)
+                .values_list("recipe_id", flat=True)
+                .distinct()
+            )
+    return changed_ids
+
+
+def update_batch(recipe_ids, computed_at, decay_rate):
+    """
+    Отметка ranking_stale снимается до чтения счетчиков и событий:
+    изменение после этого снова поставит ее и не потеряется.
+    """
+    Recipe.objects.filter(id__in=recipe_ids, ranking_stale=True).update(
+        ranking_stale=False
+    )
+    events = defaultdict(list)
+    for model, weight in EVENT_WEIGHTS:
+        for recipe_id, created in model.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list("recipe_id", "created"):
+            events[recipe_id].append((created, weight))
+    rankings = [
+        RecipeRanking(
+            recipe_id=recipe_id,
+            popular_score=(
+                favorites_count * FAVORITE_WEIGHT
+                + in_carts_count * CART_WEIGHT
+            ),
+            trending_score=get_trending_score(events[recipe_id], decay_rate),
+            computed_at=computed_at,
+        )
+        for recipe_id, favorites_count, in_carts_count in (
+            Recipe.objects.filter(id__in=recipe_ids).values_list(
+                "id", "favorites_count", "in_carts_count"
+            )
+        )
+    ]
+    RecipeRanking.objects.bulk_update(
+        rankings, ("popular_score", "trending_score", "computed_at")
+    )
+    return len(rankings)
+
+
+def update_rankings(full=False, batch_size=1000):
+    """
+    Пересчитывает рейтинги. По умолчанию обрабатываются только рецепты,
+    затронутые после прошлого запуска, с полным набором их событий,
+    поэтому удаление из избранного тоже учитывается.
+    Возвращает число пересчитанных рецептов.
+    """
+    computed_at = timezone.now()
+    create_missing_rankings(batch_size, full)
+    if full:
+        recipe_ids = set(
+            RecipeRanking.objects.values_list("recipe_id", flat=True)
+        )
+    else:
+        watermark = RecipeRanking.objects.aggregate(
+            watermark=Max("computed_at")
+        )["watermark"]
+        recipe_ids = get_changed_recipe_ids(
+            watermark - WATERMARK_MARGIN if watermark else None
+        )
+    recipe_ids = sorted(recipe_ids)
+    decay_rate = get_decay_rate()
+    updated = 0
+    for start in range(0, len(recipe_ids), batch_size):
+        updated += update_batch(
+            recipe_ids[start:start + batch_size], computed_at, decay_rate
+        )
+    return updated
+
+
+def order_by_ranking(queryset, ordering):
+    """
+    Сортирует рецепты по готовому рейтингу без агрегации в запросе.
+    Оценка добавляется как аннотация, чтобы курсорная пагинация
+    могла взять ее значение у последнего рецепта страницы.
+    """
+    score = RANKING_ORDERINGS[ordering][0].lstrip("-")
+    return (
+        queryset.filter(ranking__isnull=False)
+        .annotate(**{score: F(f"ranking__{score}")})
+        .order_by(*RANKING_ORDERINGS[ordering])
+    )
@@ -0,0 +1,228 @@
+import re
+from collections import Counter, defaultdict
+from functools import reduce
+from operator import or_
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connections, router, transaction
+from django.db.models import Exists, F, OuterRef, Q, Subquery, Sum
+
+from tasks.registry import task
+
+from .const import SEARCH_TERM_MAX_LEN
+from .models import IngredientRecipe, Recipe, RecipeSearch, RecipeSearchTerm
+
+SEARCH_CONFIG = "russian"
+
+# Веса полей в обратном индексе, как веса A, B и C в PostgreSQL.
+FIELD_WEIGHTS = (("title", 4), ("ingredients", 2), ("body", 1))
+
+SEARCH_ORDERING = ("-search_rank", "-id")
+
+TERMS_BATCH_SIZE = 5000
+
+WORD = re.compile(r"[^\W_]{2,}")
+
+# Окончания, которые отбрасываются у слов: "картошки" и "картошка"
+# дают одну основу. Грубее стеммера PostgreSQL, но без зависимостей.
+ENDINGS = sorted(
+    (
+        "ами", "ями", "ого", "его", "ому", "ему", "ыми", "ими", "ой", "ей",
+        "ий", "ый", "ая", "яя", "ое", "ее", "ые", "ие", "ом", "ем", "ам",
+        "ям", "ах", "ях", "ов", "ев", "а", "я", "ы", "и", "у", "ю", "е",
+        "о", "ь",
+    ),
+    key=len,
+    reverse=True,
+)
+MIN_STEM_LEN = 3
+
+
+def stem(word):
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_LEN:
+            return word[:-len(ending)]
+    return word
+
+
+def get_words(text):
+    return WORD.findall(text.casefold().replace("ё", "е"))
+
+
+def get_terms(text):
+    """
+    Основы слов текста в порядке появления, без повторов.
+    """
+    return list(
+        dict.fromkeys(
+            stem(word)[:SEARCH_TERM_MAX_LEN] for word in get_words(text)
+        )
+    )
+
+
+def get_term_weights(document):
+    weights = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        for word in get_words(getattr(document, field)):
+            weights[stem(word)[:SEARCH_TERM_MAX_LEN]] += weight
+    return weights
+
+
+def uses_search_vector(alias):
+    return connections[alias].vendor == "postgresql"
+
+
+def get_search_vector():
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("ingredients", weight="B", config=SEARCH_CONFIG)
+        + SearchVector("body", weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def build_documents(recipe_ids):
+    """
+    Документы рецептов одним запросом: строка на каждый ингредиент.
+    """
+    documents = {}
+    ingredients = defaultdict(list)
+    for recipe_id, name, text, ingredient in (
+        Recipe.objects.filter(id__in=recipe_ids)
+        .order_by("id", "rec_ingredients__id")
+        .values_list(
+            "id", "name", "text", "rec_ingredients__ingredient__name"
+        )
+    ):
+        documents.setdefault(
+            recipe_id, RecipeSearch(recipe_id=recipe_id, title=name, body=text)
+        )
+        if ingredient is not None:
+            ingredients[recipe_id].append(ingredient)
+    for recipe_id, document in documents.items():
+        document.ingredients = " ".join(ingredients[recipe_id])
+    return list(documents.values())
+
+
+def index_batch(recipe_ids):
+    """
+    Перестраивает поисковые документы рецептов recipe_ids.
+    На PostgreSQL вектор документа считается в базе,
+    на других базах пересоздаются строки обратного индекса.
+    """
+    documents = build_documents(recipe_ids)
+    alias = router.db_for_write(RecipeSearch)
+    with transaction.atomic(using=alias, savepoint=False):
+        RecipeSearch.objects.filter(recipe_id__in=recipe_ids).delete()
+        RecipeSearch.objects.bulk_create(documents)
+        if uses_search_vector(alias):
+            RecipeSearch.objects.filter(recipe_id__in=recipe_ids).update(
+                vector=get_search_vector()
+            )
+            return len(documents)
+        RecipeSearchTerm.objects.filter(recipe_id__in=recipe_ids).delete()
+        RecipeSearchTerm.objects.bulk_create(
+            (
+                RecipeSearchTerm(
+                    recipe_id=document.recipe_id, term=term, weight=weight
+                )
+                for document in documents
+                for term, weight in get_term_weights(document).items()
+            ),
+            batch_size=TERMS_BATCH_SIZE,
+        )
+    return len(documents)
+
+
+def update_search_index(recipe_ids=None, batch_size=1000):
+    """
+    Обновляет поиск по рецептам recipe_ids или, если они не заданы,
+    по всем рецептам пачками по batch_size.
+    Возвращает число проиндексированных рецептов.
+    """
+    if recipe_ids is not None:
+        return index_batch(list(recipe_ids))
+    indexed = 0
+    last_id = 0
+    while True:
+        batch = list(
+            Recipe.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not batch:
+            return indexed
+        last_id = batch[-1]
+        indexed += index_batch(batch)
+
+
+@task(max_attempts=3)
+def reindex_ingredient_recipes(ingredient_id):
+    """
+    Обновляет поиск по рецептам с переименованным ингредиентом.
+    """
+    return update_search_index(
+        IngredientRecipe.objects.filter(ingredient_id=ingredient_id)
+        .values_list("recipe_id", flat=True)
+        .distinct()
+    )
+
+
+def get_prefix_query(text):
+    """
+    Запрос tsquery: все слова обязательны, последнее может быть
+    началом слова. Слова состоят только из букв и цифр,
+    поэтому синтаксис tsquery в них не встречается.
+    """
+    words = get_words(text)
+    if not words:
+        return None
+    words[-1] += ":*"
+    return SearchQuery(
+        " & ".join(words), config=SEARCH_CONFIG, search_type="raw"
+    )
+
+
+def get_term_match(term, prefix):
+    if prefix:
+        return Q(term__gte=term, term__lt=term + "\uffff")
+    return Q(term=term)
+
+
+def search_recipes(queryset, text):
+    """
+    Оставляет рецепты, где есть все слова text, и добавляет
+    релевантность search_rank для сортировки SEARCH_ORDERING.
+    Последнее слово ищется по началу, как при вводе запроса.
+    """
+    if uses_search_vector(queryset.db):
+        query = get_prefix_query(text)
+        if query is None:
+            return queryset.none()
+        return queryset.filter(search__vector=query).annotate(
+            search_rank=SearchRank(F("search__vector"), query)
+        ).order_by(*SEARCH_ORDERING)
+    terms = get_terms(text)
+    if not terms:
+        return queryset.none()
+    matches = [
+        get_term_match(term, prefix=position == len(terms) - 1)
+        for position, term in enumerate(terms)
+    ]
+    for match in matches:
+        queryset = queryset.filter(
+            Exists(
+                RecipeSearchTerm.objects.filter(match, recipe=OuterRef("pk"))
+            )
+        )
+    rank = (
+        RecipeSearchTerm.objects.filter(
+            reduce(or_, matches), recipe=OuterRef("pk")
+        )
+        .values("recipe")
+        .annotate(total=Sum("weight"))
+        .values("total")
+    )
+    return queryset.annotate(search_rank=Subquery(rank)).order_by(
+        *SEARCH_ORDERING
+    )
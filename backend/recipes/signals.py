@@ -0,0 +1,74 @@
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from .cart import add_recipe_to_cart, remove_recipe_from_cart
+from .counters import COUNTERS, change_counter
+from .matching import publish_recipe_changes
+from .models import Ingredient, IsInShoppingCart, Recipe, RecipeRanking
+from .search import reindex_ingredient_recipes
+
+
+def connect_counter(source, source_field, model, field):
+    """
+    Подключает обновление счетчика field модели model
+    к созданию и удалению записей source.
+    """
+
+    def increment(instance, created, raw=False, **kwargs):
+        if created and not raw:
+            change_counter(model, getattr(instance, source_field), field, 1)
+
+    def decrement(instance, **kwargs):
+        change_counter(model, getattr(instance, source_field), field, -1)
+
+    post_save.connect(increment, sender=source, weak=False)
+    post_delete.connect(decrement, sender=source, weak=False)
+
+
+for counter in COUNTERS:
+    connect_counter(*counter)
+
+
+@receiver(post_save, sender=Recipe)
+def create_ranking(instance, created, raw=False, **kwargs):
+    if created and not raw:
+        RecipeRanking.objects.create(recipe=instance)
+
+
+@receiver(pre_save, sender=Ingredient)
+def check_ingredient_rename(instance, raw=False, update_fields=None, **kwargs):
+    # Поиск зависит только от названия: смена единицы измерения
+    # или сохранение без изменений не ставят задачу переиндексации.
+    instance._renamed = (
+        not raw
+        and instance.pk is not None
+        and (update_fields is None or "name" in update_fields)
+        and Ingredient.objects.filter(pk=instance.pk)
+        .exclude(name=instance.name)
+        .exists()
+    )
+
+
+@receiver(post_save, sender=Ingredient)
+def reindex_ingredient(instance, created, raw=False, **kwargs):
+    if not created and instance._renamed:
+        reindex_ingredient_recipes.delay(instance.id)
+
+
+@receiver(post_delete, sender=Recipe)
+def unindex_recipe(instance, **kwargs):
+    publish_recipe_changes([instance.id])
+
+
+@receiver(post_save, sender=IsInShoppingCart)
+def add_to_cart_totals(instance, created, raw=False, **kwargs):
+    if created and not raw:
+        add_recipe_to_cart(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_delete, sender=IsInShoppingCart)
+def remove_from_cart_totals(instance, **kwargs):
+    # pre_delete: при удалении рецепта ингредиенты удаляются каскадом
+    # вместе со списками покупок, а до удаления они еще на месте.
+    remove_recipe_from_cart(instance.user_id, instance.recipe_id)
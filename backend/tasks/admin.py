@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "name",
+        "status",
+        "attempts",
+        "max_attempts",
+        "run_after",
+        "user",
+    )
+
+    list_filter = ("status", "name")
+
+    readonly_fields = ("created", "updated")
@@ -0,0 +1,93 @@
+import logging
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks.worker import claim_task, execute_task, run_task
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Run background task workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=settings.TASKS_WORKER_PROCESSES,
+            help="Число процессов пула; 0 - выполнять в текущем процессе",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.TASKS_POLL_INTERVAL,
+            help="Пауза в секундах, когда очередь пуста",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Завершиться, когда очередь опустеет",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        processes = options["processes"]
+        if processes:
+            done = self.run_pool(
+                processes, options["poll_interval"], options["burst"]
+            )
+        else:
+            done = self.run_inline(options["poll_interval"], options["burst"])
+        self.stdout.write(self.style.SUCCESS(f"Processed {done} tasks"))
+
+    def run_inline(self, poll_interval, burst):
+        done = 0
+        while True:
+            task = claim_task()
+            if task is not None:
+                execute_task(task)
+                done += 1
+            elif burst:
+                return done
+            else:
+                time.sleep(poll_interval)
+
+    def run_pool(self, processes, poll_interval, burst):
+        """
+        Главный процесс захватывает задачи, а процессы пула их выполняют.
+        Процессы запускаются методом spawn, чтобы не наследовать
+        открытые соединения с базой данных.
+        """
+        done = 0
+        running = set()
+        with ProcessPoolExecutor(
+            processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as pool:
+            while True:
+                while len(running) < processes:
+                    task = claim_task()
+                    if task is None:
+                        break
+                    running.add(pool.submit(run_task, task.id))
+                if not running:
+                    if burst:
+                        return done
+                    time.sleep(poll_interval)
+                    continue
+                finished, running = wait(
+                    running, timeout=poll_interval, return_when=FIRST_COMPLETED
+                )
+                for future in finished:
+                    done += 1
+                    if future.exception() is not None:
+                        logger.error(
+                            "Процесс обработчика завершился с ошибкой",
+                            exc_info=future.exception(),
+                        )
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (QUEUED, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Выполнена"),
+        (FAILED, "Ошибка"),
+    )
+
+    name = models.CharField(max_length=255, verbose_name="Задача")
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+        verbose_name="Статус",
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name="Попытки"
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=1, verbose_name="Максимум попыток"
+    )
+    run_after = models.DateTimeField(
+        default=timezone.now, verbose_name="Запустить после"
+    )
+    locked_until = models.DateTimeField(
+        null=True, blank=True, verbose_name="Заблокирована до"
+    )
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="tasks",
+    )
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Задача"
+        verbose_name_plural = "Задачи"
+        ordering = ("id",)
+        indexes = [
+            models.Index(
+                fields=["status", "run_after"],
+                name="task_status_run_after_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.name} #{self.id}"
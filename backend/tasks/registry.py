@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+_registry = {}
+
+
+class TaskFunction:
+    """
+    Функция, которую можно поставить в очередь методом delay.
+    Аргументы задачи сохраняются в JSON, поэтому должны
+    сериализоваться в JSON.
+    """
+
+    def __init__(self, func, name, max_attempts, retry_delay):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return enqueue(self, args, kwargs)
+
+
+def task(name=None, max_attempts=3, retry_delay=None):
+    """
+    Регистрирует функцию как фоновую задачу.
+    Имя по умолчанию - путь для импорта функции, по нему обработчик
+    находит задачу, даже если модуль с ней еще не импортирован.
+    """
+
+    def decorator(func):
+        task_function = TaskFunction(
+            func,
+            name or f"{func.__module__}.{func.__qualname__}",
+            max_attempts,
+            retry_delay,
+        )
+        _registry[task_function.name] = task_function
+        return task_function
+
+    return decorator
+
+
+def get_task(name):
+    if name not in _registry:
+        try:
+            import_string(name)
+        except ImportError:
+            pass
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f"Задача {name} не зарегистрирована")
+
+
+def enqueue(task_function, args=(), kwargs=None, user=None):
+    """
+    Ставит задачу в очередь. Запись создается в текущей транзакции,
+    поэтому обработчики увидят задачу только после ее фиксации.
+    При TASKS_EAGER задача выполняется в этом же процессе
+    сразу после фиксации транзакции.
+    """
+    queued_task = Task.objects.create(
+        name=task_function.name,
+        args=list(args),
+        kwargs=kwargs or {},
+        max_attempts=task_function.max_attempts,
+        user=user,
+    )
+    if settings.TASKS_EAGER:
+        from .worker import run_eager
+
+        transaction.on_commit(lambda: run_eager(queued_task.id))
+    return queued_task
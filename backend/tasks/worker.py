@@ -0,0 +1,129 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+from .registry import get_task
+
+logger = logging.getLogger(__name__)
+
+CLAIM_BATCH = 10
+
+
+def lock_task(task_id, status, locked_until, now):
+    """
+    Захватывает задачу, если с момента чтения ее никто не изменил.
+    Условие на status и locked_until делает захват атомарным
+    без блокировок строк, поэтому он работает и на SQLite.
+    """
+    claimed = Task.objects.filter(
+        id=task_id, status=status, locked_until=locked_until
+    ).update(
+        status=Task.RUNNING,
+        locked_until=now + timedelta(
+            seconds=settings.TASKS_VISIBILITY_TIMEOUT
+        ),
+        attempts=F("attempts") + 1,
+    )
+    if claimed:
+        return Task.objects.get(id=task_id)
+
+
+def claim_task():
+    """
+    Возвращает следующую готовую к запуску задачу.
+    Задачи в статусе running с истекшим locked_until считаются
+    потерянными (обработчик упал) и выдаются повторно.
+    """
+    now = timezone.now()
+    candidates = (
+        Task.objects.filter(
+            Q(status=Task.QUEUED, run_after__lte=now)
+            | Q(status=Task.RUNNING, locked_until__lt=now)
+        )
+        .order_by("run_after", "id")
+        .values_list("id", "status", "locked_until")[:CLAIM_BATCH]
+    )
+    for task_id, status, locked_until in candidates:
+        claimed = lock_task(task_id, status, locked_until, now)
+        if claimed is not None:
+            return claimed
+
+
+def finish_task(task, **fields):
+    """
+    Сохраняет итог задачи, только пока она еще заблокирована этим
+    обработчиком: после истечения locked_until задачу мог забрать другой.
+    """
+    return Task.objects.filter(
+        id=task.id, status=Task.RUNNING, locked_until=task.locked_until
+    ).update(locked_until=None, updated=timezone.now(), **fields)
+
+
+def execute_task(task):
+    if task.attempts > task.max_attempts:
+        finish_task(
+            task,
+            status=Task.FAILED,
+            error="Превышено время выполнения задачи",
+        )
+        return
+    try:
+        task_function = get_task(task.name)
+    except LookupError as error:
+        finish_task(task, status=Task.FAILED, error=str(error))
+        return
+    try:
+        result = task_function(*task.args, **task.kwargs)
+    except Exception:
+        logger.exception("Задача %s завершилась с ошибкой", task)
+        error = traceback.format_exc()
+        if task.attempts >= task.max_attempts:
+            finish_task(task, status=Task.FAILED, error=error)
+            return
+        retry_delay = task_function.retry_delay
+        if retry_delay is None:
+            retry_delay = settings.TASKS_RETRY_DELAY
+        finish_task(
+            task,
+            status=Task.QUEUED,
+            error=error,
+            run_after=timezone.now() + timedelta(
+                seconds=retry_delay * 2 ** (task.attempts - 1)
+            ),
+        )
+    else:
+        finish_task(task, status=Task.DONE, result=result, error="")
+
+
+def run_task(task_id):
+    """
+    Точка входа для процессов пула: выполняет уже захваченную задачу.
+    """
+    try:
+        execute_task(Task.objects.get(id=task_id))
+    finally:
+        close_old_connections()
+
+
+def run_eager(task_id):
+    """
+    Выполняет задачу в текущем процессе, повторяя ее без задержки,
+    пока не закончатся попытки. Если задачу раньше захватил
+    обработчик очереди, она остается ему.
+    """
+    while True:
+        task = Task.objects.get(id=task_id)
+        if task.status != Task.QUEUED:
+            return task
+        claimed = lock_task(
+            task.id, task.status, task.locked_until, timezone.now()
+        )
+        if claimed is None:
+            return Task.objects.get(id=task_id)
+        execute_task(claimed)
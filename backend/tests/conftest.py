@@ -1,9 +1,15 @@
 import pytest
+from django.core.cache import cache
 from django.test import Client
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
-from recipes.models import Ingredient, Tag
+from api.ingredient_index import ingredient_index
+from recipes.counters import recount
+from recipes.matching import recipe_matcher
+from recipes.models import (Ingredient, IngredientRecipe, IsFavorited,
+                            IsInShoppingCart, Recipe, Subscription, Tag,
+                            TagRecipes)
 
 new_user = {
     "email": "new_user@yandex.ru",
@@ -32,6 +38,31 @@ data_for_login = {
 }
 
 
+@pytest.fixture(autouse=True)
+def reset_caches():
+    cache.clear()
+    ingredient_index.invalidate()
+    recipe_matcher.invalidate()
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    """
+    Кеш, общий для процессов, как Redis или Memcached в продакшене.
+    """
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path / "cache"),
+        }
+    }
+
+
+@pytest.fixture(autouse=True)
+def eager_tasks(settings):
+    settings.TASKS_EAGER = True
+
+
 @pytest.fixture
 def auth_user(django_user_model):
     user = django_user_model.objects.create_user(
@@ -94,3 +125,62 @@ def tag():
 @pytest.fixture
 def tag_id(tag):
     return tag.id
+
+
+def create_recipes(author, count, tags=(), ingredients=()):
+    Recipe.objects.bulk_create(
+        Recipe(
+            name=f"Рецепт {number}",
+            author=author,
+            image="recipes_image/image.png",
+            text="Описание рецепта",
+            cooking_time=10,
+        )
+        for number in range(count)
+    )
+    recipes = list(Recipe.objects.filter(author=author))
+    TagRecipes.objects.bulk_create(
+        TagRecipes(recipe=recipe, tag=tag)
+        for recipe in recipes
+        for tag in tags
+    )
+    IngredientRecipe.objects.bulk_create(
+        IngredientRecipe(recipe=recipe, ingredient=ingredient, amount=1)
+        for recipe in recipes
+        for ingredient in ingredients
+    )
+    recount()
+    return recipes
+
+
+@pytest.fixture
+def author(django_user_model):
+    return django_user_model.objects.create_user(
+        username="Author", email="author@mail.ru", password="kolokol_1234"
+    )
+
+
+@pytest.fixture
+def recipes(author, auth_user, tag, ingredient):
+    second_tag = Tag.objects.create(
+        name="Второй тег", color="#bbbbbb", slug="second"
+    )
+    second_ingredient = Ingredient.objects.create(
+        name="Второй ингредиент", measurement_unit="г"
+    )
+    recipes = create_recipes(
+        author,
+        count=10,
+        tags=(tag, second_tag),
+        ingredients=(ingredient, second_ingredient),
+    )
+    IsFavorited.objects.bulk_create(
+        IsFavorited(user=auth_user, recipe=recipe) for recipe in recipes[::2]
+    )
+    IsInShoppingCart.objects.bulk_create(
+        IsInShoppingCart(user=auth_user, recipe=recipe)
+        for recipe in recipes[::3]
+    )
+    Subscription.objects.create(user=auth_user, author=author)
+    recount()
+    return recipes
@@ -0,0 +1,166 @@
+"""
+Наполнение базы данными реалистичного объема для тестов
+производительности и бенчмарков. Все объекты создаются через
+bulk_create, счетчики, рейтинги и поиск пересчитываются в конце.
+"""
+import random
+from dataclasses import dataclass, field
+
+from django.contrib.auth.hashers import make_password
+
+from recipes.counters import recount
+from recipes.models import (Ingredient, IngredientRecipe, IsFavorited,
+                            IsInShoppingCart, Recipe, Subscription, Tag,
+                            TagRecipes, User)
+from recipes.ranking import update_rankings
+from recipes.search import update_search_index
+
+PASSWORD = "kolokol_1234"
+BATCH_SIZE = 5000
+
+
+@dataclass
+class Dataset:
+    users: list = field(default_factory=list)
+    tags: list = field(default_factory=list)
+    ingredients: list = field(default_factory=list)
+    recipes: list = field(default_factory=list)
+
+
+def make_users(count, prefix="user"):
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        (
+            User(
+                username=f"{prefix}{number}",
+                email=f"{prefix}{number}@mail.ru",
+                first_name="Имя",
+                last_name="Фамилия",
+                password=password,
+            )
+            for number in range(count)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return list(
+        User.objects.filter(username__startswith=prefix).values_list(
+            "id", flat=True
+        )
+    )
+
+
+def make_tags(count):
+    Tag.objects.bulk_create(
+        Tag(name=f"Тег {number}", color=f"#00{number:04}", slug=f"t{number}")
+        for number in range(count)
+    )
+    return list(Tag.objects.values_list("id", flat=True))
+
+
+def make_ingredients(count):
+    Ingredient.objects.bulk_create(
+        (
+            Ingredient(
+                name=f"Ингредиент {number}",
+                measurement_unit=random.choice(("г", "мл", "шт")),
+            )
+            for number in range(count)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return list(Ingredient.objects.values_list("id", flat=True))
+
+
+def make_recipes(
+    authors, count, tags, ingredients, tags_per_recipe=2,
+    ingredients_per_recipe=8,
+):
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                name=f"Рецепт {number}",
+                author_id=random.choice(authors),
+                image="recipes_image/image.png",
+                text="Описание рецепта",
+                cooking_time=random.randint(5, 120),
+            )
+            for number in range(count)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    recipes = list(Recipe.objects.values_list("id", flat=True))
+    TagRecipes.objects.bulk_create(
+        (
+            TagRecipes(recipe_id=recipe, tag_id=tag)
+            for recipe in recipes
+            for tag in random.sample(tags, tags_per_recipe)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    IngredientRecipe.objects.bulk_create(
+        (
+            IngredientRecipe(
+                recipe_id=recipe,
+                ingredient_id=ingredient,
+                amount=random.randint(1, 500),
+            )
+            for recipe in recipes
+            for ingredient in random.sample(
+                ingredients, ingredients_per_recipe
+            )
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return recipes
+
+
+def make_relations(model, users, targets, per_user, target_field):
+    """
+    Для каждого пользователя создает per_user связей
+    со случайными объектами из targets.
+    """
+    model.objects.bulk_create(
+        (
+            model(user_id=user, **{target_field: target})
+            for user in users
+            for target in random.sample(targets, per_user)
+            if target != user or target_field != "author_id"
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def seed(
+    users=1000, recipes=5000, tags=10, ingredients=500,
+    favorites_per_user=20, cart_per_user=5, subscriptions_per_user=10,
+    random_seed=0,
+):
+    """
+    Создает пользователей, рецепты, избранное, списки покупок и подписки.
+    Данные детерминированы random_seed, поэтому результаты
+    бенчмарков сравнимы между коммитами.
+    """
+    random.seed(random_seed)
+    dataset = Dataset()
+    dataset.users = make_users(users)
+    dataset.tags = make_tags(tags)
+    dataset.ingredients = make_ingredients(ingredients)
+    dataset.recipes = make_recipes(
+        dataset.users, recipes, dataset.tags, dataset.ingredients
+    )
+    make_relations(
+        IsFavorited, dataset.users, dataset.recipes,
+        favorites_per_user, "recipe_id",
+    )
+    make_relations(
+        IsInShoppingCart, dataset.users, dataset.recipes,
+        cart_per_user, "recipe_id",
+    )
+    make_relations(
+        Subscription, dataset.users, dataset.users,
+        subscriptions_per_user, "author_id",
+    )
+    recount()
+    update_rankings(full=True)
+    update_search_index()
+    return dataset
@@ -0,0 +1,130 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import resolve, reverse
+from django.utils.http import urlencode
+from rest_framework.test import APIClient
+
+from recipes.models import IsFavorited
+from recipes.search import update_search_index
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+    pytest.mark.urls("foodgram.asgi_urls"),
+]
+
+
+@pytest.fixture
+def token(token_for_auth_user):
+    return token_for_auth_user.key
+
+
+@pytest.fixture
+def sync_client(token_for_auth_user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {token_for_auth_user.key}")
+    return client
+
+
+def send(method, url, data=None, token=None):
+    """
+    AsyncClient в Django 3.2 превращает дополнительные аргументы
+    в заголовки и не переносит data в строку запроса,
+    поэтому параметры добавляются к адресу.
+    """
+    headers = {"authorization": f"Token {token}"} if token else {}
+    if data:
+        url = f"{url}?{urlencode(data, doseq=True)}"
+
+    async def request():
+        return await getattr(AsyncClient(), method)(url, **headers)
+
+    return async_to_sync(request)()
+
+
+def get(url, data=None, token=None):
+    return send("get", url, data, token)
+
+
+@pytest.mark.parametrize(
+    "url_name, args, data",
+    (
+        ("api:recipes-list", None, {"limit": 4, "page": 2}),
+        ("api:recipes-list", None, {"is_favorited": 1, "tags": ["slug"]}),
+        ("api:recipes-list", None, {"pagination": "cursor", "limit": 3}),
+        ("api:recipes-detail", 0, None),
+        ("api:users-subscriptions", None, {"recipes_limit": 2}),
+        ("api:tags-list", None, None),
+        ("api:ingredients-list", None, {"name": "Назв"}),
+    ),
+)
+def test_async_views_match_sync_views(
+    token, sync_client, recipes, url_name, args, data
+):
+    url = reverse(
+        url_name, args=None if args is None else (recipes[args].id,)
+    )
+    async_response = get(url, data, token)
+    sync_response = sync_client.get(url, data, urlconf="foodgram.urls")
+    assert async_response.status_code == HTTPStatus.OK
+    assert async_response.json() == sync_response.json()
+
+
+def test_async_search_matches_sync_search(token, sync_client, recipes):
+    update_search_index()
+    url = reverse("api:recipes-search")
+    data = {"q": "рецепт", "tags": ["slug"], "limit": 3}
+    async_response = get(url, data, token)
+    sync_response = sync_client.get(url, data, urlconf="foodgram.urls")
+    assert async_response.status_code == HTTPStatus.OK
+    assert len(async_response.json()["results"]) == 3
+    assert async_response.json() == sync_response.json()
+
+
+def test_async_view_errors(token, recipes):
+    response = get(reverse("api:users-subscriptions"))
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    response = get(reverse("api:recipes-list"), {"page": 100}, token)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    response = get(reverse("api:recipes-detail", args=(0,)), token=token)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.parametrize("page", ("0", "abc"))
+def test_async_invalid_page_matches_sync(token, sync_client, recipes, page):
+    url = reverse("api:recipes-list")
+    async_response = get(url, {"page": page}, token)
+    sync_response = sync_client.get(
+        url, {"page": page}, urlconf="foodgram.urls"
+    )
+    assert async_response.status_code == HTTPStatus.NOT_FOUND
+    assert async_response.json() == sync_response.json()
+
+
+def test_other_methods_use_sync_view(token, recipes, auth_user):
+    recipe = recipes[1]
+    response = send(
+        "post",
+        reverse("api:recipes-post-and-del-favorite", args=(recipe.id,)),
+        token=token,
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    assert IsFavorited.objects.filter(user=auth_user, recipe=recipe).exists()
+    response = send(
+        "delete", reverse("api:recipes-detail", args=(recipe.id,)), token=token
+    )
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_asgi_application_uses_async_urlconf():
+    from foodgram.asgi import application
+
+    assert application.request_class.urlconf == "foodgram.asgi_urls"
+    for path in ("/api/recipes/", "/api/users/subscriptions/"):
+        match = resolve(path, urlconf="foodgram.asgi_urls")
+        assert asyncio.iscoroutinefunction(match.func)
+    match = resolve("/api/users/me/", urlconf="foodgram.asgi_urls")
+    assert not asyncio.iscoroutinefunction(match.func)
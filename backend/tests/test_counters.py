@@ -0,0 +1,126 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+
+from recipes.counters import change_counter, recount, recount_counter
+from recipes.models import (IsFavorited, Recipe, ShoppingCartTotal,
+                            Subscription, User)
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_counters(recipe):
+    recipe = Recipe.objects.select_related("author").get(id=recipe.id)
+    return (
+        recipe.favorites_count,
+        recipe.in_carts_count,
+        recipe.author.recipes_count,
+        recipe.author.followers_count,
+    )
+
+
+def test_write_paths_update_counters(api_user_client, recipes):
+    recipe = recipes[1]
+    assert get_counters(recipe) == (0, 0, 10, 1)
+
+    for url_name in (
+        "api:recipes-post-and-del-favorite",
+        "api:recipes-post-and-delete-shopping-cart",
+    ):
+        response = api_user_client.post(reverse(url_name, args=(recipe.id,)))
+        assert response.status_code == HTTPStatus.CREATED
+    assert get_counters(recipe) == (1, 1, 10, 1)
+
+    url = reverse(
+        "api:users-post-and-delete-subscribe", args=(recipe.author_id,)
+    )
+    assert api_user_client.delete(url).status_code == HTTPStatus.NO_CONTENT
+    assert get_counters(recipe) == (1, 1, 10, 0)
+    response = api_user_client.post(url)
+    assert response.json()["recipes_count"] == 10
+    assert get_counters(recipe) == (1, 1, 10, 1)
+
+    response = api_user_client.delete(
+        reverse("api:recipes-post-and-del-favorite", args=(recipe.id,))
+    )
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert get_counters(recipe) == (0, 1, 10, 1)
+
+
+def test_deleting_recipe_updates_author_counter(recipes, author):
+    recipes[0].delete()
+    author.refresh_from_db()
+    assert author.recipes_count == 9
+
+
+def test_counter_does_not_go_below_zero(recipes, auth_user):
+    recipe = recipes[1]
+    Recipe.objects.filter(id=recipe.id).update(favorites_count=0)
+    favorite = IsFavorited.objects.create(user=auth_user, recipe=recipe)
+    Recipe.objects.filter(id=recipe.id).update(favorites_count=0)
+    favorite.delete()
+    recipe.refresh_from_db()
+    assert recipe.favorites_count == 0
+
+
+def test_recount_repairs_drift_in_batches(recipes, author, auth_user):
+    Recipe.objects.update(favorites_count=7, in_carts_count=0)
+    User.objects.update(recipes_count=0)
+    Subscription.objects.create(user=author, author=auth_user)
+    User.objects.filter(id=auth_user.id).update(followers_count=5)
+    ShoppingCartTotal.objects.update(amount=0)
+
+    assert recount(batch_size=3) == {
+        "recipe.favorites_count": 10,
+        "recipe.in_carts_count": 4,
+        "user.recipes_count": 1,
+        "user.followers_count": 1,
+        "shoppingcarttotal.amount": 2,
+    }
+    assert recount() == dict.fromkeys(
+        (
+            "recipe.favorites_count",
+            "recipe.in_carts_count",
+            "user.recipes_count",
+            "user.followers_count",
+            "shoppingcarttotal.amount",
+        ),
+        0,
+    )
+    favorites_counts = Recipe.objects.values_list(
+        "favorites_count", flat=True
+    )
+    assert sorted(favorites_counts) == [0] * 5 + [1] * 5
+    auth_user.refresh_from_db()
+    assert auth_user.followers_count == 1
+
+
+def test_recount_keeps_concurrent_change(recipes):
+    recipe = recipes[0]
+    Recipe.objects.filter(id=recipe.id).update(favorites_count=7)
+    changed = []
+
+    def change_after_count(execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        if "COUNT" in sql and not changed:
+            changed.append(
+                change_counter(Recipe, recipe.id, "favorites_count", 1)
+            )
+        return result
+
+    with connection.execute_wrapper(change_after_count):
+        assert recount_counter(
+            IsFavorited, "recipe_id", Recipe, "favorites_count"
+        ) == 0
+    recipe.refresh_from_db()
+    assert changed == [1]
+    assert recipe.favorites_count == 8
+
+
+def test_recount_command(recipes):
+    Recipe.objects.update(in_carts_count=3)
+    call_command("recount", batch_size=2)
+    assert sum(Recipe.objects.values_list("in_carts_count", flat=True)) == 4
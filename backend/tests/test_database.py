@@ -0,0 +1,348 @@
+import sqlite3
+import threading
+from contextvars import copy_context
+from http import HTTPStatus
+
+import psycopg2
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.db import connection, connections
+from django.test import AsyncClient
+from django.urls import reverse
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.pool import PoolError
+from rest_framework.test import APIClient
+
+from api.middleware import ReplicaRoutingMiddleware
+from foodgram.db import routers
+from foodgram.db.postgresql_pool.base import BlockingConnectionPool
+from foodgram.db.routers import ReplicaRouter, use_primary, use_replica
+from recipes.models import Recipe
+
+from .conftest import new_user
+
+pytestmark = [pytest.mark.django_db]
+
+postgresql_only = pytest.mark.skipif(
+    connection.vendor != "postgresql",
+    reason="Нужен PostgreSQL: DB_ENGINE=postgresql",
+)
+
+
+@pytest.fixture
+def replica_reads(settings, monkeypatch):
+    """
+    Включает реплику и запоминает, сколько раз роутер ее выбирал.
+    Реплика указывает на основную базу, как TEST MIRROR.
+    """
+    settings.DATABASE_REPLICAS = ["replica1"]
+    chosen = []
+
+    def choose_replica():
+        chosen.append(True)
+        return "default"
+
+    monkeypatch.setattr(routers, "choose_replica", choose_replica)
+    return chosen
+
+
+@pytest.fixture
+def replica_database(db, settings, tmp_path):
+    """
+    Вторая база SQLite в отдельном файле. Схема копируется из основной
+    базы до записи в тесте, sync() переносит в реплику текущие строки
+    всех таблиц. Между вызовами sync() реплика отстает, как при
+    задержке репликации.
+    """
+    if connection.vendor != "sqlite":
+        pytest.skip("Реплика-файл создается только для SQLite")
+    path = tmp_path / "replica.sqlite3"
+    connection.ensure_connection()
+    with sqlite3.connect(path) as target:
+        connection.connection.backup(target)
+    connections.databases["replica1"] = {
+        **connections.databases["default"],
+        "NAME": str(path),
+    }
+    settings.DATABASE_REPLICAS = ["replica1"]
+
+    def sync():
+        replica = connections["replica1"]
+        with replica.constraint_checks_disabled(), connection.cursor() as (
+            source
+        ), replica.cursor() as target:
+            for table in connection.introspection.table_names():
+                source.execute(f'SELECT * FROM "{table}"')
+                rows = source.fetchall()
+                target.execute(f'DELETE FROM "{table}"')
+                if rows:
+                    marks = ", ".join("?" * len(rows[0]))
+                    target.executemany(
+                        f'INSERT INTO "{table}" VALUES ({marks})', rows
+                    )
+
+    yield sync
+    connections["replica1"].close()
+    del connections["replica1"]
+    del connections.databases["replica1"]
+
+
+@pytest.fixture
+def token_client(token_for_auth_user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {token_for_auth_user.key}")
+    return client
+
+
+def test_router_reads_from_default_without_replicas(settings):
+    settings.DATABASE_REPLICAS = []
+    router = ReplicaRouter()
+    with use_replica():
+        assert router.db_for_read(Recipe) is None
+    assert router.db_for_write(Recipe) == "default"
+
+
+def test_router_reads_from_replica_inside_use_replica(settings):
+    settings.DATABASE_REPLICAS = ["replica1", "replica2"]
+    router = ReplicaRouter()
+    assert router.db_for_read(Recipe) is None
+    with use_replica():
+        assert router.db_for_read(Recipe) in ("replica1", "replica2")
+    with use_replica(replica=False):
+        assert router.db_for_read(Recipe) is None
+    assert router.db_for_read(Recipe) is None
+
+
+def test_router_reads_from_default_after_write(settings):
+    settings.DATABASE_REPLICAS = ["replica1"]
+    router = ReplicaRouter()
+    with use_replica() as state:
+        assert router.db_for_write(Recipe) == "default"
+        assert state.wrote
+        assert router.db_for_read(Recipe) is None
+
+
+def test_overlapping_use_primary_blocks(settings):
+    settings.DATABASE_REPLICAS = ["replica1"]
+    router = ReplicaRouter()
+    with use_replica():
+        with use_primary():
+            with use_primary():
+                pass
+            assert router.db_for_read(Recipe) is None
+        # Блоки в двух потоках одного запроса, как в run_in_thread.
+        first, second = copy_context(), copy_context()
+        first_block, second_block = use_primary(), use_primary()
+        first.run(first_block.__enter__)
+        second.run(second_block.__enter__)
+        second.run(second_block.__exit__, None, None, None)
+        assert first.run(router.db_for_read, Recipe) is None
+        first.run(first_block.__exit__, None, None, None)
+        assert router.db_for_read(Recipe) == "replica1"
+
+
+def test_router_does_not_migrate_replicas(settings):
+    settings.DATABASE_REPLICAS = ["replica1"]
+    router = ReplicaRouter()
+    assert router.allow_migrate("default", "recipes")
+    assert not router.allow_migrate("replica1", "recipes")
+
+
+@pytest.mark.parametrize(
+    "url_name",
+    (
+        "api:recipes-list",
+        "api:users-list",
+        "api:users-me",
+        "api:users-subscriptions",
+    ),
+)
+def test_get_reads_from_replica(url_name, token_client, replica_reads):
+    response = token_client.get(reverse(url_name))
+    assert response.status_code == HTTPStatus.OK
+    assert replica_reads
+
+
+def test_post_reads_from_default(token_client, recipes, replica_reads):
+    response = token_client.post(
+        reverse("api:recipes-post-and-del-favorite", args=(recipes[1].id,))
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    assert not replica_reads
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.urls("foodgram.asgi_urls")
+def test_async_get_reads_from_replica(recipes, replica_reads):
+    async def request():
+        return await AsyncClient().get(reverse("api:recipes-list"))
+
+    response = async_to_sync(request)()
+    assert response.status_code == HTTPStatus.OK
+    assert replica_reads
+
+
+def test_routing_middleware_is_async_under_asgi(settings):
+    settings.DATABASE_REPLICAS = ["replica1"]
+
+    async def get_response(request):
+        return None
+
+    assert iscoroutinefunction(ReplicaRoutingMiddleware(get_response))
+
+
+def test_reads_stick_to_primary_after_write(
+    replica_database, recipes, token_client,
+    django_capture_on_commit_callbacks,
+):
+    replica_database()
+    recipe = recipes[1]
+    detail_url = reverse("api:recipes-detail", args=(recipe.id,))
+    Recipe.objects.filter(id=recipe.id).update(name="Изменено в основной")
+
+    response = token_client.get(detail_url)
+    assert response.data["name"] == recipe.name
+    assert not response.data["is_favorited"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = token_client.post(
+            reverse("api:recipes-post-and-del-favorite", args=(recipe.id,))
+        )
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.cookies["primary_db"].value != "1"
+    response = token_client.get(detail_url)
+    assert response.data["name"] == "Изменено в основной"
+    assert response.data["is_favorited"]
+
+    token_client.cookies.clear()
+    response = token_client.get(detail_url)
+    assert response.data["name"] == recipe.name
+    assert response.data["is_favorited"]
+
+
+def test_unsigned_cookie_does_not_stick(
+    replica_database, recipes, token_client
+):
+    replica_database()
+    recipe = recipes[1]
+    Recipe.objects.filter(id=recipe.id).update(name="Изменено в основной")
+    token_client.cookies["primary_db"] = "1"
+    response = token_client.get(
+        reverse("api:recipes-detail", args=(recipe.id,))
+    )
+    assert response.data["name"] == recipe.name
+
+
+def test_shared_cache_sticks_without_cookie(
+    replica_database, recipes, token_client, shared_cache
+):
+    replica_database()
+    recipe = recipes[1]
+    Recipe.objects.filter(id=recipe.id).update(name="Изменено в основной")
+    token_client.post(
+        reverse("api:recipes-post-and-del-favorite", args=(recipe.id,))
+    )
+    token_client.cookies.clear()
+    response = token_client.get(
+        reverse("api:recipes-detail", args=(recipe.id,))
+    )
+    assert response.data["name"] == "Изменено в основной"
+
+
+def test_cache_is_filled_from_primary(replica_database, tag, client):
+    replica_database()
+    tag.name = "Новое имя тега"
+    tag.save()
+    response = client.get(reverse("api:tags-detail", args=(tag.id,)))
+    assert response.json()["name"] == "Новое имя тега"
+
+
+def test_anonymous_write_sticks_by_cookie(replica_database, client):
+    replica_database()
+    client.post(reverse("api:users-list"), new_user)
+    response = client.post(
+        reverse("api:login"),
+        {"email": new_user["email"], "password": new_user["password"]},
+    )
+    assert "primary_db" in response.cookies
+    me_url = reverse("api:users-me")
+    headers = {"HTTP_AUTHORIZATION": f"Token {response.json()['auth_token']}"}
+
+    assert client.get(me_url, **headers).status_code == HTTPStatus.OK
+    client.cookies.clear()
+    assert client.get(me_url, **headers).status_code == (
+        HTTPStatus.UNAUTHORIZED
+    )
+
+
+class FakeConnection:
+    closed = 0
+
+    class info:
+        transaction_status = TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def fake_connect(monkeypatch):
+    opened = []
+
+    def connect(*args, **kwargs):
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    monkeypatch.setattr(psycopg2, "connect", connect)
+    return opened
+
+
+def test_pool_keeps_idle_connections_up_to_max_size(fake_connect):
+    pool = BlockingConnectionPool(1, 3, 1)
+    connections_in_use = [pool.getconn() for _ in range(3)]
+    for pooled in connections_in_use:
+        pool.putconn(pooled)
+    assert not any(pooled.closed for pooled in fake_connect)
+    assert {id(pool.getconn()) for _ in range(3)} == {
+        id(pooled) for pooled in connections_in_use
+    }
+    assert len(fake_connect) == 3
+
+
+def test_exhausted_pool_waits_for_connection(fake_connect):
+    pool = BlockingConnectionPool(1, 1, 5)
+    first = pool.getconn()
+    timer = threading.Timer(0.1, pool.putconn, (first,))
+    timer.start()
+    assert pool.getconn() is first
+    timer.join()
+    pool.timeout = 0.01
+    with pytest.raises(PoolError):
+        pool.getconn()
+
+
+@postgresql_only
+@pytest.mark.django_db(transaction=True)
+def test_health_check_reconnects_broken_connection():
+    connection.ensure_connection()
+    connection.connection.close()
+    connection.close_if_unusable_or_obsolete()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        assert cursor.fetchone() == (1,)
+
+
+@postgresql_only
+@pytest.mark.django_db(transaction=True)
+def test_pool_reuses_connections():
+    if not hasattr(connection, "get_pool"):
+        pytest.skip("Нужен пул: DB_POOL=true")
+
+    def backend_pid():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_backend_pid()")
+            return cursor.fetchone()[0]
+
+    first = backend_pid()
+    connection.close()
+    assert backend_pid() == first
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer
+from api.views import IngredientViewSet, RecipesViewSet, TagViewSet
+from recipes.models import Recipe
+from recipes.ranking import update_rankings
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_both(client, monkeypatch, viewset, url, params=None):
+    fast = client.get(url, params)
+    cache.clear()
+    monkeypatch.setattr(viewset, "fast_serializer_class", None)
+    slow = client.get(url, params)
+    monkeypatch.undo()
+    assert fast.status_code == slow.status_code == 200
+    return fast.json(), slow.json()
+
+
+@pytest.mark.parametrize(
+    "params",
+    (
+        {"limit": 6},
+        {"is_favorited": 1, "page": 2, "limit": 2},
+        {"tags": "slug", "pagination": "cursor", "limit": 4},
+        {"ordering": "trending", "pagination": "cursor", "limit": 3},
+    ),
+)
+def test_recipes_match_drf_serializer(
+    api_user_client, monkeypatch, recipes, params
+):
+    Recipe.objects.filter(id=recipes[0].id).update(
+        image_variants={"small_webp": "recipes_image/variants/image_320.webp"}
+    )
+    update_rankings()
+    fast, slow = get_both(
+        api_user_client,
+        monkeypatch,
+        RecipesViewSet,
+        reverse("api:recipes-list"),
+        params,
+    )
+    assert fast == slow
+    assert fast["results"]
+
+
+def test_recipes_match_drf_serializer_for_anonymous(
+    api_client, monkeypatch, recipes
+):
+    fast, slow = get_both(
+        api_client, monkeypatch, RecipesViewSet, reverse("api:recipes-list")
+    )
+    assert fast == slow
+
+
+@pytest.mark.parametrize("params", (None, {"name": "Наз"}))
+def test_ingredients_match_drf_serializer(
+    api_client, monkeypatch, recipes, params
+):
+    fast, slow = get_both(
+        api_client,
+        monkeypatch,
+        IngredientViewSet,
+        reverse("api:ingredients-list"),
+        params,
+    )
+    assert fast == slow
+    assert fast
+
+
+def test_fast_renderer_matches_json_renderer():
+    data = {
+        "name": "Соль\u2028",
+        "amount": 1.5,
+        "items": [{"id": 1}, None, True],
+        1: "ключ",
+    }
+    assert json.loads(FastJSONRenderer().render(data)) == json.loads(
+        JSONRenderer().render(data)
+    )
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_fast_renderer_is_used_only_by_fast_viewsets():
+    assert IngredientViewSet.renderer_classes[0] is FastJSONRenderer
+    assert RecipesViewSet.renderer_classes[0] is FastJSONRenderer
+    assert TagViewSet.renderer_classes[0] is JSONRenderer
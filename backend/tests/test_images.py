@@ -0,0 +1,121 @@
+import base64
+import io
+from http import HTTPStatus
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.urls import reverse
+from PIL import Image
+
+from api.fields import StreamingBase64ImageField
+from recipes.images import get_variant_formats
+from recipes.models import Ingredient, Recipe
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+def encode_image(size, image_format="PNG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "red").save(buffer, format=image_format)
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f"data:image/{image_format.lower()};base64,{encoded}"
+
+
+def get_payload(image, tag):
+    ingredient = Ingredient.objects.create(name="Соль", measurement_unit="г")
+    return {
+        "ingredients": [{"id": ingredient.id, "amount": 1}],
+        "tags": [tag.id],
+        "image": image,
+        "name": "Рецепт",
+        "text": "Описание рецепта",
+        "cooking_time": 10,
+    }
+
+
+def test_streaming_field_decodes_large_image_to_temporary_file(settings):
+    settings.FILE_UPLOAD_MAX_MEMORY_SIZE = 1024
+    image = encode_image((400, 300))
+    header, data = image.split(",")
+    wrapped = "\n".join(data[i:i + 76] for i in range(0, len(data), 76))
+    field = StreamingBase64ImageField()
+    field.chunk_size = 1001
+
+    upload = field.to_internal_value(f"{header},{wrapped}")
+
+    assert isinstance(upload, TemporaryUploadedFile)
+    assert upload.name.endswith(".png")
+    upload.seek(0)
+    assert upload.read() == base64.b64decode(data)
+
+
+def test_streaming_field_rejects_invalid_data(settings):
+    settings.FILE_UPLOAD_MAX_MEMORY_SIZE = 16
+    field = StreamingBase64ImageField()
+    with pytest.raises(ValidationError):
+        field.to_internal_value("data:image/png;base64," + "A" * 101)
+    with pytest.raises(ValidationError):
+        field.to_internal_value(
+            "data:image/png;base64," + base64.b64encode(b"x" * 300).decode()
+        )
+
+
+def test_variants_are_created_after_commit(
+    api_user_client, tag, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_user_client.post(
+            reverse("api:recipes-list"),
+            data=get_payload(encode_image((1000, 500)), tag),
+            format="json",
+        )
+    assert response.status_code == HTTPStatus.CREATED, response.json()
+    recipe = Recipe.objects.get()
+    formats = get_variant_formats()
+    assert "webp" in formats
+    assert len(recipe.image_variants) == len(formats) * 2
+    with default_storage.open(recipe.image_variants["small_webp"]) as file:
+        with Image.open(file) as variant:
+            assert variant.format == "WEBP"
+            assert variant.size == (320, 160)
+
+    response = api_user_client.get(
+        reverse("api:recipes-detail", args=(recipe.id,))
+    )
+    urls = response.json()["image_variants"]
+    assert urls.keys() == recipe.image_variants.keys()
+    assert urls["medium_webp"].startswith("http://testserver/media/")
+
+
+def test_update_replaces_variants(
+    api_user_client, tag, django_capture_on_commit_callbacks
+):
+    payload = get_payload(encode_image((800, 800)), tag)
+    with django_capture_on_commit_callbacks(execute=True):
+        api_user_client.post(
+            reverse("api:recipes-list"), data=payload, format="json"
+        )
+    recipe = Recipe.objects.get()
+    old_variants = recipe.image_variants
+
+    payload["image"] = encode_image((700, 700), "JPEG")
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_user_client.patch(
+            reverse("api:recipes-detail", args=(recipe.id,)),
+            data=payload,
+            format="json",
+        )
+    assert response.status_code == HTTPStatus.OK, response.json()
+    recipe.refresh_from_db()
+    assert recipe.image_variants.keys() == old_variants.keys()
+    for name in old_variants.values():
+        assert not default_storage.exists(name)
+    for name in recipe.image_variants.values():
+        assert default_storage.exists(name)
@@ -0,0 +1,77 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+
+from recipes.importer import import_ingredients, iter_json_array, iter_rows
+from recipes.models import Ingredient
+
+pytestmark = [pytest.mark.django_db]
+
+ROWS = [
+    ("соль", "г"),
+    ("сахар", "г"),
+    ("молоко", "мл"),
+]
+
+
+def write_sources(tmp_path):
+    items = [
+        {"name": name, "measurement_unit": unit} for name, unit in ROWS
+    ]
+    (tmp_path / "data.csv").write_text(
+        "name,measurement_unit\n"
+        + "".join(f"{name},{unit}\n" for name, unit in ROWS),
+        encoding="utf8",
+    )
+    (tmp_path / "data.json").write_text(
+        json.dumps(items, ensure_ascii=False, indent=2), encoding="utf8"
+    )
+    (tmp_path / "data.ndjson").write_text(
+        "".join(json.dumps(item) + "\n" for item in items), encoding="utf8"
+    )
+
+
+def get_ingredients():
+    return set(Ingredient.objects.values_list("name", "measurement_unit"))
+
+
+@pytest.mark.parametrize("file_name", ("data.csv", "data.json", "data.ndjson"))
+def test_import_formats_is_idempotent(tmp_path, file_name):
+    write_sources(tmp_path)
+    for _ in range(2):
+        call_command("import_csv", str(tmp_path / file_name), batch_size=2)
+        assert get_ingredients() == set(ROWS)
+
+
+def test_import_from_stdin(monkeypatch, tmp_path):
+    write_sources(tmp_path)
+    stdin = io.TextIOWrapper(
+        io.BytesIO((tmp_path / "data.ndjson").read_bytes())
+    )
+    monkeypatch.setattr("sys.stdin", stdin)
+    out = io.StringIO()
+    call_command("import_csv", "-", stdout=out, stderr=io.StringIO())
+    assert get_ingredients() == set(ROWS)
+    assert "3 rows, 3 created, 0 skipped" in out.getvalue()
+
+
+def test_existing_rows_do_not_break_import():
+    Ingredient.objects.create(name="соль", measurement_unit="г")
+    stats = import_ingredients(ROWS + [("соль", "г"), ("", "г")])
+    assert get_ingredients() == set(ROWS)
+    assert (stats.rows, stats.skipped) == (5, 1)
+
+
+def test_json_array_is_read_in_chunks():
+    items = [{"name": f"ингредиент {i}", "measurement_unit": "г"}
+             for i in range(50)]
+    file = io.StringIO(json.dumps(items, ensure_ascii=False))
+    assert list(iter_json_array(file, chunk_size=7)) == items
+
+
+def test_truncated_json_array_is_rejected():
+    file = io.StringIO('[{"name": "соль", "measurement_unit": "г"}, {"na')
+    with pytest.raises(ValueError):
+        list(iter_rows(file, "json"))
@@ -0,0 +1,70 @@
+import pytest
+from django.urls import reverse
+
+from api.search import CustomSearch
+from recipes.models import Ingredient
+
+pytestmark = [pytest.mark.django_db]
+
+NAMES = (
+    "сахар",
+    "сахарная пудра",
+    "ванильный сахар",
+    "тростниковый сахар",
+    "соль",
+    "морская соль",
+    "сало",
+    "масло сливочное",
+    "сливки",
+    "вода",
+)
+
+
+@pytest.fixture
+def ingredients():
+    return Ingredient.objects.bulk_create(
+        Ingredient(name=name, measurement_unit="г") for name in NAMES
+    )
+
+
+def search_with_orm(term):
+    view = type("View", (), {"search_fields": ("^name",)})()
+    request = type("Request", (), {"query_params": {"name": term}})()
+    queryset = CustomSearch().filter_queryset(
+        request, Ingredient.objects.all(), view
+    )
+    return [ingredient.name for ingredient in queryset]
+
+
+@pytest.mark.parametrize(
+    "term", ("с", "са", "сах", "сахар", "соль", "сли", "ливк", "пудр", "х")
+)
+def test_index_matches_orm_ordering(client, ingredients, term):
+    response = client.get(reverse("api:ingredients-list"), {"name": term})
+    names = [ingredient["name"] for ingredient in response.json()]
+    assert names == search_with_orm(term)
+
+
+def test_index_is_rebuilt_after_ingredient_change(
+    client, ingredients, django_capture_on_commit_callbacks
+):
+    url = reverse("api:ingredients-list")
+    assert client.get(url, {"name": "сахарин"}).json() == []
+    with django_capture_on_commit_callbacks(execute=True):
+        Ingredient.objects.create(name="сахарин", measurement_unit="г")
+    assert [
+        ingredient["name"]
+        for ingredient in client.get(url, {"name": "сахарин"}).json()
+    ] == ["сахарин"]
+    with django_capture_on_commit_callbacks(execute=True):
+        Ingredient.objects.filter(name="сахарин").get().delete()
+    assert client.get(url, {"name": "сахарин"}).json() == []
+
+
+def test_retrieve_does_not_use_index(client, ingredients):
+    ingredient = Ingredient.objects.get(name="вода")
+    response = client.get(
+        reverse("api:ingredients-detail", args=(ingredient.id,)),
+        {"name": "вод"},
+    )
+    assert response.json()["name"] == ingredient.name
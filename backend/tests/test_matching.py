@@ -0,0 +1,169 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from recipes.matching import RecipeMatcher, recipe_matcher
+from recipes.models import Ingredient, IngredientRecipe, Recipe
+
+pytestmark = [pytest.mark.django_db]
+
+RECIPES = (
+    ("Картофельное пюре", ("Картофель", "Молоко")),
+    ("Салат", ("Огурец", "Яйцо", "Лук")),
+    ("Омлет", ("Яйцо", "Молоко")),
+    ("Драники", ("Картофель", "Лук")),
+)
+
+
+@pytest.fixture
+def pantry_recipes(author):
+    ingredients = {}
+    recipes = {}
+    for name, ingredient_names in RECIPES:
+        recipe = Recipe.objects.create(
+            name=name, text=name, author=author, cooking_time=10,
+            image="recipes_image/image.png",
+        )
+        for ingredient_name in ingredient_names:
+            if ingredient_name not in ingredients:
+                ingredients[ingredient_name] = Ingredient.objects.create(
+                    name=ingredient_name, measurement_unit="г"
+                )
+            IngredientRecipe.objects.create(
+                recipe=recipe,
+                ingredient=ingredients[ingredient_name],
+                amount=1,
+            )
+        recipes[name] = recipe
+    return recipes
+
+
+def ingredient_ids(*names):
+    return [Ingredient.objects.get(name=name).id for name in names]
+
+
+def cook(client, *names, **params):
+    return client.get(
+        reverse("api:recipes-what-can-i-cook"),
+        {"ingredients": ingredient_ids(*names), **params},
+    )
+
+
+def names(response):
+    return [recipe["name"] for recipe in response.json()["results"]]
+
+
+def test_recipes_are_ranked_by_coverage(client, pantry_recipes):
+    response = cook(client, "Картофель", "Молоко")
+    assert response.status_code == HTTPStatus.OK
+    assert names(response) == ["Картофельное пюре", "Драники", "Омлет"]
+    first = response.json()["results"][0]
+    assert (first["matched"], first["missing"], first["coverage"]) == (
+        2, 0, 1
+    )
+    assert first["ingredients"]
+
+
+def test_equal_coverage_prefers_newer_recipes(client, pantry_recipes):
+    response = cook(client, "Яйцо", "Лук", "Молоко")
+    assert names(response) == [
+        "Омлет", "Салат", "Драники", "Картофельное пюре"
+    ]
+
+
+def test_max_missing_limits_results(client, pantry_recipes):
+    response = cook(client, "Картофель", "Яйцо", "Лук", max_missing=0)
+    assert names(response) == ["Драники"]
+
+
+def test_results_are_paginated(client, pantry_recipes):
+    response = cook(client, "Картофель", "Молоко", limit=2, page=2)
+    data = response.json()
+    assert data["count"] == 3
+    assert names(response) == ["Омлет"]
+
+
+@pytest.mark.parametrize("params", ({}, {"ingredients": "соль"}))
+def test_ingredients_are_required(client, pantry_recipes, params):
+    response = client.get(reverse("api:recipes-what-can-i-cook"), params)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_recipe_update_reindexes_recipe(
+    api_user_client, auth_user, tag, pantry_recipes,
+    django_capture_on_commit_callbacks,
+):
+    assert names(cook(api_user_client, "Огурец")) == ["Салат"]
+    recipe = pantry_recipes["Омлет"]
+    Recipe.objects.filter(id=recipe.id).update(author=auth_user)
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_user_client.patch(
+            reverse("api:recipes-detail", args=(recipe.id,)),
+            {
+                "ingredients": [
+                    {"id": ingredient_ids("Огурец")[0], "amount": 2}
+                ],
+                "tags": [tag.id],
+                "name": "Омлет",
+                "text": "Обжарить",
+                "cooking_time": 5,
+            },
+            format="json",
+        )
+    assert response.status_code == HTTPStatus.OK
+    assert names(cook(api_user_client, "Огурец")) == ["Омлет", "Салат"]
+    assert "Омлет" not in names(cook(api_user_client, "Молоко"))
+
+
+def test_deleted_recipe_leaves_index(
+    client, pantry_recipes, django_capture_on_commit_callbacks
+):
+    assert names(cook(client, "Огурец")) == ["Салат"]
+    with django_capture_on_commit_callbacks(execute=True):
+        pantry_recipes["Салат"].delete()
+    assert names(cook(client, "Огурец")) == []
+
+
+def test_other_process_applies_changes_from_log(
+    pantry_recipes, django_capture_on_commit_callbacks, monkeypatch
+):
+    matcher = RecipeMatcher()
+    matcher.refresh()
+    recipe = pantry_recipes["Драники"]
+    with django_capture_on_commit_callbacks(execute=True):
+        recipe.delete()
+    monkeypatch.setattr(matcher, "build", None)
+    assert [
+        match.recipe_id for match in matcher.match(ingredient_ids("Лук"))
+    ] == [pantry_recipes["Салат"].id]
+
+
+def test_command_rebuilds_index_everywhere(pantry_recipes):
+    recipe_matcher.refresh()
+    IngredientRecipe.objects.filter(
+        recipe=pantry_recipes["Омлет"]
+    ).delete()
+    assert pantry_recipes["Омлет"].id in [
+        match.recipe_id
+        for match in recipe_matcher.match(ingredient_ids("Молоко"))
+    ]
+    call_command("rebuild_recipe_matcher")
+    assert [
+        match.recipe_id
+        for match in recipe_matcher.match(ingredient_ids("Молоко"))
+    ] == [pantry_recipes["Картофельное пюре"].id]
+
+
+def test_process_local_cache_rebuilds_by_short_ttl(pantry_recipes, settings):
+    settings.RECIPE_MATCHER_TTL = 3600
+    settings.RECIPE_MATCHER_LOCAL_TTL = 0
+    recipe_matcher.refresh()
+    IngredientRecipe.objects.filter(
+        recipe=pantry_recipes["Омлет"]
+    ).delete()
+    assert [
+        match.recipe_id
+        for match in recipe_matcher.match(ingredient_ids("Молоко"))
+    ] == [pantry_recipes["Картофельное пюре"].id]
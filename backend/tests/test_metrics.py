@@ -0,0 +1,106 @@
+import json
+import logging
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.test import AsyncClient
+from django.urls import reverse
+
+from api.middleware import RequestMetricsMiddleware
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def metrics(settings):
+    settings.REQUEST_METRICS_ENABLED = True
+    settings.REQUEST_QUERY_BUDGET = 15
+    settings.REQUEST_QUERY_BUDGETS = {}
+    return settings
+
+
+def get_log_lines(caplog):
+    return [
+        json.loads(record.getMessage())
+        for record in caplog.records
+        if record.name == "api.middleware"
+    ]
+
+
+def test_metrics_are_disabled_by_default(api_client, recipes):
+    response = api_client.get(reverse("api:recipes-list"))
+    assert "Server-Timing" not in response
+
+
+def test_server_timing_and_log_line(metrics, api_user_client, recipes, caplog):
+    caplog.set_level(logging.INFO, logger="api.middleware")
+    response = api_user_client.get(reverse("api:recipes-list"))
+    timing = response["Server-Timing"]
+    assert timing.startswith("db;dur=")
+    assert "serialize;dur=" in timing
+    assert "total;dur=" in timing
+    [line] = get_log_lines(caplog)
+    assert line["view"] == "api:recipes-list"
+    assert line["action"] == "list"
+    assert line["status"] == 200
+    assert line["queries"] > 0
+    assert f'desc="{line["queries"]} queries"' in timing
+    assert line["bytes"] == len(response.content)
+    assert line["over_budget"] is False
+    assert caplog.records[-1].levelno == logging.INFO
+
+
+def test_action_of_extra_route(metrics, api_user_client, recipes, caplog):
+    caplog.set_level(logging.INFO, logger="api.middleware")
+    api_user_client.post(
+        reverse("api:recipes-post-and-del-favorite", args=(recipes[0].id,))
+    )
+    [line] = get_log_lines(caplog)
+    assert line["action"] == "post_and_del_favorite"
+
+
+def test_over_budget_is_logged_as_warning(
+    metrics, api_user_client, recipes, caplog
+):
+    metrics.REQUEST_QUERY_BUDGETS = {"api:recipes-list": 1}
+    caplog.set_level(logging.INFO, logger="api.middleware")
+    api_user_client.get(reverse("api:recipes-list"))
+    [line] = get_log_lines(caplog)
+    assert line["query_budget"] == 1
+    assert line["over_budget"] is True
+    assert caplog.records[-1].levelno == logging.WARNING
+
+
+def test_middleware_is_async_under_asgi(metrics):
+    async def get_response(request):
+        return None
+
+    assert iscoroutinefunction(RequestMetricsMiddleware(get_response))
+    assert not iscoroutinefunction(RequestMetricsMiddleware(lambda r: None))
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.urls("foodgram.asgi_urls")
+@pytest.mark.parametrize(
+    "method, url_name, detail",
+    (
+        ("get", "api:recipes-list", False),
+        ("get", "api:tags-list", False),
+        ("post", "api:recipes-post-and-del-favorite", True),
+    ),
+)
+def test_queries_are_counted_under_asgi(
+    metrics, token_for_auth_user, recipes, caplog, method, url_name, detail
+):
+    caplog.set_level(logging.INFO, logger="api.middleware")
+    url = reverse(url_name, args=(recipes[0].id,) if detail else None)
+
+    async def request():
+        return await getattr(AsyncClient(), method)(
+            url, authorization=f"Token {token_for_auth_user.key}"
+        )
+
+    response = async_to_sync(request)()
+    [line] = get_log_lines(caplog)
+    assert line["queries"] > 0
+    assert f'desc="{line["queries"]} queries"' in response["Server-Timing"]
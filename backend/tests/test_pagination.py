@@ -0,0 +1,63 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from recipes.models import Recipe
+
+pytestmark = [pytest.mark.django_db]
+
+
+def walk_cursor_pages(client, url, params):
+    ids = []
+    queries = []
+    while url:
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, params)
+        assert response.status_code == HTTPStatus.OK
+        body = response.json()
+        assert "count" not in body
+        assert not any(
+            query["sql"].startswith("SELECT COUNT(*)")
+            for query in context.captured_queries
+        )
+        ids += [item["id"] for item in body["results"]]
+        queries.append(len(context.captured_queries))
+        url, params = body["next"], None
+    return ids, queries
+
+
+def test_recipes_cursor_pagination(api_client, recipes):
+    ids, queries = walk_cursor_pages(
+        api_client,
+        reverse("api:recipes-list"),
+        {"pagination": "cursor", "limit": 3},
+    )
+    expected = Recipe.objects.order_by("-pub_date", "-id")
+    assert ids == [recipe.id for recipe in expected]
+    # Первая страница при холодном кеше еще загружает словарь тегов.
+    assert queries[0] == queries[1] + 1
+    assert len(set(queries[1:-1])) == 1
+
+
+def test_recipes_page_pagination_still_works(api_client, recipes):
+    response = api_client.get(
+        reverse("api:recipes-list"), {"page": 2, "limit": 3}
+    )
+    body = response.json()
+    assert body["count"] == len(recipes)
+    expected = Recipe.objects.order_by("-pub_date", "-id")[3:6]
+    assert [item["id"] for item in body["results"]] == [
+        recipe.id for recipe in expected
+    ]
+
+
+def test_subscriptions_cursor_pagination(api_user_client, recipes):
+    ids, _ = walk_cursor_pages(
+        api_user_client,
+        reverse("api:users-subscriptions"),
+        {"pagination": "cursor", "limit": 1},
+    )
+    assert ids == [recipes[0].author_id]
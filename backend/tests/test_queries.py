@@ -0,0 +1,181 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from pytest import lazy_fixture
+
+from api.user_state import get_initial_version, get_version_key
+from recipes.models import IsFavorited, Subscription
+
+from .conftest import create_recipes
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.mark.parametrize(
+    "user, num_queries",
+    (
+        (lazy_fixture("api_client"), 5),
+        (lazy_fixture("api_user_client"), 7),
+    ),
+)
+def test_recipe_list_queries_do_not_depend_on_page_size(
+    user, num_queries, recipes
+):
+    url = reverse("api:recipes-list")
+    for limit in (1, 5, 10):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = user.get(url, {"limit": limit})
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()["results"]) == limit
+        assert len(context.captured_queries) == num_queries
+
+
+def test_user_state_is_cached_between_requests(
+    api_user_client, recipes, shared_cache
+):
+    url = reverse("api:recipes-list")
+    with CaptureQueriesContext(connection) as first:
+        api_user_client.get(url)
+    with CaptureQueriesContext(connection) as second:
+        api_user_client.get(url)
+    # Из кеша берутся состояние пользователя и словарь тегов.
+    assert len(second.captured_queries) == len(first.captured_queries) - 2
+
+
+def test_process_local_cache_does_not_keep_user_state(
+    api_user_client, auth_user, recipes
+):
+    url = reverse("api:recipes-detail", args=(recipes[1].id,))
+    assert api_user_client.get(url).json()["is_favorited"] is False
+    # bulk_create не отправляет сигналов, как запись в другом процессе,
+    # которая не меняет версию в кеше этого процесса.
+    IsFavorited.objects.bulk_create(
+        [IsFavorited(user=auth_user, recipe=recipes[1])]
+    )
+    assert api_user_client.get(url).json()["is_favorited"] is True
+
+
+@pytest.mark.parametrize("cache_backend", ("local", "shared"))
+def test_user_state_is_updated_on_write(
+    api_user_client, recipes, django_capture_on_commit_callbacks,
+    cache_backend, request,
+):
+    if cache_backend == "shared":
+        request.getfixturevalue("shared_cache")
+    url = reverse("api:recipes-detail", args=(recipes[1].id,))
+    favorite_url = reverse(
+        "api:recipes-post-and-del-favorite", args=(recipes[1].id,)
+    )
+    assert api_user_client.get(url).json()["is_favorited"] is False
+    with django_capture_on_commit_callbacks(execute=True):
+        api_user_client.post(favorite_url)
+    assert api_user_client.get(url).json()["is_favorited"] is True
+    with django_capture_on_commit_callbacks(execute=True):
+        api_user_client.delete(favorite_url)
+    assert api_user_client.get(url).json()["is_favorited"] is False
+
+
+def test_user_state_version_changes_after_commit(
+    auth_user, recipes, django_capture_on_commit_callbacks
+):
+    version = cache.get_or_set(
+        get_version_key(auth_user.id), get_initial_version, timeout=None
+    )
+    with django_capture_on_commit_callbacks() as callbacks:
+        IsFavorited.objects.create(user=auth_user, recipe=recipes[1])
+    assert cache.get(get_version_key(auth_user.id)) == version
+    for callback in callbacks:
+        callback()
+    assert cache.get(get_version_key(auth_user.id)) != version
+
+
+def test_recipe_list_user_flags(api_user_client, recipes):
+    response = api_user_client.get(
+        reverse("api:recipes-list"), {"limit": 10}
+    )
+    results = {item["id"]: item for item in response.json()["results"]}
+    for number, recipe in enumerate(recipes):
+        item = results[recipe.id]
+        assert item["is_favorited"] == (number % 2 == 0)
+        assert item["is_in_shopping_cart"] == (number % 3 == 0)
+        assert item["author"]["is_subscribed"] is True
+        assert len(item["tags"]) == 2
+        assert len(item["ingredients"]) == 2
+
+
+@pytest.fixture
+def subscriptions(django_user_model, auth_user):
+    authors = []
+    for number in range(6):
+        author = django_user_model.objects.create_user(
+            username=f"author{number}",
+            email=f"author{number}@mail.ru",
+            password="kolokol_1234",
+        )
+        create_recipes(author, count=number + 1)
+        Subscription.objects.create(user=auth_user, author=author)
+        authors.append(author)
+    return authors
+
+
+def test_subscriptions_queries_do_not_depend_on_page_size(
+    api_user_client, subscriptions
+):
+    url = reverse("api:users-subscriptions")
+    for limit in (1, 3, 6):
+        with CaptureQueriesContext(connection) as context:
+            response = api_user_client.get(
+                url, {"limit": limit, "recipes_limit": 2}
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()["results"]) == limit
+        assert len(context.captured_queries) == 4
+
+
+def test_subscriptions_recipes_limit(api_user_client, subscriptions):
+    response = api_user_client.get(
+        reverse("api:users-subscriptions"),
+        {"limit": 6, "recipes_limit": 3},
+    )
+    for item, author in zip(response.json()["results"], subscriptions):
+        expected = author.recipes.order_by("-pub_date", "-id")[:3]
+        assert item["id"] == author.id
+        assert item["recipes_count"] == author.recipes.count()
+        assert [recipe["id"] for recipe in item["recipes"]] == [
+            recipe.id for recipe in expected
+        ]
+
+
+def test_subscriptions_recipes_limit_must_be_number(
+    api_user_client, subscriptions
+):
+    response = api_user_client.get(
+        reverse("api:users-subscriptions"), {"recipes_limit": "много"}
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_filter_by_several_tags_has_no_duplicates(
+    api_client, recipes, django_assert_num_queries
+):
+    # Кеш холодный: в бюджет входит и загрузка словаря тегов.
+    with django_assert_num_queries(5):
+        response = api_client.get(
+            reverse("api:recipes-list"),
+            {"tags": ["slug", "second"], "limit": 20},
+        )
+    ids = [item["id"] for item in response.json()["results"]]
+    assert response.json()["count"] == len(recipes)
+    assert sorted(ids) == sorted(recipe.id for recipe in recipes)
+
+
+def test_filter_by_unknown_tag(api_client, recipes):
+    response = api_client.get(
+        reverse("api:recipes-list"), {"tags": ["unknown"]}
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,231 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.files.base import ContentFile
+from django.urls import get_resolver, reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.shopping_list import get_export_storage
+from recipes.models import (IngredientRecipe, IsFavorited, IsInShoppingCart,
+                            Recipe, TagRecipes, User)
+from tasks.models import Task
+
+from .conftest import new_password, new_user
+from .factories import PASSWORD, seed
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def dataset(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.SHOPPING_LIST_EXPORT_ROOT = tmp_path
+    return seed(
+        users=50, recipes=200, ingredients=50, favorites_per_user=20,
+        cart_per_user=5, subscriptions_per_user=10,
+    )
+
+
+@pytest.fixture
+def user(dataset):
+    return User.objects.get(id=dataset.users[0])
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION="Token " + Token.objects.create(user=user).key
+    )
+    return client
+
+
+def favorite_id(user):
+    return IsFavorited.objects.filter(user=user).values_list(
+        "recipe_id", flat=True
+    )[0]
+
+
+def cart_id(user):
+    return IsInShoppingCart.objects.filter(user=user).values_list(
+        "recipe_id", flat=True
+    )[0]
+
+
+def other_recipe_id(user):
+    return (
+        Recipe.objects.exclude(isfavorited__user=user)
+        .exclude(isinshoppingcart__user=user)
+        .values_list("id", flat=True)[0]
+    )
+
+
+def own_recipe_id(user):
+    return user.recipes.values_list("id", flat=True)[0]
+
+
+def tag_id():
+    return TagRecipes.objects.values_list("tag_id", flat=True)[0]
+
+
+def ingredient_id():
+    return IngredientRecipe.objects.values_list("ingredient_id", flat=True)[0]
+
+
+def update_payload():
+    recipe_ingredients = IngredientRecipe.objects.all()[:8]
+    return {
+        "ingredients": [
+            {"id": item.ingredient_id, "amount": item.amount + 1}
+            for item in recipe_ingredients
+        ],
+        "tags": [tag_id()],
+        "name": "Новое имя",
+        "text": "Новое описание",
+        "cooking_time": 15,
+    }
+
+
+def pantry_payload():
+    return {
+        "ingredients": list(
+            IngredientRecipe.objects.values_list(
+                "ingredient_id", flat=True
+            ).distinct()[:5]
+        )
+    }
+
+
+def subscribed_id(user):
+    return user.subscriptions.values_list("author_id", flat=True)[0]
+
+
+def not_subscribed_id(user):
+    return (
+        User.objects.exclude(id=user.id)
+        .exclude(id__in=user.subscriptions.values("author_id"))
+        .values_list("id", flat=True)[0]
+    )
+
+
+def export_task_id(user):
+    return Task.objects.create(name="export", user=user).id
+
+
+def done_export_task_id(user):
+    name = get_export_storage().save(
+        "shopping_lists/export.txt", ContentFile(b"")
+    )
+    return Task.objects.create(
+        name="export",
+        user=user,
+        status=Task.DONE,
+        result={"file": name, "format": "txt"},
+    ).id
+
+
+# (имя маршрута, метод, аргументы, данные, анонимно, статус, бюджет)
+# Аргументы анонимных запросов не зависят от пользователя.
+ENDPOINTS = (
+    ("api:api-root", "get", None, None, True, HTTPStatus.OK, 0),
+    ("api:login", "post", None, {"email": "user0@mail.ru",
+                                 "password": PASSWORD},
+     True, HTTPStatus.OK, 3),
+    ("api:logout", "post", None, None, False, HTTPStatus.NO_CONTENT, 2),
+    ("api:users-list", "get", None, None, False, HTTPStatus.OK, 4),
+    ("api:users-list", "post", None, new_user, True, HTTPStatus.CREATED, 5),
+    ("api:users-me", "get", None, None, False, HTTPStatus.OK, 2),
+    ("api:users-set-password", "post", None, new_password, False,
+     HTTPStatus.NO_CONTENT, 2),
+    ("api:users-subscriptions", "get", None, None, False, HTTPStatus.OK, 4),
+    ("api:users-detail", "get", lambda user: user.id, None, False,
+     HTTPStatus.OK, 3),
+    ("api:users-post-and-delete-subscribe", "post", not_subscribed_id,
+     None, False, HTTPStatus.CREATED, 9),
+    ("api:users-post-and-delete-subscribe", "delete", subscribed_id,
+     None, False, HTTPStatus.NO_CONTENT, 7),
+    ("api:tags-list", "get", None, None, True, HTTPStatus.OK, 1),
+    ("api:tags-detail", "get", tag_id, None, True, HTTPStatus.OK, 1),
+    ("api:ingredients-list", "get", None, None, True, HTTPStatus.OK, 1),
+    ("api:ingredients-detail", "get", ingredient_id, None, True,
+     HTTPStatus.OK, 1),
+    ("api:recipes-list", "get", None, None, True, HTTPStatus.OK, 5),
+    ("api:recipes-list", "get", None, None, False, HTTPStatus.OK, 7),
+    ("api:recipes-search", "get", None, {"q": "рецепт"}, True,
+     HTTPStatus.OK, 5),
+    ("api:recipes-search", "get", None, {"q": "рецепт", "tags": "t1"},
+     False, HTTPStatus.OK, 7),
+    ("api:recipes-what-can-i-cook", "get", None, pantry_payload, True,
+     HTTPStatus.OK, 4),
+    ("api:recipes-what-can-i-cook", "get", None, pantry_payload, False,
+     HTTPStatus.OK, 7),
+    ("api:recipes-detail", "get", own_recipe_id, None, False,
+     HTTPStatus.OK, 6),
+    ("api:recipes-detail", "patch", own_recipe_id, update_payload,
+     False, HTTPStatus.OK, 29),
+    ("api:recipes-detail", "delete", own_recipe_id, None, False,
+     HTTPStatus.NO_CONTENT, 21),
+    ("api:recipes-post-and-del-favorite", "post", other_recipe_id, None,
+     False, HTTPStatus.CREATED, 7),
+    ("api:recipes-post-and-del-favorite", "delete", favorite_id, None,
+     False, HTTPStatus.NO_CONTENT, 7),
+    ("api:recipes-post-and-delete-shopping-cart", "post", other_recipe_id,
+     None, False, HTTPStatus.CREATED, 11),
+    ("api:recipes-post-and-delete-shopping-cart", "delete", cart_id, None,
+     False, HTTPStatus.NO_CONTENT, 8),
+    ("api:recipes-download-shopping-cart", "get", None, None, False,
+     HTTPStatus.OK, 2),
+    ("api:recipes-shopping-cart-summary", "get", None, None, False,
+     HTTPStatus.OK, 2),
+    ("api:recipes-export-shopping-cart", "post", None, None, False,
+     HTTPStatus.ACCEPTED, 2),
+    ("api:tasks-detail", "get", export_task_id, None, False,
+     HTTPStatus.OK, 2),
+    ("api:tasks-download", "get", done_export_task_id, None, False,
+     HTTPStatus.OK, 2),
+)
+
+
+def get_api_url_names():
+    resolver = get_resolver()
+    _, api_resolver = resolver.namespace_dict["api"]
+    return {
+        f"api:{name}"
+        for name in api_resolver.reverse_dict
+        if isinstance(name, str)
+    }
+
+
+def test_every_endpoint_has_budget():
+    assert get_api_url_names() == {endpoint[0] for endpoint in ENDPOINTS}
+
+
+@pytest.mark.parametrize(
+    "url_name, method, get_arg, data, anonymous, status, budget",
+    ENDPOINTS,
+    ids=[f"{endpoint[1]}-{endpoint[0]}" for endpoint in ENDPOINTS],
+)
+def test_endpoint_query_budget(
+    url_name, method, get_arg, data, anonymous, status, budget,
+    user, user_client, django_assert_max_num_queries,
+):
+    """
+    Бюджет считается при холодном кеше: перед каждым тестом кеши
+    очищает автоматическая фикстура reset_caches из conftest.py.
+    Бюджет не должен зависеть от объема данных, поэтому новый запрос
+    на каждый объект страницы сразу выводит эндпоинт за бюджет.
+    """
+    client = APIClient() if anonymous else user_client
+    if get_arg is None:
+        args = None
+    elif anonymous:
+        args = (get_arg(),)
+    else:
+        args = (get_arg(user),)
+    url = reverse(url_name, args=args)
+    if callable(data):
+        data = data()
+    with django_assert_max_num_queries(budget):
+        response = getattr(client, method)(url, data=data, format="json")
+    assert response.status_code == status, response.content
@@ -0,0 +1,133 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from recipes.models import (IsFavorited, IsInShoppingCart, Recipe,
+                            RecipeRanking, TagRecipes)
+from recipes.ranking import update_rankings
+
+from .test_pagination import walk_cursor_pages
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_scores(field):
+    return dict(RecipeRanking.objects.values_list("recipe_id", field))
+
+
+def test_popular_score_uses_counters(recipes):
+    assert update_rankings() == len(recipes)
+    scores = get_scores("popular_score")
+    for recipe in Recipe.objects.all():
+        assert scores[recipe.id] == (
+            recipe.favorites_count * 2 + recipe.in_carts_count
+        )
+
+
+def test_recent_activity_is_trending(recipes, auth_user, author):
+    old, fresh = recipes[1], recipes[5]
+    IsFavorited.objects.create(user=author, recipe=old)
+    for user in (auth_user, author):
+        IsInShoppingCart.objects.create(user=user, recipe=old)
+    week_ago = timezone.now() - timedelta(days=7)
+    IsFavorited.objects.filter(recipe=old).update(created=week_ago)
+    IsInShoppingCart.objects.filter(recipe=old).update(created=week_ago)
+    IsFavorited.objects.create(user=author, recipe=fresh)
+
+    update_rankings()
+    popular = get_scores("popular_score")
+    trending = get_scores("trending_score")
+    assert popular[old.id] > popular[fresh.id]
+    assert trending[fresh.id] > trending[old.id] > 0
+    assert trending[recipes[7].id] == 0
+
+
+def test_incremental_update_touches_only_changed_recipes(
+    recipes, auth_user
+):
+    hour_ago = timezone.now() - timedelta(hours=1)
+    IsFavorited.objects.update(created=hour_ago)
+    IsInShoppingCart.objects.update(created=hour_ago)
+    update_rankings()
+    assert update_rankings() == 0
+
+    IsInShoppingCart.objects.create(user=auth_user, recipe=recipes[1])
+    IsFavorited.objects.get(user=auth_user, recipe=recipes[4]).delete()
+    assert update_rankings() == 2
+    scores = get_scores("popular_score")
+    assert scores[recipes[1].id] == 1
+    assert scores[recipes[4].id] == 0
+    assert get_scores("trending_score")[recipes[4].id] == 0
+
+
+def test_counter_change_marks_ranking_stale(recipes, auth_user):
+    update_rankings()
+    assert not Recipe.objects.filter(ranking_stale=True).exists()
+    IsFavorited.objects.get(user=auth_user, recipe=recipes[4]).delete()
+    assert list(
+        Recipe.objects.filter(ranking_stale=True).values_list("id", flat=True)
+    ) == [recipes[4].id]
+
+
+def test_full_update_command(recipes):
+    update_rankings()
+    RecipeRanking.objects.update(trending_score=0)
+    call_command("update_rankings", full=True, batch_size=3)
+    assert all(
+        score > 0
+        for recipe_id, score in get_scores("trending_score").items()
+        if recipe_id in {recipe.id for recipe in recipes[::2]}
+    )
+
+
+@pytest.mark.parametrize("ordering", ("popular", "trending"))
+def test_ranked_feed_with_filters_and_cursor(
+    api_client, recipes, tag, ordering
+):
+    untagged = recipes[0]
+    TagRecipes.objects.filter(recipe=untagged, tag=tag).delete()
+    update_rankings()
+
+    ids, _ = walk_cursor_pages(
+        api_client,
+        reverse("api:recipes-list"),
+        {
+            "pagination": "cursor",
+            "ordering": ordering,
+            "tags": tag.slug,
+            "limit": 2,
+        },
+    )
+    score = f"{ordering}_score"
+    expected = (
+        RecipeRanking.objects.exclude(recipe=untagged)
+        .order_by(f"-{score}", "-recipe_id")
+        .values_list("recipe_id", flat=True)
+    )
+    assert ids == list(expected)
+    assert len(ids) == len(recipes) - 1
+
+
+def test_ranked_feed_page_pagination(api_client, recipes):
+    update_rankings()
+    response = api_client.get(
+        reverse("api:recipes-list"), {"ordering": "popular", "limit": 3}
+    )
+    assert response.status_code == HTTPStatus.OK
+    expected = RecipeRanking.objects.order_by(
+        "-popular_score", "-recipe_id"
+    ).values_list("recipe_id", flat=True)[:3]
+    assert [item["id"] for item in response.json()["results"]] == list(
+        expected
+    )
+
+
+def test_unknown_ordering_is_rejected(api_client, recipes):
+    response = api_client.get(
+        reverse("api:recipes-list"), {"ordering": "random"}
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,126 @@
+import base64
+import io
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from recipes.models import Ingredient, IngredientRecipe, Recipe
+
+pytestmark = [pytest.mark.django_db]
+
+CREATE_QUERIES_BUDGET = 20
+UPDATE_QUERIES_BUDGET = 25
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.fixture
+def image():
+    buffer = io.BytesIO()
+    Image.new("RGB", (2, 2)).save(buffer, format="PNG")
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f"data:image/png;base64,{encoded}"
+
+
+@pytest.fixture
+def ingredients():
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f"Ингредиент {number}", measurement_unit="г")
+        for number in range(30)
+    )
+    return list(Ingredient.objects.all())
+
+
+def get_payload(image, tag, ingredients, amount=1):
+    return {
+        "ingredients": [
+            {"id": ingredient.id, "amount": amount}
+            for ingredient in ingredients
+        ],
+        "tags": [tag.id],
+        "image": image,
+        "name": "Рецепт",
+        "text": "Описание рецепта",
+        "cooking_time": 10,
+    }
+
+
+def create_recipe(client, payload):
+    cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = client.post(
+            reverse("api:recipes-list"), data=payload, format="json"
+        )
+    assert response.status_code == HTTPStatus.CREATED, response.json()
+    return response, len(context.captured_queries)
+
+
+def test_create_queries_do_not_depend_on_ingredients_count(
+    api_user_client, image, tag, ingredients
+):
+    _, one_ingredient = create_recipe(
+        api_user_client, get_payload(image, tag, ingredients[:1])
+    )
+    response, all_ingredients = create_recipe(
+        api_user_client, get_payload(image, tag, ingredients)
+    )
+    assert len(response.json()["ingredients"]) == len(ingredients)
+    assert one_ingredient == all_ingredients <= CREATE_QUERIES_BUDGET
+
+
+def test_update_applies_only_changed_ingredients(
+    api_user_client, image, tag, ingredients, shared_cache
+):
+    response, _ = create_recipe(
+        api_user_client, get_payload(image, tag, ingredients[:20])
+    )
+    recipe = Recipe.objects.get(id=response.json()["id"])
+    kept = {
+        item.ingredient_id: item.id
+        for item in recipe.rec_ingredients.filter(
+            ingredient__in=ingredients[5:20]
+        )
+    }
+    payload = get_payload(image, tag, ingredients[5:30])
+    payload["ingredients"][0]["amount"] = 5
+    with CaptureQueriesContext(connection) as context:
+        response = api_user_client.patch(
+            reverse("api:recipes-detail", args=(recipe.id,)),
+            data=payload,
+            format="json",
+        )
+    assert response.status_code == HTTPStatus.OK, response.json()
+    assert len(context.captured_queries) <= UPDATE_QUERIES_BUDGET
+    current = {
+        item.ingredient_id: item
+        for item in IngredientRecipe.objects.filter(recipe=recipe)
+    }
+    assert set(current) == {ingredient.id for ingredient in ingredients[5:]}
+    assert all(current[id].id == item_id for id, item_id in kept.items())
+    assert current[ingredients[5].id].amount == 5
+    assert current[ingredients[6].id].amount == 1
+
+
+def test_unknown_ingredients_are_reported_together(
+    api_user_client, image, tag, ingredients
+):
+    payload = get_payload(image, tag, ingredients[:2])
+    payload["ingredients"] += [
+        {"id": 1000, "amount": 1},
+        {"id": 1001, "amount": 1},
+    ]
+    with CaptureQueriesContext(connection) as context:
+        response = api_user_client.post(
+            reverse("api:recipes-list"), data=payload, format="json"
+        )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert "1000, 1001" in str(response.json()["ingredients"])
+    assert len(context.captured_queries) <= 3
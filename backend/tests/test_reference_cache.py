@@ -0,0 +1,83 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from recipes.importer import import_ingredients
+from recipes.models import Ingredient, Tag
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.mark.parametrize(
+    "url",
+    (
+        reverse("api:tags-list"),
+        reverse("api:ingredients-list"),
+        reverse("api:ingredients-list") + "?name=Назв",
+    ),
+)
+def test_cached_response_does_not_query_db(
+    api_user_client, tag, ingredient, url, django_assert_num_queries
+):
+    response = api_user_client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert response["ETag"]
+    assert response["Last-Modified"]
+    with django_assert_num_queries(0):
+        cached = api_user_client.get(url)
+    assert cached.json() == response.json()
+    assert cached["ETag"] == response["ETag"]
+    with django_assert_num_queries(0):
+        not_modified = api_user_client.get(
+            url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+    assert not_modified["ETag"] == response["ETag"]
+
+
+def test_cache_is_invalidated_on_change(
+    client, tag, django_capture_on_commit_callbacks
+):
+    url = reverse("api:tags-list")
+    response = client.get(url)
+    with django_capture_on_commit_callbacks() as callbacks:
+        Tag.objects.create(name="Новый тег", color="#000000", slug="new")
+    assert client.get(url)["ETag"] == response["ETag"]
+    for callback in callbacks:
+        callback()
+    changed = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert changed.status_code == HTTPStatus.OK
+    assert len(changed.json()) == 2
+    assert changed["ETag"] != response["ETag"]
+
+
+def test_import_invalidates_ingredient_cache(
+    client, ingredient, django_capture_on_commit_callbacks
+):
+    url = reverse("api:ingredients-list")
+    assert len(client.get(url, {"name": "Соль"}).json()) == 0
+    with django_capture_on_commit_callbacks(execute=True):
+        import_ingredients([("Соль", "г")])
+    assert len(client.get(url, {"name": "Соль"}).json()) == 1
+
+
+def test_retrieve_is_cached_per_object(client, ingredient):
+    second = Ingredient.objects.create(name="Соль", measurement_unit="г")
+    first_response = client.get(
+        reverse("api:ingredients-detail", args=(ingredient.id,))
+    )
+    second_response = client.get(
+        reverse("api:ingredients-detail", args=(second.id,))
+    )
+    assert first_response.json()["name"] == ingredient.name
+    assert second_response.json()["name"] == second.name
+
+
+def test_missing_object_is_not_cached(client, ingredient):
+    url = reverse("api:ingredients-detail", args=(ingredient.id + 1,))
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+    Ingredient.objects.create(
+        id=ingredient.id + 1, name="Соль", measurement_unit="г"
+    )
+    assert client.get(url).status_code == HTTPStatus.OK
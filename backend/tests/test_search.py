@@ -0,0 +1,165 @@
+from http import HTTPStatus
+from importlib import import_module
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.urls import reverse
+
+from recipes.models import (Ingredient, IngredientRecipe, Recipe,
+                            RecipeSearchTerm, Tag, TagRecipes)
+from recipes.search import (get_terms, reindex_ingredient_recipes,
+                            search_recipes, update_search_index)
+from tasks.models import Task
+
+pytestmark = [pytest.mark.django_db]
+
+RECIPES = (
+    ("Картофельное пюре", "Отварить и размять", ("Картофель", "Молоко")),
+    ("Салат", "Нарезать картофель кубиками", ("Огурец", "Яйцо")),
+    ("Омлет", "Взбить яйца с молоком", ("Яйцо", "Молоко")),
+    ("Драники", "Натереть", ("Картофель", "Лук")),
+)
+
+
+@pytest.fixture
+def search_recipes_data(author, tag):
+    ingredients = {}
+    recipes = {}
+    for name, text, ingredient_names in RECIPES:
+        recipe = Recipe.objects.create(
+            name=name, text=text, author=author, cooking_time=10,
+            image="recipes_image/image.png",
+        )
+        for ingredient_name in ingredient_names:
+            if ingredient_name not in ingredients:
+                ingredients[ingredient_name] = Ingredient.objects.create(
+                    name=ingredient_name, measurement_unit="г"
+                )
+            IngredientRecipe.objects.create(
+                recipe=recipe,
+                ingredient=ingredients[ingredient_name],
+                amount=1,
+            )
+        recipes[name] = recipe
+    TagRecipes.objects.create(recipe=recipes["Драники"], tag=tag)
+    update_search_index()
+    return recipes
+
+
+def search(client, **params):
+    return client.get(reverse("api:recipes-search"), params)
+
+
+def names(response):
+    return [recipe["name"] for recipe in response.json()["results"]]
+
+
+def test_get_terms_normalizes_word_forms():
+    assert get_terms("Картошки с луком и ЁЖИКАМИ") == [
+        "картошк", "лук", "ежик"
+    ]
+    assert get_terms("картошка") == get_terms("картошки")
+
+
+def test_search_ranks_title_above_ingredients_and_text(
+    client, search_recipes_data
+):
+    response = search(client, q="картофель")
+    assert response.status_code == HTTPStatus.OK
+    assert names(response) == ["Картофельное пюре", "Драники", "Салат"]
+
+
+def test_search_requires_all_words(client, search_recipes_data):
+    assert names(search(client, q="яйцо молоко")) == ["Омлет"]
+
+
+def test_search_matches_prefix_of_last_word(client, search_recipes_data):
+    assert names(search(client, q="драни")) == ["Драники"]
+
+
+def test_search_combines_with_filters(client, search_recipes_data, tag):
+    response = search(client, q="картофель", tags=tag.slug)
+    assert names(response) == ["Драники"]
+
+
+def test_search_is_paginated(client, search_recipes_data):
+    response = search(client, q="картофель", limit=2)
+    data = response.json()
+    assert data["count"] == 3
+    assert len(data["results"]) == 2
+    assert data["next"] is not None
+
+
+def test_search_requires_query(client, search_recipes_data):
+    response = search(client, q=" ")
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_recipe_update_reindexes_recipe(
+    api_user_client, auth_user, search_recipes_data
+):
+    recipe = search_recipes_data["Омлет"]
+    Recipe.objects.filter(id=recipe.id).update(author=auth_user)
+    ingredient = Ingredient.objects.get(name="Лук")
+    response = api_user_client.patch(
+        reverse("api:recipes-detail", args=(recipe.id,)),
+        {
+            "ingredients": [{"id": ingredient.id, "amount": 2}],
+            "tags": [Tag.objects.get().id],
+            "name": "Луковый омлет",
+            "text": "Обжарить",
+            "cooking_time": 5,
+        },
+        format="json",
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert names(search(api_user_client, q="лук"))[0] == "Луковый омлет"
+    assert "Луковый омлет" not in names(search(api_user_client, q="молоко"))
+
+
+def test_ingredient_rename_reindexes_recipes(
+    client, search_recipes_data, django_capture_on_commit_callbacks
+):
+    ingredient = Ingredient.objects.get(name="Огурец")
+    ingredient.name = "Помидор"
+    with django_capture_on_commit_callbacks(execute=True):
+        ingredient.save()
+    assert names(search(client, q="помидор")) == ["Салат"]
+    assert names(search(client, q="огурец")) == []
+
+
+def test_ingredient_save_without_rename_skips_reindex(search_recipes_data):
+    ingredient = Ingredient.objects.get(name="Огурец")
+    ingredient.measurement_unit = "кг"
+    ingredient.save()
+    ingredient.save(update_fields=["measurement_unit"])
+    ingredient.name = "Помидор"
+    ingredient.save(update_fields=["measurement_unit"])
+    assert not Task.objects.filter(
+        name=reindex_ingredient_recipes.name
+    ).exists()
+
+
+def test_deleted_recipe_leaves_index(search_recipes_data):
+    recipe = search_recipes_data["Салат"]
+    recipe.delete()
+    assert not RecipeSearchTerm.objects.filter(recipe_id=recipe.id).exists()
+    assert not search_recipes(Recipe.objects.all(), "огурец").exists()
+
+
+def test_command_rebuilds_index(client, search_recipes_data):
+    RecipeSearchTerm.objects.all().delete()
+    call_command("update_search_index", batch_size=2)
+    assert names(search(client, q="омлет")) == ["Омлет"]
+
+
+def test_migration_fills_index(client, search_recipes_data):
+    RecipeSearchTerm.objects.all().delete()
+    state = MigrationExecutor(connection).loader.project_state(
+        ("recipes", "0009_recipe_search")
+    )
+    migration = import_module("recipes.migrations.0009_recipe_search")
+    migration.fill_search_index(state.apps, connection.schema_editor())
+    assert names(search(client, q="омлет")) == ["Омлет"]
@@ -0,0 +1,180 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+from reportlab.pdfbase import pdfmetrics
+
+from api.shopping_list import render_pdf
+
+from recipes.cart import get_cart_totals, recount_cart_totals
+from recipes.models import (Ingredient, IngredientRecipe, IsInShoppingCart,
+                            Recipe)
+
+pytestmark = [pytest.mark.django_db]
+
+URL = reverse("api:recipes-download-shopping-cart")
+SUMMARY_URL = reverse("api:recipes-shopping-cart-summary")
+
+
+def get_content(response):
+    return b"".join(response.streaming_content).decode()
+
+
+def test_shopping_list_is_aggregated_and_sorted(api_user_client, recipes):
+    response = api_user_client.get(URL)
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Type"].startswith("text/plain")
+    assert get_content(response) == (
+        "Второй ингредиент - 4 г\n"
+        "Название ингредиента - 4 Единица измерения\n"
+    )
+
+
+def test_shopping_list_csv(api_user_client, recipes):
+    response = api_user_client.get(URL, {"file_format": "csv"})
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Type"].startswith("text/csv")
+    assert get_content(response).splitlines() == [
+        "Ингредиент,Количество,Единица измерения",
+        "Второй ингредиент,4,г",
+        "Название ингредиента,4,Единица измерения",
+    ]
+
+
+def test_shopping_list_pdf(api_user_client, recipes):
+    response = api_user_client.get(URL, {"file_format": "pdf"})
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Type"] == "application/pdf"
+    assert b"".join(response.streaming_content).startswith(b"%PDF")
+
+
+def test_pdf_without_cyrillic_font_fails(settings, tmp_path, monkeypatch):
+    settings.SHOPPING_LIST_PDF_FONT = str(tmp_path / "missing.ttf")
+    monkeypatch.setattr(pdfmetrics, "getRegisteredFontNames", list)
+    with pytest.raises(ImproperlyConfigured):
+        render_pdf([])
+
+
+def test_shopping_list_unknown_format(api_user_client, recipes):
+    response = api_user_client.get(URL, {"file_format": "doc"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_shopping_list_for_anon_user(api_client):
+    assert api_client.get(URL).status_code == HTTPStatus.UNAUTHORIZED
+
+
+def cart_url(recipe):
+    return reverse(
+        "api:recipes-post-and-delete-shopping-cart", args=(recipe.id,)
+    )
+
+
+@pytest.fixture
+def flour_recipes(author):
+    grams = Ingredient.objects.create(name="Мука", measurement_unit="г")
+    kilograms = Ingredient.objects.create(name="Мука", measurement_unit="кг")
+    litres = Ingredient.objects.create(name="Молоко", measurement_unit="л")
+    millilitres = Ingredient.objects.create(
+        name="Молоко", measurement_unit="мл"
+    )
+    recipes = []
+    for ingredients in (
+        ((grams, 700), (millilitres, 300)),
+        ((kilograms, 1), (litres, 2)),
+    ):
+        recipe = Recipe.objects.create(
+            name="Блины", text="Смешать", author=author, cooking_time=20,
+            image="recipes_image/image.png",
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(recipe=recipe, ingredient=item, amount=amount)
+            for item, amount in ingredients
+        )
+        recipes.append(recipe)
+    return recipes
+
+
+def test_summary_is_aggregated(api_user_client, recipes):
+    response = api_user_client.get(SUMMARY_URL)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == [
+        {"name": "Второй ингредиент", "amount": 4, "measurement_unit": "г"},
+        {
+            "name": "Название ингредиента",
+            "amount": 4,
+            "measurement_unit": "Единица измерения",
+        },
+    ]
+
+
+def test_summary_for_anon_user(api_client):
+    assert api_client.get(SUMMARY_URL).status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_summary_normalizes_units(api_user_client, flour_recipes):
+    for recipe in flour_recipes:
+        api_user_client.post(cart_url(recipe))
+    assert api_user_client.get(SUMMARY_URL).json() == [
+        {"name": "Молоко", "amount": 2.3, "measurement_unit": "л"},
+        {"name": "Мука", "amount": 1.7, "measurement_unit": "кг"},
+    ]
+    api_user_client.delete(cart_url(flour_recipes[1]))
+    assert get_content(api_user_client.get(URL)) == (
+        "Молоко - 300 мл\n"
+        "Мука - 700 г\n"
+    )
+
+
+def test_totals_follow_cart_changes(api_user_client, auth_user, recipes):
+    api_user_client.post(cart_url(recipes[1]))
+    assert [item["amount"] for item in get_cart_totals(auth_user)] == [5, 5]
+    api_user_client.delete(cart_url(recipes[0]))
+    api_user_client.delete(cart_url(recipes[3]))
+    assert [item["amount"] for item in get_cart_totals(auth_user)] == [3, 3]
+    assert recount_cart_totals() == 0
+
+
+def test_recipe_update_changes_totals(api_user_client, auth_user, tag, recipes):
+    recipe = recipes[0]
+    Recipe.objects.filter(id=recipe.id).update(author=auth_user)
+    second = Ingredient.objects.get(name="Второй ингредиент")
+    third = Ingredient.objects.create(
+        name="Третий ингредиент", measurement_unit="г"
+    )
+    response = api_user_client.patch(
+        reverse("api:recipes-detail", args=(recipe.id,)),
+        {
+            "ingredients": [
+                {"id": second.id, "amount": 10},
+                {"id": third.id, "amount": 5},
+            ],
+            "tags": [tag.id],
+            "name": recipe.name,
+            "text": recipe.text,
+            "cooking_time": 5,
+        },
+        format="json",
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert get_content(api_user_client.get(URL)) == (
+        "Второй ингредиент - 13 г\n"
+        "Название ингредиента - 3 Единица измерения\n"
+        "Третий ингредиент - 5 г\n"
+    )
+    assert recount_cart_totals() == 0
+
+
+def test_recipe_delete_changes_totals(auth_user, recipes):
+    recipes[0].delete()
+    assert [item["amount"] for item in get_cart_totals(auth_user)] == [3, 3]
+    assert recount_cart_totals() == 0
+
+
+def test_recount_restores_totals(auth_user, recipes):
+    IsInShoppingCart.objects.bulk_create(
+        [IsInShoppingCart(user=auth_user, recipe=recipes[1])]
+    )
+    assert recount_cart_totals() == 2
+    assert [item["amount"] for item in get_cart_totals(auth_user)] == [5, 5]
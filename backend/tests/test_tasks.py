@@ -0,0 +1,215 @@
+import io
+import os
+import re
+import time
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from api.shopping_list import export_shopping_list, get_export_storage
+from tasks.models import Task
+from tasks.registry import enqueue, task
+from tasks import worker
+from tasks.worker import claim_task, execute_task, run_eager
+
+pytestmark = [pytest.mark.django_db]
+
+calls = []
+
+
+@task(max_attempts=2, retry_delay=60)
+def flaky(value):
+    calls.append(value)
+    if len(calls) == 1:
+        raise RuntimeError("first attempt fails")
+    return value * 2
+
+
+@task()
+def add(first, second):
+    return first + second
+
+
+@pytest.fixture(autouse=True)
+def queue(settings):
+    settings.TASKS_EAGER = False
+    calls.clear()
+
+
+def test_worker_runs_task_and_stores_result():
+    queued = add.delay(2, 3)
+    claimed = claim_task()
+    assert claimed.id == queued.id
+    assert claimed.status == Task.RUNNING
+    assert claim_task() is None
+
+    execute_task(claimed)
+    queued.refresh_from_db()
+    assert queued.status == Task.DONE
+    assert queued.result == 5
+    assert queued.locked_until is None
+
+
+def test_failed_task_is_retried_after_delay():
+    queued = flaky.delay(21)
+    execute_task(claim_task())
+    queued.refresh_from_db()
+    assert queued.status == Task.QUEUED
+    assert "first attempt fails" in queued.error
+    assert queued.run_after > timezone.now() + timedelta(seconds=50)
+    assert claim_task() is None
+
+    Task.objects.update(run_after=timezone.now())
+    execute_task(claim_task())
+    queued.refresh_from_db()
+    assert queued.status == Task.DONE
+    assert queued.attempts == 2
+    assert queued.result == 42
+
+
+def test_task_fails_when_attempts_are_exhausted():
+    queued = enqueue(flaky, args=(1,))
+    Task.objects.update(max_attempts=1)
+    execute_task(claim_task())
+    queued.refresh_from_db()
+    assert queued.status == Task.FAILED
+
+
+def test_expired_lock_makes_task_visible_again():
+    queued = add.delay(1, 1)
+    lost = claim_task()
+    Task.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+
+    reclaimed = claim_task()
+    assert reclaimed.id == queued.id
+    assert reclaimed.attempts == 2
+    execute_task(lost)
+    queued.refresh_from_db()
+    assert queued.status == Task.RUNNING
+
+    execute_task(reclaimed)
+    queued.refresh_from_db()
+    assert queued.status == Task.DONE
+
+
+def test_unknown_task_fails():
+    Task.objects.create(name="tasks.missing.task", max_attempts=3)
+    execute_task(claim_task())
+    assert Task.objects.get().status == Task.FAILED
+
+
+def test_run_workers_burst():
+    for number in range(3):
+        add.delay(number, number)
+    call_command("run_workers", processes=0, burst=True)
+    assert list(Task.objects.values_list("status", "result")) == [
+        (Task.DONE, 0),
+        (Task.DONE, 2),
+        (Task.DONE, 4),
+    ]
+
+
+def test_eager_mode_runs_after_commit(
+    settings, django_capture_on_commit_callbacks
+):
+    settings.TASKS_EAGER = True
+    with django_capture_on_commit_callbacks(execute=True):
+        queued = flaky.delay(5)
+    queued.refresh_from_db()
+    assert queued.status == Task.DONE
+    assert calls == [5, 5]
+
+
+def test_eager_mode_skips_task_claimed_by_worker(monkeypatch):
+    queued = add.delay(2, 3)
+    lock_task = worker.lock_task
+
+    def claimed_first(task_id, *args):
+        Task.objects.filter(id=task_id).update(status=Task.RUNNING)
+        return lock_task(task_id, *args)
+
+    monkeypatch.setattr(worker, "lock_task", claimed_first)
+    task = run_eager(queued.id)
+    assert task.status == Task.RUNNING
+    assert task.result is None
+
+
+def test_export_shopping_cart(
+    settings,
+    tmp_path,
+    api_user_client,
+    recipes,
+    django_capture_on_commit_callbacks,
+):
+    settings.SHOPPING_LIST_EXPORT_ROOT = tmp_path
+    settings.TASKS_EAGER = True
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_user_client.post(
+            reverse("api:recipes-export-shopping-cart")
+            + "?file_format=csv"
+        )
+    assert response.status_code == HTTPStatus.ACCEPTED
+    task_url = response["Location"]
+
+    response = api_user_client.get(task_url)
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+    assert data["status"] == Task.DONE
+    task = Task.objects.get()
+    assert re.fullmatch(
+        r"shopping_lists/[0-9a-f]{32}\.csv", task.result["file"]
+    )
+    assert data["file"].endswith(
+        reverse("api:tasks-download", args=(task.id,))
+    )
+    response = api_user_client.get(data["file"])
+    assert response.status_code == HTTPStatus.OK
+    assert "shopping_list.csv" in response["Content-Disposition"]
+    content = b"".join(response.streaming_content).decode()
+    assert "Второй ингредиент,4,г" in content
+
+
+def test_export_is_downloaded_only_by_owner(
+    settings, tmp_path, api_user_client, django_user_model
+):
+    settings.SHOPPING_LIST_EXPORT_ROOT = tmp_path
+    other = django_user_model.objects.create_user(
+        username="other", email="other@mail.ru", password="kolokol_1234"
+    )
+    queued = enqueue(export_shopping_list, args=(other.id, "txt"), user=other)
+    execute_task(claim_task())
+    queued.refresh_from_db()
+    assert queued.status == Task.DONE
+    response = api_user_client.get(
+        reverse("api:tasks-download", args=(queued.id,))
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_old_exports_are_deleted(settings, tmp_path):
+    settings.SHOPPING_LIST_EXPORT_ROOT = tmp_path
+    storage = get_export_storage()
+    old = storage.save("shopping_lists/old.txt", ContentFile(b"old"))
+    new = storage.save("shopping_lists/new.txt", ContentFile(b"new"))
+    expired = time.time() - settings.SHOPPING_LIST_EXPORT_TTL - 60
+    os.utime(storage.path(old), (expired, expired))
+    call_command("delete_old_exports", stdout=io.StringIO())
+    assert not storage.exists(old)
+    assert storage.exists(new)
+
+
+def test_tasks_are_visible_only_to_owner(api_user_client, django_user_model):
+    other = django_user_model.objects.create_user(
+        username="other", email="other@mail.ru", password="kolokol_1234"
+    )
+    queued = enqueue(add, args=(1, 2), user=other)
+    response = api_user_client.get(
+        reverse("api:tasks-detail", args=(queued.id,))
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
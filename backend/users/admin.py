@@ -6,6 +6,14 @@ User = get_user_model()
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
-    list_display = ("id", "username", "email")
+    list_display = (
+        "id",
+        "username",
+        "email",
+        "recipes_count",
+        "followers_count",
+    )
 
     list_filter = ("username", "email")
+
+    readonly_fields = ("recipes_count", "followers_count")
@@ -17,6 +17,12 @@ class User(AbstractUser):
     first_name = models.CharField(max_length=USER_MAX_LEN)
     last_name = models.CharField(max_length=USER_MAX_LEN)
     password = models.CharField(max_length=USER_MAX_LEN)
+    recipes_count = models.PositiveIntegerField(
+        default=0, verbose_name="Рецептов"
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0, verbose_name="Подписчиков"
+    )
 
     class Meta:
         verbose_name = "Пользователь"
@@ -0,0 +1,330 @@
+"""
+Нагрузочное тестирование API по запросам postman-коллекции.
+
+Каждый виртуальный пользователь проходит сценарий из запросов
+коллекции: регистрация, получение токена, создание рецепта, лента
+рецептов, рецепт, избранное, список покупок и его скачивание.
+Переменные коллекции ({{email}}, {{firstRecipeId}} и т.д.) у каждого
+пользователя свои.
+
+Запуск против сервера разработки:
+    python load_test.py --users 200 --concurrency 1,10,50
+Для каждого уровня параллельности выводятся пропускная способность,
+перцентили задержек и доля ошибок по каждому запросу.
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import requests
+
+COLLECTION = Path(__file__).parent / "diploma.postman_collection.json"
+
+VARIABLE = re.compile(r"{{(\w+)}}")
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+@dataclass
+class Step:
+    """
+    Запрос коллекции с ожидаемым статусом ответа.
+    extract получает переменные пользователя и ответ и дополняет
+    переменные для следующих шагов.
+    """
+
+    name: str
+    status: int
+    extract: object = None
+    auth: bool = True
+
+
+def save_user_id(variables, response):
+    variables["userId"] = response.json()["id"]
+
+
+def save_token(variables, response):
+    variables["token"] = response.json()["auth_token"]
+
+
+def choose_recipe(variables, response):
+    results = response.json()["results"]
+    if results:
+        variables["firstRecipeId"] = random.choice(results)["id"]
+
+
+SCENARIO = (
+    Step("create_first_user", 201, save_user_id, auth=False),
+    Step("get_token_for_first_user", 200, save_token, auth=False),
+    Step("create_first_recipe // Second User", 201),
+    Step("get_recipes_list // User", 200, choose_recipe),
+    Step("get_recipes_list_with_two_tags_param // User", 200),
+    Step("get_recipe_detail // User", 200),
+    Step("add_to_favorite // User", 201),
+    Step("add_to_shopping_cart // User", 201),
+    Step("download_shopping_cart // User", 200),
+)
+
+
+def load_requests(path):
+    """
+    Возвращает запросы коллекции по имени и переменные коллекции.
+    """
+    with open(path, encoding="utf-8") as file:
+        collection = json.load(file)
+    found = {}
+
+    def walk(items):
+        for item in items:
+            if "item" in item:
+                walk(item["item"])
+            else:
+                found.setdefault(item["name"], item["request"])
+
+    walk(collection["item"])
+    variables = {
+        variable["key"]: variable["value"]
+        for variable in collection.get("variable", ())
+    }
+    return found, variables
+
+
+def render(template, variables, encode):
+    def replace(match):
+        value = variables[match.group(1)]
+        return encode(value)
+
+    return VARIABLE.sub(replace, template)
+
+
+def render_body(template, variables):
+    """
+    В теле запросов коллекции строковые переменные подставляются
+    без кавычек, поэтому значения кодируются в JSON.
+    """
+    return render(template, variables, json.dumps)
+
+
+@dataclass
+class Stats:
+    timings: dict = field(default_factory=lambda: defaultdict(list))
+    errors: dict = field(default_factory=lambda: defaultdict(int))
+    lock: object = field(default_factory=threading.Lock)
+
+    def add(self, name, duration, ok):
+        with self.lock:
+            self.timings[name].append(duration)
+            if not ok:
+                self.errors[name] += 1
+
+
+def get_endpoint(request):
+    """
+    Ключ статистики: метод и путь, в котором переменные заменены на :id.
+    """
+    path = request["url"]["raw"].replace("{{baseUrl}}", "")
+    return f"{request['method']} {VARIABLE.sub(':id', path)}"
+
+
+class VirtualUser:
+    def __init__(self, number, run_id, requests_by_name, variables):
+        self.requests = requests_by_name
+        self.variables = dict(variables)
+        self.variables.update(
+            email=f"loadtest-{run_id}-{number}@loadtest.ru",
+            username=f"loadtest-{run_id}-{number}",
+            password="LoadTestPas$word1",
+        )
+        self.session = requests.Session()
+
+    def send(self, step, stats):
+        request = self.requests[step.name]
+        url = render(request["url"]["raw"], self.variables, str)
+        headers = {"Content-Type": "application/json"}
+        if step.auth:
+            headers["Authorization"] = f"Token {self.variables['token']}"
+        body = (request.get("body") or {}).get("raw")
+        data = render_body(body, self.variables).encode() if body else None
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                request["method"], url, data=data, headers=headers,
+                timeout=30,
+            )
+        except requests.RequestException:
+            response = None
+        duration = time.perf_counter() - start
+        ok = response is not None and response.status_code == step.status
+        stats.add(get_endpoint(request), duration, ok)
+        if ok and step.extract is not None:
+            step.extract(self.variables, response)
+        return ok
+
+    def run(self, stats):
+        """
+        Выполняет сценарий до первой ошибки: следующие шаги
+        зависят от переменных, полученных на предыдущих.
+        """
+        for step in SCENARIO:
+            if not self.send(step, stats):
+                return
+
+
+def decode(value):
+    """
+    Значения переменных коллекции записаны как литералы JSON.
+    """
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def prepare_variables(base_url, variables):
+    """
+    Заполняет переменные коллекции, которые в Postman задают тесты:
+    id тегов и ингредиентов берутся из API.
+    """
+    tags = requests.get(f"{base_url}/api/tags/", timeout=30).json()
+    ingredients = requests.get(
+        f"{base_url}/api/ingredients/", timeout=30
+    ).json()
+    if len(tags) < 3 or len(ingredients) < 2:
+        sys.exit("В базе нужно как минимум 3 тега и 2 ингредиента.")
+    variables = {key: decode(value) for key, value in variables.items()}
+    variables.update(
+        baseUrl=base_url,
+        firstTagId=tags[0]["id"],
+        secondTagId=tags[1]["id"],
+        secondTagSlug=tags[1]["slug"],
+        thirdTagSlug=tags[2]["slug"],
+        firstIndredientId=ingredients[0]["id"],
+        secondIndredientId=ingredients[1]["id"],
+    )
+    return variables
+
+
+def percentile(values, percent):
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+def summarize(stats, elapsed):
+    summary = {}
+    for name, timings in sorted(stats.timings.items()):
+        timings = sorted(timings)
+        summary[name] = {
+            "requests": len(timings),
+            "errors": stats.errors[name],
+            "error_rate": stats.errors[name] / len(timings),
+            "rps": len(timings) / elapsed,
+            **{
+                f"p{percent}_ms": percentile(timings, percent) * 1000
+                for percent in PERCENTILES
+            },
+            "max_ms": timings[-1] * 1000,
+        }
+    return summary
+
+
+def print_summary(concurrency, summary, elapsed):
+    total = sum(item["requests"] for item in summary.values())
+    errors = sum(item["errors"] for item in summary.values())
+    print(
+        f"\nПараллельность {concurrency}: {total} запросов за "
+        f"{elapsed:.1f} с, {total / elapsed:.1f} запр/с, "
+        f"ошибок {errors} ({errors / max(total, 1):.1%})"
+    )
+    header = ["запрос", "кол-во", "ошибки", "запр/с"] + [
+        f"p{percent}" for percent in PERCENTILES
+    ] + ["max"]
+    print("{:<48}{:>8}{:>8}{:>8}".format(*header[:4]) + "".join(
+        f"{column:>9}" for column in header[4:]
+    ))
+    for name, item in summary.items():
+        print(
+            f"{name:<48}{item['requests']:>8}{item['error_rate']:>8.1%}"
+            f"{item['rps']:>8.1f}"
+            + "".join(
+                f"{item[f'p{percent}_ms']:>9.1f}" for percent in PERCENTILES
+            )
+            + f"{item['max_ms']:>9.1f}"
+        )
+
+
+def run_level(concurrency, users, requests_by_name, variables):
+    stats = Stats()
+    run_id = uuid.uuid4().hex[:8]
+    virtual_users = [
+        VirtualUser(number, run_id, requests_by_name, variables)
+        for number in range(users)
+    ]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda user: user.run(stats), virtual_users))
+    elapsed = time.perf_counter() - start
+    return summarize(stats, elapsed), elapsed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--base-url", default=None,
+        help="Адрес API, по умолчанию baseUrl из коллекции.",
+    )
+    parser.add_argument(
+        "--users", type=int, default=50,
+        help="Число виртуальных пользователей на каждом уровне.",
+    )
+    parser.add_argument(
+        "--concurrency", default="10",
+        help="Уровни параллельности через запятую, например 1,10,50.",
+    )
+    parser.add_argument(
+        "--max-error-rate", type=float, default=0.01,
+        help="Доля ошибок, после которой уровни дальше не повышаются.",
+    )
+    parser.add_argument(
+        "--output", type=Path, default=None,
+        help="Файл для результатов в JSON.",
+    )
+    parser.add_argument("--collection", type=Path, default=COLLECTION)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    requests_by_name, variables = load_requests(args.collection)
+    base_url = (args.base_url or variables["baseUrl"]).rstrip("/")
+    variables = prepare_variables(base_url, variables)
+    results = {}
+    for concurrency in map(int, args.concurrency.split(",")):
+        summary, elapsed = run_level(
+            concurrency, args.users, requests_by_name, variables
+        )
+        print_summary(concurrency, summary, elapsed)
+        results[concurrency] = summary
+        errors = sum(item["errors"] for item in summary.values())
+        total = sum(item["requests"] for item in summary.values())
+        if errors / max(total, 1) > args.max_error_rate:
+            print(
+                f"\nДоля ошибок выше {args.max_error_rate:.1%}: "
+                f"предел достигнут на параллельности {concurrency}."
+            )
+            break
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()